@@ -1,74 +1,65 @@
 # Main.py
 
-from app.services.detector import detect_input_type
-from app.services.loaders.txt_extractor import process_txt
-from app.services.loaders.pdf_extractor import process_pdf
-from app.services.loaders.docx_extractor import process_docx
-from app.services.loaders.image_extractor import process_image
-from app.services.loaders.url_extractor import process_url
-
-from app.services.Embeddings import convert_to_langchain_docs, split_documents, embed_documents
-from app.services.vector_db import insert_documents
+from app.services.ingest_manifest import get_manifest
+from app.services.pipeline import ingest_source, ingest_site
 from app.services.rag import retrieve_documents, generate_rag_answer_with_eval
-from app.services.router import route_to_loader
 
 
 # ==============================
 # 📌 PROCESS & STORE ANY FILE/URL
 # ==============================
-def process_and_store_input(input_path, collection):
-    """Extracts text from any supported input → chunks → embeds → stores in Milvus."""
-    input_type = detect_input_type(input_path)
-
-    if input_type == "url":
-        raw_data = process_url(input_path)
-    elif input_type == "txt":
-        raw_data = process_txt(input_path)
-    elif input_type == "pdf":
-        raw_data = process_pdf(input_path)
-    elif input_type == "docx":
-        raw_data = process_docx(input_path)
-    elif input_type in ["png", "jpg", "jpeg"]:
-        raw_data = process_image(input_path)
-    else:
-        raise ValueError(f"Unsupported input type: {input_type}")
-
-    print(f"\n📄 Extracted {len(raw_data)} content chunks from → {input_path}")
-
-    # Convert → LangChain documents
-    docs = convert_to_langchain_docs(raw_data)
-
-    # Chunk the data
-    chunks = split_documents(docs, chunk_size=600, chunk_overlap=100)
-    print(f"🔹 After chunking → {len(chunks)} chunks")
-
-    # Generate embeddings
-    embeddings = embed_documents(chunks)
-    print("🔹 Embeddings Created")
-
-    # Store in DB
-    insert_documents(collection, chunks, embeddings)
-    collection.load()
+def process_and_store_input(input_path, store, batch_size=None,
+                            on_progress=None, cancel_event=None):
+    """Extracts text from any supported input → chunks → embeds → stores in the vector DB (streamed, incremental)."""
+    stats = ingest_source(input_path, store, batch_size=batch_size,
+                          chunk_size=600, chunk_overlap=100,
+                          on_progress=on_progress, cancel_event=cancel_event)
+
+    if stats["unchanged"]:
+        return 0
+
+    print(f"\n📄 Extracted {stats['extracted']} content chunks from → {input_path}")
+    print(f"🔹 After chunking → {stats['inserted']} new chunks "
+          f"({stats['skipped']} unchanged, {stats['deleted']} removed)")
+
+    store.load()
     print("\n💾 Stored Successfully in Vector DB\n")
-    return len(chunks)
+    return stats["inserted"]
+
+
+def process_local_file(path, store, batch_size=None,
+                       on_progress=None, cancel_event=None):
+    """Process a local file (PDF, TXT, DOCX, IMAGE) → embed → store in the vector DB."""
+    stats = ingest_source(path, store, batch_size=batch_size,
+                          on_progress=on_progress, cancel_event=cancel_event)
+    return stats["inserted"]
 
 
-def process_local_file(path, collection):
-    """Process a local file (PDF, TXT, DOCX, IMAGE) → embed → store in collection."""
-    data = route_to_loader(path)
-    docs = convert_to_langchain_docs(data)
-    chunks = split_documents(docs)
-    embeddings = embed_documents(chunks)
-    insert_documents(collection, chunks, embeddings)
-    return len(chunks)
+def crawl_and_store(url, store, max_depth=None, max_pages=None,
+                    on_progress=None, cancel_event=None):
+    """Crawl a website from url (same site only) → embed changed pages → store in the vector DB."""
+    stats = ingest_site(url, store, max_depth=max_depth, max_pages=max_pages,
+                        chunk_size=600, chunk_overlap=100,
+                        on_progress=on_progress, cancel_event=cancel_event)
+
+    if stats["inserted"] or stats["deleted"]:
+        store.load()
+    return stats
+
+
+def forget_source(store, source):
+    """Remove every vector of a file/URL and its fingerprints."""
+    store.delete_source(source)
+    store.flush()
+    get_manifest(store.manifest_namespace).forget(source)
 
 
 # ==================================================
 # 🔍 QUERY RAG → Retrieve + LLM Answer Generation
 # ==================================================
-def ask(vectorstore, question, top_k=4):
+def ask(store, question, top_k=4):
     """Retrieve docs & generate LLM answer using RAG."""
-    result = generate_rag_answer_with_eval(vectorstore, question, top_k)
+    result = generate_rag_answer_with_eval(store, question, top_k)
     
     print("\n===== 🧠 RAG ANSWER =====")
     print(result["answer"])
@@ -80,25 +71,18 @@ def ask(vectorstore, question, top_k=4):
     return result["answer"]
 
 
-def similarity_search(vectorstore, text, k=3):
-    """Retrieve top-k similar documents from the vectorstore."""
-    return retrieve_documents(vectorstore, text, top_k=k)
+def similarity_search(store, text, k=3, filters=None):
+    """Retrieve top-k similar documents from the vector store."""
+    return retrieve_documents(store, text, top_k=k, filters=filters)
 
 
-def get_all_documents(collection, limit=100):
+def get_all_documents(store, limit=100, filters=None):
     """Query all stored documents (up to limit)."""
-    return collection.query(
-        expr="id >= 0",
-        output_fields=["text", "source", "title", "type", "chunk_index"],
-        limit=limit
-    )
-
+    return store.query(filters=filters, limit=limit)
 
-def reset_collection(collection):
-    """Drop the Milvus collection completely."""
-    from pymilvus import utility
 
-    collection_name = collection.name
-    collection.release()
-    utility.drop_collection(collection_name)
+def reset_collection(store):
+    """Drop the collection / local store completely."""
+    store.drop()
+    get_manifest(store.manifest_namespace).clear()   # fingerprints point at vectors that no longer exist
     print("Collection dropped! Run again to re‑init.")
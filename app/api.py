@@ -1,16 +1,49 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+import json
 import os
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, nullcontext
 
 from app.Main import (
     process_and_store_input,
-    process_local_file
+    process_local_file,
+    crawl_and_store,
+    forget_source
 )
+from app.services import metrics
+from app.services.ingest_manifest import get_manifest
+from app.services.jobs import JobQueue, QueueFullError
+from app.services.uploads import UploadTooLarge, save_upload
 
 # Globals set during startup
-vectorstore = None
-collection = None
+store = None        # VectorStore (milvus | local, see VECTOR_BACKEND)
+job_queue = None
+
+
+def run_ingest_job(job):
+    """Worker-side ingestion: runs on a JobQueue thread, not in the request."""
+    if job.kind == "crawl":
+        stats = crawl_and_store(
+            job.target, store,
+            on_progress=job.update_progress,
+            cancel_event=job.cancel_event,
+            **job.options
+        )
+        return {"chunks_indexed": stats["inserted"], "pages": stats["pages"],
+                "changed": stats["changed"], "unchanged": stats["unchanged"],
+                "not_modified": stats["not_modified"], "failed": stats["failed"]}
+
+    ingest = process_and_store_input if job.kind == "url" else process_local_file
+
+    chunks = ingest(
+        job.target, store,
+        on_progress=job.update_progress,
+        cancel_event=job.cancel_event
+    )
+    return {"chunks_indexed": chunks}
 
 
 # =====================================================
@@ -18,30 +51,38 @@ collection = None
 # =====================================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global vectorstore, collection
+    global store, job_queue
 
-    print("🔄 Initializing Milvus collection & vectorstore...")
-
-    from app.services.vector_db import init_collection, create_index_if_missing
     from app.services.rag import init_vectorstore
+    from app.services.model_registry import warm_models
+    from app.services.llm_client import init_llm_client, close_llm_client
+    from app.services.reranker import RERANK_ENABLED, warm_reranker
 
-    # Initialize Milvus collection
-    collection = init_collection(collection_name="knowledge_base_vectors", vector_dim=384)
+    # Load embedding model once → shared by ingestion, retrieval & evaluation
+    print("🔄 Warming embedding model...")
+    warm_models()
+    if RERANK_ENABLED:
+        warm_reranker()
 
-    # Create index if missing
-    create_index_if_missing(collection)
+    print("🔄 Initializing vector store...")
 
-    # Load into memory for search
-    collection.load()
+    # Milvus: create/load collection + index, load for search
+    # Local:  open mmap matrix + index from disk
+    store = init_vectorstore(collection_name="knowledge_base_vectors")
 
-    # Initialize vectorstore for RAG
-    vectorstore = init_vectorstore(collection_name="knowledge_base_vectors")
+    # One pooled LLM client (keep-alive, retries, concurrency limit) for all requests
+    init_llm_client()
 
-    print("✅ Vectorstore Ready")
+    # Background ingestion workers
+    job_queue = JobQueue(run_ingest_job)
+    job_queue.start()
 
     yield  # App runs here
 
     print("🔻 Shutting down...")
+    job_queue.shutdown(timeout=30)
+    store.flush()
+    await close_llm_client()
 
 
 # Initialize app with lifespan
@@ -55,40 +96,120 @@ app = FastAPI(title="RAG API", version="1.1", lifespan=lifespan)
 class LoadURL(BaseModel):
     url: str
 
+class LoadCrawl(BaseModel):
+    url: str
+    max_depth: Optional[int] = None   # link hops from url (default: CRAWL_MAX_DEPTH)
+    max_pages: Optional[int] = None   # default: CRAWL_MAX_PAGES
+
+# filters → {"type": "pdf", "source": [...], "chunk_index": {"gte": 0, "lt": 20},
+#             "ingested_at": {"gte": "2024-01-01T00:00:00"}}  (see vector_store.py)
+
 class QueryRequest(BaseModel):
     question: str
     top_k: int = 3
+    eval_mode: Optional[str] = None   # inline | background | sampled | off (default: RAG_EVAL_MODE)
+    filters: Optional[Dict[str, Any]] = None
+    retrieval_mode: Optional[str] = None   # dense | hybrid (default: RETRIEVAL_MODE)
+    rerank: Optional[bool] = None          # cross-encoder rerank (default: RERANK_ENABLED)
+    timings: bool = False                  # add a per-stage "timings_ms" breakdown to the response
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    top_k: int = 3
+    eval_mode: Optional[str] = None
+    concurrency: Optional[int] = None   # max LLM calls in flight (default: LLM_BATCH_CONCURRENCY)
+    filters: Optional[Dict[str, Any]] = None
+    retrieval_mode: Optional[str] = None
+    rerank: Optional[bool] = None
 
 class SearchRequest(BaseModel):
     text: str
     top_k: int = 3
+    filters: Optional[Dict[str, Any]] = None
+    retrieval_mode: Optional[str] = None
+    rerank: Optional[bool] = None
+    timings: bool = False
 
 
 # ===================================================
 # LOAD / INGEST ENDPOINTS
 # ===================================================
 
-@app.post("/load/url")
+def submit_ingest_job(kind, target, **options):
+    try:
+        job = job_queue.submit(kind, target, **options)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return job
+
+
+@app.post("/load/url", status_code=202)
 def load_from_url(req: LoadURL):
-    """Extract → embed → store from URL"""
-    global collection
-    chunks_indexed = process_and_store_input(req.url, collection)
-    return {"status": "success", "message": f"URL indexed: {req.url}", "chunks_indexed": chunks_indexed}
+    """Queue extract → embed → store from URL (poll GET /jobs/{job_id})"""
+    job = submit_ingest_job("url", req.url)
+    return {"status": "queued", "message": f"URL queued: {req.url}", "job_id": job.id}
+
+
+@app.post("/load/crawl", status_code=202)
+def crawl_site(req: LoadCrawl):
+    """Queue a same-site crawl from a URL; unchanged pages are skipped (poll GET /jobs/{job_id})"""
+    job = submit_ingest_job("crawl", req.url, max_depth=req.max_depth, max_pages=req.max_pages)
+    return {"status": "queued", "message": f"Crawl queued: {req.url}", "job_id": job.id}
+
+
+@app.post("/load/upload", status_code=202)
+def upload_document(file: UploadFile = File(...)):
+    """Upload PDF/TXT/DOCX/IMAGE from UI → streamed to disk, then indexed in the background"""
+    # Sync endpoint → runs in the threadpool, so the chunked disk copy never blocks the event loop
+    try:
+        saved = save_upload(file.file, file.filename)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
+    # Same bytes already ingested → nothing to extract or embed
+    existing = get_manifest(store.manifest_namespace).find_source_by_hash(saved["sha256"])
+    if existing:
+        if os.path.abspath(existing) != os.path.abspath(saved["path"]):
+            os.remove(saved["path"])
+        return {"status": "duplicate", "file": file.filename, "source": existing, "job_id": None}
 
-@app.post("/load/upload")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload PDF/TXT/DOCX/IMAGE from UI"""
-    global collection
-    os.makedirs("uploads", exist_ok=True)
-    save_path = f"uploads/{file.filename}"
+    job = submit_ingest_job("file", saved["path"])
 
-    with open(save_path, "wb") as f:
-        f.write(await file.read())
+    return {"status": "queued", "file": file.filename, "source": saved["path"],
+            "bytes": saved["size"], "job_id": job.id}
 
-    chunks = process_local_file(save_path, collection)
 
-    return {"status": "success", "file": file.filename, "chunks_indexed": chunks}
+@app.delete("/sources")
+def delete_source(source: str):
+    """Remove all vectors (and fingerprints) of one file path / URL."""
+    forget_source(store, source)
+    return {"status": "deleted", "source": source}
+
+
+# ===================================================
+# JOB ENDPOINTS
+# ===================================================
+
+@app.get("/jobs")
+def jobs_summary():
+    return job_queue.stats()
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one at its next batch."""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 
 # ===================================================
@@ -96,14 +217,191 @@ async def upload_document(file: UploadFile = File(...)):
 # ===================================================
 
 @app.post("/query")
-def rag_query(req: QueryRequest):
-    global vectorstore
-    from app.services.rag import generate_rag_answer_with_eval
+async def rag_query(req: QueryRequest):
+    """
+    Runs on the event loop: encoding + search happen on worker threads and the
+    LLM call is awaited, so one worker serves many queries concurrently.
+    """
+    from app.services.rag import generate_rag_answer
+
+    started = time.perf_counter()
+    try:
+        with metrics.record_timings() if req.timings else nullcontext() as timings:
+            result = await generate_rag_answer(store, req.question, req.top_k, req.eval_mode,
+                                               req.filters, req.retrieval_mode, req.rerank)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    metrics.observe_request("/query", time.perf_counter() - started)
+
+    response = {
+        "query_id": result["query_id"],
+        "answer": result["answer"],
+        "evaluation_score": result["rag_score"],
+        "evaluation_status": result["evaluation_status"],
+        "cached": result["cached"],
+        "context_tokens": result.get("context_tokens"),
+        "retrieved_documents": result["docs"]
+    }
+    if timings is not None:
+        response["timings_ms"] = {**metrics.timings_ms(timings),
+                                  "total": round((time.perf_counter() - started) * 1000, 2)}
+    return response
+
+
+@app.post("/query/stream")
+def rag_query_stream(req: QueryRequest):
+    """
+    Server-Sent Events: `docs` → `token`* → `evaluation` (if enabled) → `done`.
+    Time-to-first-byte ≈ retrieval time; tokens follow as the LLM emits them.
+    """
+    from app.services import evaluations
+    from app.services.hybrid import resolve_retrieval_mode
+    from app.services.rag import stream_rag_answer
+    from app.services.vector_store import check_filters
+
+    try:
+        evaluations.resolve_mode(req.eval_mode)   # fail before the stream starts
+        check_filters(req.filters)
+        resolve_retrieval_mode(req.retrieval_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    def event_stream():
+        try:
+            for event, data in stream_rag_answer(store, req.question, req.top_k, req.eval_mode,
+                                                 req.filters, req.retrieval_mode, req.rerank):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+MAX_BATCH_QUESTIONS = int(os.getenv("MAX_BATCH_QUESTIONS", "1000"))
+
+
+@app.post("/query/batch")
+def rag_query_batch(req: BatchQueryRequest):
+    """
+    Many questions in one call: one encode batch, one multi-vector search,
+    LLM calls with bounded concurrency. Results are returned per question.
+    """
+    from app.services import evaluations
+    from app.services.rag import generate_rag_answers_batch
+
+    if len(req.questions) > MAX_BATCH_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUESTIONS} questions per batch")
+
+    concurrency = min(max(req.concurrency, 1), 64) if req.concurrency else None
+    try:
+        evaluations.resolve_mode(req.eval_mode)
+        results = generate_rag_answers_batch(store, req.questions, req.top_k, req.eval_mode,
+                                             concurrency, req.filters, req.retrieval_mode,
+                                             req.rerank)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {
+        "count": len(results),
+        "results": [
+            {
+                "query_id": r["query_id"],
+                "question": r["question"],
+                "answer": r.get("answer"),
+                "evaluation_score": r.get("rag_score"),
+                "evaluation_status": r.get("evaluation_status"),
+                "error": r.get("error"),
+                "retrieved_documents": r["docs"]
+            }
+            for r in results
+        ]
+    }
+
+
+@app.post("/search")
+async def search(req: SearchRequest):
+    """Filtered similarity (or hybrid) search without an LLM call → matching chunks + scores."""
+    from app.services.rag import aretrieve_documents
+
+    started = time.perf_counter()
+    try:
+        with metrics.record_timings() if req.timings else nullcontext() as timings:
+            docs = await aretrieve_documents(store, req.text, top_k=req.top_k, filters=req.filters,
+                                             mode=req.retrieval_mode, rerank=req.rerank)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    metrics.observe_request("/search", time.perf_counter() - started)
+
+    response = {
+        "count": len(docs),
+        "results": [{"text": d.page_content, **d.metadata} for d in docs]
+    }
+    if timings is not None:
+        response["timings_ms"] = {**metrics.timings_ms(timings),
+                                  "total": round((time.perf_counter() - started) * 1000, 2)}
+    return response
+
+
+@app.get("/evaluations")
+def list_evaluations(limit: int = 50):
+    """Recent evaluation results (inline + background) and their average score."""
+    from app.services import evaluations
 
-    result = generate_rag_answer_with_eval(vectorstore, req.question, req.top_k)
+    return evaluations.recent(limit)
+
+
+@app.get("/evaluations/{query_id}")
+def get_evaluation(query_id: str):
+    from app.services import evaluations
+
+    entry = evaluations.get(query_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No evaluation for this query_id")
+    return entry
+
+
+# ===================================================
+# MODEL ENDPOINTS
+# ===================================================
+
+@app.get("/models")
+def loaded_models():
+    """Embedding / reranking models held by this worker (load time + memory footprint)."""
+    from app.services.model_registry import model_stats
+    from app.services import reranker
+
+    return {"models": model_stats(), "reranker": reranker.stats()}
+
+
+@app.get("/llm/stats")
+def llm_stats():
+    """Calls, errors, retries, token counts and latency percentiles of the shared LLM client."""
+    from app.services.llm_client import get_llm_client
+
+    return get_llm_client().stats()
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit / miss counters of the query embedding + semantic answer caches."""
+    from app.services.Embeddings import query_embedding_cache
+    from app.services.semantic_cache import semantic_cache
 
     return {
-        "answer": result["answer"],
-        "evaluation_score": result["score"],
-        "retrieved_documents": result["docs"]
+        "query_embeddings": query_embedding_cache.stats(),
+        "semantic_answers": semantic_cache.stats(),
     }
+
+
+# ===================================================
+# METRICS
+# ===================================================
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus scrape target: per-stage latency histograms, chunk / token / cache counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
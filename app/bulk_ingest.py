@@ -0,0 +1,364 @@
+"""
+bulk_ingest.py
+--------------
+Command-line bulk ingestion of a directory tree or a zip / tar archive.
+
+- Every file goes through the normal loaders (detector → router), extracted
+  in a process pool (--workers), many documents at once
+- Chunks of many documents share large embedding batches (--batch-size);
+  batch N is inserted while batch N+1 is embedded
+- One store flush at the end (inserts are stored as soon as they are acknowledged)
+- Resumable: finished documents are recorded in the ingest manifest as they
+  complete, so a re-run skips them; documents cut off mid-insert are cleaned
+  up and redone; changed files only re-embed their changed chunks
+
+Usage:
+    python -m app.bulk_ingest /data/corpus --workers 8 --batch-size 1024
+    python -m app.bulk_ingest corpus.tar.gz --backend local
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from app.services.ingest_manifest import get_manifest, file_sha256, chunk_key
+from app.services.router import UnsupportedInput, route_to_loader
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+DEFAULT_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1024"))
+TASKS_PER_WORKER = 4   # extraction read-ahead → bounds memory + staged archive files
+
+
+# ----------------------------------------------------
+# INPUT WALKING
+# ----------------------------------------------------
+def is_archive(path):
+    return os.path.isfile(path) and str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def count_files(root):
+    """Number of files to process, or None when unknown up front (compressed tar)."""
+    if os.path.isdir(root):
+        return sum(len(files) for _, _, files in os.walk(root))
+    if zipfile.is_zipfile(root):
+        with zipfile.ZipFile(root) as z:
+            return sum(not info.is_dir() for info in z.infolist())
+    return None
+
+
+def _stage(staging_dir, n, name, src):
+    # Keep the extension → type detection works on the staged copy
+    path = os.path.join(staging_dir, f"{n}_{Path(name).name}")
+    with open(path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    return path
+
+
+def iter_files(root, staging_dir):
+    """
+    Yields (source, path, title, staged) for every file under root.
+    Archive members are extracted to staging_dir one at a time and get a
+    stable source name "<archive>!/<member>".
+    """
+    if os.path.isdir(root):
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                yield str(Path(path)), path, None, False
+
+    elif zipfile.is_zipfile(root):
+        with zipfile.ZipFile(root) as z:
+            for n, info in enumerate(z.infolist()):
+                if info.is_dir():
+                    continue
+                with z.open(info) as src:
+                    path = _stage(staging_dir, n, info.filename, src)
+                yield f"{root}!/{info.filename}", path, Path(info.filename).name, True
+
+    elif tarfile.is_tarfile(root):
+        with tarfile.open(root, "r:*") as t:
+            for n, member in enumerate(t):   # streamed → works for .tar.gz without an index
+                if not member.isfile():
+                    continue
+                with t.extractfile(member) as src:
+                    path = _stage(staging_dir, n, member.name, src)
+                yield f"{root}!/{member.name}", path, Path(member.name).name, True
+
+    else:
+        raise ValueError(f"Not a directory or zip/tar archive: {root}")
+
+
+# ----------------------------------------------------
+# EXTRACTION (process pool)
+# ----------------------------------------------------
+def _init_worker():
+    try:
+        from app.services.loaders import ocr, pdf_extractor
+        pdf_extractor.PDF_WORKERS = 1   # already one process per document here
+        ocr.OCR_WORKERS = 1
+    except Exception:
+        pass
+
+
+def extract_document(source, path, title, known_hash):
+    """Worker: hash → (skip if unchanged) → detect + load. Returns a plain dict."""
+    started = time.perf_counter()
+    try:
+        doc_hash = file_sha256(path)
+        if doc_hash == known_hash:
+            return {"source": source, "status": "unchanged"}
+        records = route_to_loader(path)
+    except UnsupportedInput as e:
+        return {"source": source, "status": "unsupported", "error": str(e)}
+    except Exception as e:
+        return {"source": source, "status": "failed", "error": str(e)}
+
+    for record in records:
+        record["source"] = source
+        if title:
+            record["title"] = title
+
+    return {"source": source, "status": "ok", "doc_hash": doc_hash, "records": records,
+            "seconds": time.perf_counter() - started}
+
+
+# ----------------------------------------------------
+# BULK INGESTER
+# ----------------------------------------------------
+class BulkIngester:
+    def __init__(self, store, workers=None, batch_size=None, chunk_size=600, chunk_overlap=100,
+                 progress_every=10.0):
+        self.store = store
+        self.manifest = get_manifest(store.manifest_namespace)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.progress_every = progress_every
+
+        self.stats = {"files": 0, "processed": 0, "documents": 0, "unchanged": 0,
+                      "unsupported": 0, "failed": 0, "chunks": 0, "skipped_chunks": 0, "deleted": 0}
+        self._docs = {}        # source → state, until all its chunks are inserted
+        self._buffer = []      # chunks waiting for the next embedding batch
+        self._completed = []   # finished documents waiting for the manifest commit
+        self._pending = None   # (insert future, batch) in flight
+        self._inserter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bulk-insert")
+        self._started = self._last_report = time.perf_counter()
+        self._total = None
+
+    # --- resume ---
+    def recover(self):
+        """Vectors of documents interrupted mid-insert are removed → they are redone in full."""
+        sources = self.manifest.in_progress()
+        for source in sources:
+            self.store.delete_source(source)
+            self.manifest.forget(source)
+        if sources:
+            print(f"♻ Cleaned up {len(sources)} documents interrupted by a previous run")
+
+    # --- documents → chunks ---
+    def add_document(self, result):
+        from app.services.Embeddings import iter_langchain_docs, iter_split_documents
+
+        source = result["source"]
+        existing = self.manifest.chunk_ids(source)
+        if not self.manifest.has_source(source):
+            # First time seen → drop vectors stored before fingerprinting (same as ingest_document)
+            self.store.delete_source(source, keep_ids=[pk for ids in existing.values() for pk in ids])
+
+        state = {"doc_hash": result["doc_hash"], "existing": existing, "seen": set(),
+                 "chunk_ids": {}, "outstanding": 0, "extracted": False}
+        self._docs[source] = state
+
+        chunks = iter_split_documents(iter_langchain_docs(result["records"]),
+                                      self.chunk_size, self.chunk_overlap)
+        for chunk in chunks:
+            h = chunk_key(chunk.page_content, chunk.metadata["chunk_index"])
+            if h in existing or h in state["seen"]:
+                state["seen"].add(h)
+                self.stats["skipped_chunks"] += 1
+                continue
+
+            state["seen"].add(h)
+            chunk.metadata["content_hash"] = h
+            self._buffer.append(chunk)
+            state["outstanding"] += 1
+
+            if len(self._buffer) >= self.batch_size:
+                self._embed_buffer()
+
+        state["extracted"] = True
+        self._finalize(source)
+
+    def _embed_buffer(self):
+        from app.services import metrics
+        from app.services.Embeddings import embed_documents
+
+        batch, self._buffer = self._buffer, []
+        # Recorded before any of their vectors land → an interruption is detectable
+        self.manifest.mark_in_progress({doc.metadata["source"] for doc in batch})
+
+        with metrics.span("embed"):
+            embeddings = embed_documents(batch)
+
+        if self._pending is not None:
+            self._complete_insert()
+        self._pending = (self._inserter.submit(self.store.insert, batch, embeddings, False), batch)
+
+    def _complete_insert(self):
+        future, batch = self._pending
+        self._pending = None
+
+        ids = future.result()
+        if len(ids) != len(batch):
+            raise RuntimeError(f"Insert returned {len(ids)} ids for {len(batch)} chunks")
+
+        for doc, pk in zip(batch, ids):
+            state = self._docs[doc.metadata["source"]]
+            state["chunk_ids"].setdefault(doc.metadata["content_hash"], []).append(pk)
+            state["outstanding"] -= 1
+        self.stats["chunks"] += len(batch)
+
+        for source in {doc.metadata["source"] for doc in batch}:
+            self._finalize(source)
+        self._commit()
+
+    def _finalize(self, source):
+        """All chunks of a fully extracted document stored → drop its stale chunks, queue the manifest entry."""
+        state = self._docs[source]
+        if not state["extracted"] or state["outstanding"]:
+            return
+        del self._docs[source]
+
+        stale = [h for h in state["existing"] if h not in state["seen"]]
+        stale_ids = [pk for h in stale for pk in state["existing"][h]]
+        if stale_ids:
+            self.store.delete_ids(stale_ids)
+            self.stats["deleted"] += len(stale_ids)
+
+        self._completed.append((source, state["doc_hash"], state["chunk_ids"], stale))
+        self.stats["documents"] += 1
+
+    def _commit(self):
+        if self._completed:
+            self.manifest.complete_documents(self._completed)   # one transaction per batch
+            self._completed = []
+
+    def finish(self):
+        from app.services import metrics
+
+        if self._buffer:
+            self._embed_buffer()
+        if self._pending is not None:
+            self._complete_insert()
+        self._commit()
+        self._inserter.shutdown()
+
+        with metrics.span("flush"):
+            self.store.flush()
+        self.store.load()
+        metrics.count_chunks({"inserted": self.stats["chunks"], "skipped": self.stats["skipped_chunks"],
+                              "deleted": self.stats["deleted"]})
+
+    # --- progress ---
+    def report(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self._last_report < self.progress_every:
+            return
+        self._last_report = now
+
+        s, elapsed = self.stats, max(now - self._started, 1e-9)
+        rate = s["processed"] / elapsed
+        eta = ""
+        if self._total and rate:
+            remaining = (self._total - s["processed"]) / rate
+            eta = f" | ETA {int(remaining // 3600)}h{int(remaining % 3600 // 60):02d}m"
+
+        print(f"📦 {s['processed']:,}/{self._total or '?'} files | {s['documents']:,} ingested, "
+              f"{s['unchanged']:,} unchanged, {s['unsupported']:,} unsupported, {s['failed']:,} failed | "
+              f"{s['chunks']:,} chunks | {rate:.1f} files/s, {s['chunks'] / elapsed:.0f} chunks/s{eta}")
+
+    # --- main loop ---
+    def _drain(self, in_flight):
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            staged = in_flight.pop(future)
+            if staged:
+                os.remove(staged)
+
+            result = future.result()
+            self.stats["processed"] += 1
+            if result["status"] == "ok":
+                self.add_document(result)
+            else:
+                self.stats[result["status"]] += 1
+                if result["status"] == "failed":
+                    print(f"❌ {result['source']}: {result['error']}")
+            self.report()
+
+    def run(self, root):
+        self.recover()
+        self._total = count_files(root)
+        staging_dir = tempfile.mkdtemp(prefix="bulk-ingest-")
+
+        # spawn → workers never inherit the loaded model or the store's threads
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   mp_context=multiprocessing.get_context("spawn"))
+        in_flight = {}
+        try:
+            for source, path, title, staged in iter_files(root, staging_dir):
+                self.stats["files"] += 1
+                future = pool.submit(extract_document, source, path, title,
+                                     self.manifest.get_doc_hash(source))
+                in_flight[future] = path if staged else None
+
+                while len(in_flight) >= self.workers * TASKS_PER_WORKER:
+                    self._drain(in_flight)
+
+            while in_flight:
+                self._drain(in_flight)
+
+        except KeyboardInterrupt:
+            print("⏹ Interrupted → storing what was extracted so far (re-run to resume)")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.finish()
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        self.report(force=True)
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="directory, .zip or .tar[.gz|.bz2|.xz]")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=None, help=f"chunks per embedding batch (default {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--chunk-size", type=int, default=600)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--backend", default=None, help="milvus | local (default: VECTOR_BACKEND)")
+    parser.add_argument("--collection", default="knowledge_base_vectors")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines")
+    args = parser.parse_args()
+
+    from app.services.model_registry import warm_models
+    from app.services.vector_store import init_vector_store
+
+    warm_models()
+    store = init_vector_store(backend=args.backend, collection_name=args.collection)
+
+    stats = BulkIngester(store, args.workers, args.batch_size, args.chunk_size, args.chunk_overlap,
+                         args.progress_every).run(args.path)
+    print(f"✅ Bulk ingest done → {stats}")
+
+
+if __name__ == "__main__":
+    main()
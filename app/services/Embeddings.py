@@ -1,57 +1,81 @@
 # Embeddings.py
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
+
+from app.services.cache import LRUCache
+from app.services.model_registry import (
+    get_embedding_model, default_model_name, normalize_model_name
+)
 
 load_dotenv()
 
+# Query embeddings cache → repeated questions skip the encoder
+query_embedding_cache = LRUCache(
+    maxsize=int(os.getenv("QUERY_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "3600")),
+)
 
-# Convert raw loader output → LangChain Document objects
-def convert_to_langchain_docs(data):
-    docs = [
-        Document(
+# Encoder calls from async code run here → the event loop never waits on the model
+_encode_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EMBED_WORKERS", "2")), thread_name_prefix="embed"
+)
+
+
+# Convert raw loader output → LangChain Document objects (lazily)
+def iter_langchain_docs(data):
+    for item in data:
+        yield Document(
             page_content=item["text"],
             metadata={
                 "source": item["source"], 
                 "title": item.get("title", ""),
                 "type": item.get("type", ""),
-                "chunk_index": item["chunk_index"]
+                "chunk_index": item["chunk_index"],
+                **({"page": item["page"]} if "page" in item else {})
             }
         )
-        for item in data
-    ]
-    return docs
- 
 
-# Split long documents into smaller chunks
-def split_documents(docs, chunk_size=600, chunk_overlap=100):
+
+def convert_to_langchain_docs(data):
+    return list(iter_langchain_docs(data))
+
+
+# Split long documents into smaller chunks (lazily, one document at a time)
+def iter_split_documents(docs, chunk_size=600, chunk_overlap=100):
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap
     )
 
-    split_docs = []
+    # chunk_index = position in the source's full split (every chunk is counted,
+    # including ones the pipeline later skips as unchanged) → adjacent chunks have
+    # consecutive indexes; the context builder merges such runs and strips their overlap.
+    # Skipping is keyed on (position, content) → see ingest_manifest.chunk_key
+    next_index = {}
+
     for doc in docs:
-        chunks = splitter.split_text(doc.page_content)
-        for i, chunk in enumerate(chunks):   # reset chunk index for split chunks
-            split_docs.append(
-                Document(
-                    page_content=chunk,
-                    metadata={**doc.metadata, "chunk_index": i}
-                )
+        source = doc.metadata.get("source", "")
+        for chunk in splitter.split_text(doc.page_content):
+            chunk_index = next_index.get(source, 0)
+            next_index[source] = chunk_index + 1
+            yield Document(
+                page_content=chunk,
+                metadata={**doc.metadata, "chunk_index": chunk_index}
             )
-    return split_docs
 
 
-# Embed chunks using SentenceTransformer
-def embed_documents(docs, model_name=None):
-    if model_name is None:
-        model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+def split_documents(docs, chunk_size=600, chunk_overlap=100):
+    return list(iter_split_documents(docs, chunk_size, chunk_overlap))
 
-    model = SentenceTransformer(model_name)
+
+# Embed chunks using the shared SentenceTransformer (loaded once per worker)
+def embed_documents(docs, model_name=None):
+    model = get_embedding_model(model_name)
 
     # Accept both list[str] and list[Document]
     if isinstance(docs[0], str):
@@ -63,3 +87,51 @@ def embed_documents(docs, model_name=None):
 
     embeddings = model.encode(texts)
     return embeddings
+
+
+# Embed a single search query (cached on normalized text + model name)
+def embed_query(query, model_name=None):
+    model_name = normalize_model_name(model_name or default_model_name())
+    key = (model_name, " ".join(query.split()))
+
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = embed_documents([query], model_name)[0]
+        query_embedding_cache.put(key, embedding)
+
+    return embedding
+
+
+# Async variants → same model + cache, encoding happens off the event loop
+async def aembed_documents(docs, model_name=None):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_encode_executor, embed_documents, docs, model_name)
+
+
+async def aembed_query(query, model_name=None):
+    model_name = normalize_model_name(model_name or default_model_name())
+    key = (model_name, " ".join(query.split()))
+
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = (await aembed_documents([query], model_name))[0]
+        query_embedding_cache.put(key, embedding)
+
+    return embedding
+
+
+# Embed many search queries → cache hits reused, all misses in ONE encode batch
+def embed_queries(queries, model_name=None):
+    model_name = normalize_model_name(model_name or default_model_name())
+    keys = [(model_name, " ".join(q.split())) for q in queries]
+
+    embeddings = [query_embedding_cache.get(key) for key in keys]
+    missing = [i for i, e in enumerate(embeddings) if e is None]
+
+    if missing:
+        encoded = embed_documents([queries[i] for i in missing], model_name)
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+            query_embedding_cache.put(keys[i], embedding)
+
+    return embeddings
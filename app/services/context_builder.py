@@ -0,0 +1,143 @@
+"""
+context_builder.py
+------------------
+Turns retrieved chunks into the prompt context, within a token budget.
+
+- Chunks of the same source with consecutive chunk_index are merged into one
+  passage; the text repeated by the splitter's chunk_overlap is dropped
+- Passages are ordered by relevance (best-ranked chunk first)
+- Packed until CONTEXT_TOKEN_BUDGET tokens; the passage that does not fit is
+  truncated at a token boundary
+- Tokens are counted with a real tokenizer: CONTEXT_TOKENIZER (any Hugging Face
+  tokenizer). Set it to the LLM's tokenizer for an exact budget; the default
+  (the embedding model's tokenizer) only approximates the LLM's count, so
+  leave some headroom in CONTEXT_TOKEN_BUDGET
+"""
+
+import os
+import threading
+
+from app.services.model_registry import get_embedding_model
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "")
+MIN_OVERLAP_CHARS = 20        # shorter suffix/prefix matches are coincidences
+MIN_TRUNCATED_TOKENS = 50     # don't end the context with a tiny fragment
+SEPARATOR = "\n\n"
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+# ----------------------------------------------------
+# TOKENIZER
+# ----------------------------------------------------
+def get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                if CONTEXT_TOKENIZER:
+                    from transformers import AutoTokenizer
+                    _tokenizer = AutoTokenizer.from_pretrained(CONTEXT_TOKENIZER)
+                else:
+                    _tokenizer = get_embedding_model().tokenizer
+    return _tokenizer
+
+
+def count_tokens(text):
+    return len(get_tokenizer()(text, add_special_tokens=False)["input_ids"])
+
+
+def truncate_tokens(text, max_tokens):
+    """First max_tokens tokens of text, cut on the original characters (no decode round trip)."""
+    tokenizer = get_tokenizer()
+    if getattr(tokenizer, "is_fast", False):
+        offsets = tokenizer(text, add_special_tokens=False,
+                            return_offsets_mapping=True)["offset_mapping"]
+        if len(offsets) <= max_tokens:
+            return text
+        return text[:offsets[max_tokens - 1][1]]
+
+    # Slow tokenizers have no offsets → proportional character cut
+    total = count_tokens(text)
+    return text if total <= max_tokens else text[:len(text) * max_tokens // total]
+
+
+# ----------------------------------------------------
+# MERGING
+# ----------------------------------------------------
+def merge_overlap(left, right):
+    """Join two consecutive chunks, dropping the longest suffix of left that starts right."""
+    for size in range(min(len(left), len(right)), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + SEPARATOR + right
+
+
+def merge_runs(docs):
+    """
+    docs in relevance order → passages [{"text", "source", "chunks", "rank"}],
+    one per run of consecutive chunks from the same source, best rank first.
+    """
+    best = {}
+    for rank, doc in enumerate(docs):
+        key = (doc.metadata.get("source", ""), doc.metadata.get("chunk_index"))
+        best.setdefault(key, (rank, doc))   # duplicates (e.g. hybrid) keep their best rank
+
+    by_position = sorted(best.items(), key=lambda item: (item[0][0], item[0][1] is None, item[0][1] or 0))
+    passages = []
+
+    for (source, chunk_index), (rank, doc) in by_position:
+        last = passages[-1] if passages else None
+        if (last is not None and last["source"] == source and chunk_index is not None
+                and last["chunks"][-1] is not None and chunk_index == last["chunks"][-1] + 1):
+            last["text"] = merge_overlap(last["text"], doc.page_content)
+            last["chunks"].append(chunk_index)
+            last["rank"] = min(last["rank"], rank)
+        else:
+            passages.append({"text": doc.page_content, "source": source,
+                             "chunks": [chunk_index], "rank": rank})
+
+    return sorted(passages, key=lambda p: p["rank"])
+
+
+# ----------------------------------------------------
+# PACKING
+# ----------------------------------------------------
+def build_context(docs, token_budget=None, debug=False):
+    """
+    Retrieved docs → (context string, stats).
+    stats: chunks, passages, passages_used, tokens; debug=True adds raw_tokens
+    (what plain joining would cost — tokenizes every chunk again).
+    """
+    budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    passages = merge_runs(docs)
+
+    parts, used = [], 0
+    separator_tokens = count_tokens(SEPARATOR)
+
+    for passage in passages:
+        cost = count_tokens(passage["text"]) + (separator_tokens if parts else 0)
+
+        if used + cost <= budget:
+            parts.append(passage["text"])
+            used += cost
+            continue
+
+        remaining = budget - used - (separator_tokens if parts else 0)
+        if remaining >= MIN_TRUNCATED_TOKENS or not parts:
+            parts.append(truncate_tokens(passage["text"], max(remaining, 1)))
+            used += remaining
+        break
+
+    context = SEPARATOR.join(parts)
+    stats = {
+        "chunks": len(docs),
+        "passages": len(passages),
+        "passages_used": len(parts),
+        "tokens": count_tokens(context),
+    }
+    if debug:
+        stats["raw_tokens"] = count_tokens(SEPARATOR.join(d.page_content for d in docs))
+    return context, stats
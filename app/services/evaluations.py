@@ -0,0 +1,91 @@
+"""
+evaluations.py
+--------------
+RAG evaluation off the request critical path.
+
+Modes (RAG_EVAL_MODE, overridable per request):
+- inline     → evaluate before returning (old behaviour, ~2x latency)
+- background → return the answer now, evaluate on a worker thread
+- sampled    → like background, but only for RAG_EVAL_SAMPLE_RATE of queries
+- off        → never evaluate
+
+Results are kept per query_id (bounded LRU) and served by /evaluations.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.cache import LRUCache
+
+EVAL_MODES = ("inline", "background", "sampled", "off")
+DEFAULT_EVAL_MODE = os.getenv("RAG_EVAL_MODE", "inline")
+EVAL_SAMPLE_RATE = float(os.getenv("RAG_EVAL_SAMPLE_RATE", "0.05"))
+
+_results = LRUCache(
+    maxsize=int(os.getenv("EVAL_STORE_SIZE", "5000")),
+    ttl=float(os.getenv("EVAL_STORE_TTL", "86400")),
+)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EVAL_WORKERS", "2")),
+    thread_name_prefix="rag-eval"
+)
+
+
+def resolve_mode(mode=None):
+    """
+    Effective mode for one query → "inline" | "background" | "off".
+    "sampled" becomes "background" for a random RAG_EVAL_SAMPLE_RATE share.
+    """
+    mode = (mode or DEFAULT_EVAL_MODE).lower()
+
+    if mode not in EVAL_MODES:
+        raise ValueError(f"Unknown evaluation mode: {mode}")
+
+    if mode == "sampled":
+        return "background" if random.random() < EVAL_SAMPLE_RATE else "off"
+    return mode
+
+
+def record(query_id, question, status, scores=None, error=None):
+    entry = {
+        "query_id": query_id,
+        "question": question,
+        "status": status,          # pending | done | failed
+        "scores": scores,
+        "error": error,
+        "updated_at": time.time(),
+    }
+    _results.put(query_id, entry)
+    return entry
+
+
+def submit(query_id, question, evaluate_fn):
+    """Run evaluate_fn() (→ scores dict) on the evaluation pool, storing the result."""
+    record(query_id, question, "pending")
+
+    def run():
+        try:
+            record(query_id, question, "done", scores=evaluate_fn())
+        except Exception as e:
+            print(f"❌ Evaluation {query_id} failed:", e)
+            record(query_id, question, "failed", error=str(e))
+
+    _executor.submit(run)
+
+
+def get(query_id):
+    return _results.get(query_id)
+
+
+def recent(limit=50):
+    """Latest evaluations (newest first) + average score of the finished ones."""
+    entries = _results.values()[::-1][:limit]
+    scores = [e["scores"]["rag_score"] for e in entries if e["status"] == "done"]
+
+    return {
+        "count": len(entries),
+        "avg_rag_score": round(sum(scores) / len(scores), 2) if scores else None,
+        "evaluations": entries,
+    }
@@ -0,0 +1,100 @@
+"""
+hybrid.py
+---------
+Dense + BM25 retrieval fused with reciprocal rank fusion (RRF).
+
+- "dense"  → vector search only (default)
+- "hybrid" → vector search and the store's lexical index run concurrently,
+             each with its own candidate depth, then fused:
+             score(doc) = Σ weight_r / (RRF_K + rank_r(doc))
+
+Pick the default with RETRIEVAL_MODE; requests can override it.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+
+RETRIEVAL_MODES = ("dense", "hybrid")
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense").lower()
+
+HYBRID_DENSE_K = int(os.getenv("HYBRID_DENSE_K", "20"))       # candidates per retriever
+HYBRID_LEXICAL_K = int(os.getenv("HYBRID_LEXICAL_K", "20"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+
+
+def resolve_retrieval_mode(mode, store=None):
+    """Validated mode; hybrid falls back to dense when the store has no lexical index."""
+    mode = (mode or RETRIEVAL_MODE).lower()
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode} (expected one of {RETRIEVAL_MODES})")
+
+    if mode == "hybrid" and store is not None and store.lexical is None:
+        return "dense"
+    return mode
+
+
+def rrf_fuse(dense_docs, lexical_docs, top_k,
+             dense_weight=HYBRID_DENSE_WEIGHT, lexical_weight=HYBRID_LEXICAL_WEIGHT, rrf_k=RRF_K):
+    """Two ranked Document lists → top_k fused Documents (metadata score = RRF score)."""
+    fused = {}
+
+    for name, docs, weight in (("dense", dense_docs, dense_weight),
+                               ("lexical", lexical_docs, lexical_weight)):
+        for rank, doc in enumerate(docs, start=1):
+            entry = fused.setdefault(doc.metadata["id"], {"doc": doc, "score": 0.0})
+            entry["score"] += weight / (rrf_k + rank)
+            entry[f"{name}_rank"] = rank
+
+    ranked = sorted(fused.values(), key=lambda e: e["score"], reverse=True)[:top_k]
+
+    return [
+        Document(
+            page_content=e["doc"].page_content,
+            metadata={**e["doc"].metadata, "score": round(e["score"], 6),
+                      "dense_rank": e.get("dense_rank"), "lexical_rank": e.get("lexical_rank")}
+        )
+        for e in ranked
+    ]
+
+
+def _candidates(top_k):
+    return max(top_k, HYBRID_DENSE_K), max(top_k, HYBRID_LEXICAL_K)
+
+
+def hybrid_search(store, query, query_emb, top_k=5, filters=None):
+    """Both retrievers in parallel threads → fused top_k."""
+    dense_k, lexical_k = _candidates(top_k)
+
+    dense = _executor.submit(store.search, query_emb, k=dense_k, filters=filters)
+    lexical = _executor.submit(store.lexical.search, query, k=lexical_k, filters=filters)
+
+    return rrf_fuse(dense.result(), lexical.result(), top_k)
+
+
+async def ahybrid_search(store, query, query_emb, top_k=5, filters=None):
+    """hybrid_search() for the event loop (both retrievers awaited concurrently)."""
+    dense_k, lexical_k = _candidates(top_k)
+
+    dense, lexical = await asyncio.gather(
+        asyncio.to_thread(store.search, query_emb, k=dense_k, filters=filters),
+        asyncio.to_thread(store.lexical.search, query, k=lexical_k, filters=filters),
+    )
+    return rrf_fuse(dense, lexical, top_k)
+
+
+def hybrid_search_batch(store, queries, query_embs, top_k=5, filters=None):
+    """One multi-vector dense search while the keyword searches run → fused per query."""
+    dense_k, lexical_k = _candidates(top_k)
+
+    lexical = [_executor.submit(store.lexical.search, q, k=lexical_k, filters=filters)
+               for q in queries]
+    dense = store.search_batch(query_embs, k=dense_k, filters=filters)
+
+    return [rrf_fuse(d, l.result(), top_k) for d, l in zip(dense, lexical)]
@@ -0,0 +1,235 @@
+"""
+ingest_manifest.py
+------------------
+Fingerprints of everything already ingested (SQLite, stdlib only).
+
+- source → document hash   (unchanged source → skip without re-embedding)
+- source → chunk key → vector ids   (changed source → replace only changed chunks)
+- sources being bulk-ingested        (interrupted run → partial vectors cleaned up)
+- crawled URL → ETag / Last-Modified + links   (unchanged page → 304, not re-fetched)
+
+The vectors themselves live in the vector DB; this only remembers
+which ids belong to which content.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+MANIFEST_DIR = os.getenv("INGEST_MANIFEST_DIR", "data/manifests")
+
+
+# ----------------------------------------------------
+# FINGERPRINTS
+# ----------------------------------------------------
+def file_sha256(path, block_size=1024 * 1024):
+    """Hash a file in fixed-size blocks (constant memory)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def records_sha256(records):
+    """Hash extracted loader records (used when there is no file, e.g. URLs)."""
+    h = hashlib.sha256()
+    for r in records:
+        h.update(r["text"].encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def chunk_sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_key(text, chunk_index):
+    """
+    Identity of a stored chunk: its content at its position in the source's
+    split. A chunk that moved (text inserted before it) gets a new key →
+    it is re-stored with its new chunk_index and the old copy goes stale,
+    so stored indexes never collide after a partial re-ingest.
+    """
+    return chunk_sha256(f"{chunk_index}\0{text}")
+
+
+# ----------------------------------------------------
+# MANIFEST STORE
+# ----------------------------------------------------
+class IngestManifest:
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()   # one connection shared by ingestion threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source     TEXT PRIMARY KEY,
+                doc_hash   TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sources_hash ON sources(doc_hash);
+            CREATE TABLE IF NOT EXISTS chunks (
+                source     TEXT,
+                chunk_hash TEXT,
+                ids        TEXT,
+                PRIMARY KEY (source, chunk_hash)
+            );
+            CREATE TABLE IF NOT EXISTS in_progress (
+                source     TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS http_validators (
+                url           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                links         TEXT
+            );
+        """)
+        self._conn.commit()
+
+    # --- documents ---
+    def get_doc_hash(self, source):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_hash FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def find_source_by_hash(self, doc_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source FROM sources WHERE doc_hash = ? LIMIT 1", (doc_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def has_source(self, source):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        return row is not None
+
+    def set_doc_hash(self, source, doc_hash):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (source, doc_hash, updated_at) VALUES (?, ?, ?)",
+                (source, doc_hash, time.time())
+            )
+            self._conn.commit()
+
+    # --- chunks ---
+    def chunk_ids(self, source):
+        """{chunk_hash: [vector ids]} for one source."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_hash, ids FROM chunks WHERE source = ?", (source,)
+            ).fetchall()
+        return {h: json.loads(ids) for h, ids in rows}
+
+    def add_chunks(self, source, hash_to_ids):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (source, chunk_hash, ids) VALUES (?, ?, ?)",
+                [(source, h, json.dumps(ids)) for h, ids in hash_to_ids.items()]
+            )
+            self._conn.commit()
+
+    def remove_chunks(self, source, chunk_hashes):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE source = ? AND chunk_hash = ?",
+                [(source, h) for h in chunk_hashes]
+            )
+            self._conn.commit()
+
+    # --- bulk ingestion ---
+    def mark_in_progress(self, sources):
+        """Sources about to get vectors that are not recorded yet (one commit for all)."""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO in_progress (source) VALUES (?)",
+                                   [(s,) for s in sources])
+            self._conn.commit()
+
+    def in_progress(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT source FROM in_progress")]
+
+    def complete_documents(self, documents):
+        """
+        documents → [(source, doc_hash, {new chunk hash: [ids]}, [stale chunk hashes])],
+        recorded in one transaction and removed from in_progress.
+        """
+        now = time.time()
+        with self._lock:
+            for source, doc_hash, hash_to_ids, stale in documents:
+                self._conn.executemany(
+                    "DELETE FROM chunks WHERE source = ? AND chunk_hash = ?",
+                    [(source, h) for h in stale]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (source, chunk_hash, ids) VALUES (?, ?, ?)",
+                    [(source, h, json.dumps(ids)) for h, ids in hash_to_ids.items()]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (source, doc_hash, updated_at) VALUES (?, ?, ?)",
+                    (source, doc_hash, now)
+                )
+                self._conn.execute("DELETE FROM in_progress WHERE source = ?", (source,))
+            self._conn.commit()
+
+    # --- crawling ---
+    def get_http_validators(self, url):
+        """{"etag", "last_modified", "links"} from the last crawl of url, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, links FROM http_validators WHERE url = ?", (url,)
+            ).fetchone()
+        if not row or not (row[0] or row[1]):
+            return None
+        return {"etag": row[0], "last_modified": row[1], "links": json.loads(row[2] or "[]")}
+
+    def set_http_validators(self, url, etag, last_modified, links):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_validators (url, etag, last_modified, links) VALUES (?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(links))
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM sources")
+            self._conn.execute("DELETE FROM in_progress")
+            self._conn.execute("DELETE FROM http_validators")
+            self._conn.commit()
+
+    def forget(self, source):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM in_progress WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM http_validators WHERE url = ?", (source,))
+            self._conn.commit()
+
+
+_manifests = {}
+_manifest_lock = threading.Lock()
+
+
+def get_manifest(namespace="default"):
+    """
+    Process-wide manifest per vector store (opened lazily).
+    namespace → VectorStore.manifest_namespace, so switching backend
+    or collection never skips ingesting into the new store.
+    """
+    with _manifest_lock:
+        if namespace not in _manifests:
+            _manifests[namespace] = IngestManifest(os.path.join(MANIFEST_DIR, f"{namespace}.db"))
+        return _manifests[namespace]
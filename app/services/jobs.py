@@ -0,0 +1,178 @@
+"""
+jobs.py
+-------
+Background ingestion jobs.
+
+- Bounded queue → submit() fails fast when the backlog is full
+- N worker threads → throughput scales with INGEST_WORKERS
+- Per-job status + progress (chunks extracted / embedded / inserted)
+- Cancellation (queued jobs are skipped, running jobs stop at the next batch)
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.services.pipeline import IngestCancelled
+
+DEFAULT_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+DEFAULT_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "32"))
+DEFAULT_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "500"))
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit() when the queue is at capacity."""
+
+
+class IngestJob:
+    def __init__(self, kind, target, **options):
+        self.id = uuid.uuid4().hex
+        self.kind = kind            # "url" | "file" | "crawl"
+        self.target = target        # URL or saved file path
+        self.options = options      # extra kwargs for the handler
+        self.status = "queued"
+        self.progress = {"extracted": 0, "embedded": 0, "inserted": 0}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    def update_progress(self, stats):
+        self.progress = stats
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    def __init__(self, handler, workers=None, max_queue=None, history=None):
+        """
+        handler(job) → runs the ingestion and returns a JSON-able result.
+        It should honour job.cancel_event and report via job.update_progress.
+        """
+        self.handler = handler
+        self.workers = workers or DEFAULT_WORKERS
+        self.history = history or DEFAULT_HISTORY
+        self._queue = queue.Queue(maxsize=max_queue or DEFAULT_QUEUE_SIZE)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    # ----------------------------------------------------
+    # LIFECYCLE
+    # ----------------------------------------------------
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"ingest-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"🧵 Ingestion queue started ({self.workers} workers)")
+
+    def shutdown(self, timeout=None):
+        """Stops workers after the jobs they are currently running."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    # ----------------------------------------------------
+    # PUBLIC API
+    # ----------------------------------------------------
+    def submit(self, kind, target, **options):
+        job = IngestJob(kind, target, **options)
+
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError("Ingestion queue is full, retry later")
+            self._jobs[job.id] = job
+            self._prune()
+
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+
+        # Same lock as the worker's queued → running switch → never both
+        with self._lock:
+            if job.status not in FINISHED_STATES:
+                job.cancel_event.set()
+                if job.status == "queued":
+                    job.status = "cancelled"
+                    job.finished_at = time.time()
+
+        return job
+
+    def stats(self):
+        counts = {}
+        for job in list(self._jobs.values()):
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.workers, "queued": self._queue.qsize(), "jobs": counts}
+
+    # ----------------------------------------------------
+    # INTERNALS
+    # ----------------------------------------------------
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history limit."""
+        excess = len(self._jobs) - self.history
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status in FINISHED_STATES:
+                del self._jobs[job_id]
+                excess -= 1
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+
+            try:
+                with self._lock:
+                    if job.status != "queued" or job.cancel_event.is_set():
+                        continue   # cancelled while queued (or after being dequeued)
+
+                    job.status = "running"
+                    job.started_at = time.time()
+
+                try:
+                    job.result = self.handler(job)
+                    job.status = "done"
+                except IngestCancelled as e:
+                    job.status = "cancelled"
+                    job.error = str(e)
+                except Exception as e:
+                    print(f"❌ Ingestion job {job.id} failed:", e)
+                    job.status = "failed"
+                    job.error = str(e)
+
+                job.finished_at = time.time()
+
+            finally:
+                self._queue.task_done()
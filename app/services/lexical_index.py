@@ -0,0 +1,185 @@
+"""
+lexical_index.py
+----------------
+BM25 keyword index kept next to the vector store (SQLite FTS5, stdlib only).
+
+- Catches exact identifiers dense retrieval misses (part numbers, error codes)
+- Updated incrementally by the vector store on every insert / delete / drop
+- Same vector ids + metadata filters as the vector store → results can be fused
+- One file per store: LEXICAL_INDEX_DIR/{backend}-{name}.db
+"""
+
+import os
+import re
+import sqlite3
+import threading
+
+from langchain_core.documents import Document
+
+from app.services.vector_store import check_filters
+
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR", "data/lexical")
+
+# "-" and "_" are part of a token → "ERR-404" / "part_12b" stay one term
+TOKEN_RE = re.compile(r"[\w\-]+")
+META_COLUMNS = ("type", "title", "source", "chunk_index", "ingested_at", "page")
+
+
+class LexicalIndex:
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id          INTEGER PRIMARY KEY,   -- vector store id
+                text        TEXT,
+                type        TEXT,
+                title       TEXT,
+                source      TEXT,
+                chunk_index INTEGER,
+                ingested_at INTEGER,
+                page        INTEGER DEFAULT -1
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                text, content='chunks', content_rowid='id',
+                tokenize="unicode61 tokenchars '-_'"
+            );
+        """)
+
+        # Index files created before page existed → add the column (old rows read as -1)
+        columns = {r[1] for r in self._conn.execute("PRAGMA table_info(chunks)")}
+        if "page" not in columns:
+            self._conn.execute("ALTER TABLE chunks ADD COLUMN page INTEGER DEFAULT -1")
+        self._conn.commit()
+
+    # ----------------------------------------------------
+    # UPDATES (called by the vector store)
+    # ----------------------------------------------------
+    def add(self, ids, docs, ingested_at=0):
+        rows = [
+            (int(i), d.page_content, d.metadata.get("type", ""), d.metadata.get("title", ""),
+             d.metadata.get("source", ""), d.metadata["chunk_index"],
+             d.metadata.get("ingested_at", ingested_at), d.metadata.get("page", -1))
+            for i, d in zip(ids, docs)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO chunks (id, text, {', '.join(META_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(META_COLUMNS) + 2))})", rows
+            )
+            self._conn.executemany(
+                "INSERT INTO chunks_fts (rowid, text) VALUES (?, ?)",
+                [(r[0], r[1]) for r in rows]
+            )
+            self._conn.commit()
+
+    def _delete_where(self, where, params):
+        # External-content FTS5 → postings are removed with the old text
+        self._conn.execute(
+            f"INSERT INTO chunks_fts (chunks_fts, rowid, text) "
+            f"SELECT 'delete', id, text FROM chunks WHERE {where}", params
+        )
+        self._conn.execute(f"DELETE FROM chunks WHERE {where}", params)
+
+    def delete_ids(self, ids):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return
+        with self._lock:
+            for start in range(0, len(ids), 500):   # SQLite parameter limit
+                batch = ids[start:start + 500]
+                self._delete_where(f"id IN ({', '.join('?' * len(batch))})", batch)
+            self._conn.commit()
+
+    def delete_source(self, source, keep_ids=None):
+        if keep_ids:
+            keep = {int(i) for i in keep_ids}
+            with self._lock:
+                ids = [r[0] for r in self._conn.execute("SELECT id FROM chunks WHERE source = ?", (source,))]
+            self.delete_ids([i for i in ids if i not in keep])
+            return
+
+        with self._lock:
+            self._delete_where("source = ?", (source,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('delete-all')")
+            self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    # ----------------------------------------------------
+    # SEARCH
+    # ----------------------------------------------------
+    @staticmethod
+    def match_expression(text):
+        """Free text → FTS5 query: every term quoted, OR-ed (BM25 ranks by overlap)."""
+        terms = dict.fromkeys(t.lower() for t in TOKEN_RE.findall(text))
+        return " OR ".join(f'"{t}"' for t in terms)
+
+    def search(self, text, k=5, filters=None):
+        """Top-k BM25 matches → list of Documents (metadata has id + score)."""
+        clauses = check_filters(filters)
+        match = self.match_expression(text)
+        if not match or k <= 0:
+            return []
+
+        where, params = ["chunks_fts MATCH ?"], [match]
+        for field, op, value in clauses:
+            if op == "in":
+                where.append(f"c.{field} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                where.append(f"c.{field} {op} ?")
+                params.append(value)
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT c.id, c.text, {', '.join('c.' + f for f in META_COLUMNS)}, "
+                f"bm25(chunks_fts) AS rank "
+                f"FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid "
+                f"WHERE {' AND '.join(where)} ORDER BY rank LIMIT ?",
+                params + [k]
+            ).fetchall()
+
+        return [
+            Document(
+                page_content=row[1],
+                metadata={
+                    "id": row[0],
+                    "score": -row[-1],   # FTS5 bm25() is negative, lower = better
+                    **dict(zip(META_COLUMNS, row[2:-1])),
+                }
+            )
+            for row in rows
+        ]
+
+
+def open_lexical_index(store):
+    """Index file for a vector store; backfilled from the store if it is new."""
+    index = LexicalIndex(os.path.join(LEXICAL_INDEX_DIR, f"{store.manifest_namespace}.db"))
+
+    stored = store.count()
+    if stored and not index.count():
+        print(f"🔄 Building lexical index from {stored} stored chunks...")
+        try:
+            rows = store.query(limit=stored)
+            index.add(
+                [r["id"] for r in rows],
+                [Document(page_content=r["text"], metadata=r) for r in rows]
+            )
+        except Exception as e:
+            # e.g. Milvus query window limits → only chunks ingested from now on are covered
+            print("⚠ Lexical backfill failed (re-ingest to index older chunks):", e)
+
+    return index
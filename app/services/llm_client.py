@@ -0,0 +1,396 @@
+"""
+llm_client.py
+-------------
+One shared, pooled client for the OpenAI-compatible LLM endpoint.
+
+- Created once (FastAPI lifespan), reused by every request → keep-alive connections
+- Sync + async variants over the same configuration
+- Bounded concurrency: one limiter for sync and async calls together
+  (LLM_MAX_CONCURRENCY calls in flight per worker process)
+- Per-call deadline (LLM_TIMEOUT) covering all retries
+- Streams: LLM_TIMEOUT is the idle limit (first token, then between chunks);
+  the whole generation gets LLM_STREAM_MAX_SECONDS → a stalled or trickling
+  stream cannot hold a slot indefinitely, long answers are not cut at LLM_TIMEOUT
+- Retries with exponential backoff + jitter on timeouts / 429 / 5xx
+- Per-call latency + token counts, aggregated in stats()
+
+Point LLM_BASE_URL at any OpenAI-compatible server (including a local stand-in).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import openai
+from openai import OpenAI, AsyncOpenAI
+
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://integrate.api.nvidia.com/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "meta/llama-3.2-3b-instruct")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "32"))
+LLM_STREAM_MAX_SECONDS = float(os.getenv("LLM_STREAM_MAX_SECONDS", "300"))
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,     # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when a call (including its retries) runs past its deadline."""
+
+
+class LLMClient:
+    def __init__(self, base_url=None, api_key=None, model=None, timeout=None,
+                 max_retries=None, max_concurrency=None, pool_size=None):
+        self.base_url = base_url or LLM_BASE_URL
+        self.model = model or LLM_MODEL
+        self.timeout = timeout or LLM_TIMEOUT
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.max_concurrency = max_concurrency or LLM_MAX_CONCURRENCY
+        api_key = api_key or os.getenv("NVIDIA_API_KEY") or "not-needed"
+
+        limits = httpx.Limits(
+            max_connections=pool_size or LLM_POOL_SIZE,
+            max_keepalive_connections=pool_size or LLM_POOL_SIZE,
+        )
+
+        # Retries are handled here (deadline-aware), not by the SDK
+        self.sync_client = OpenAI(
+            base_url=self.base_url, api_key=api_key, max_retries=0,
+            http_client=httpx.Client(limits=limits, timeout=self.timeout),
+        )
+        self._api_key = api_key
+        self._limits = limits
+        self._async = {}   # event loop → AsyncOpenAI (its connections are bound to that loop)
+        self._async_lock = threading.Lock()
+
+        # One limiter for every call, sync or async, whatever thread / event loop;
+        # async callers wait for a slot on their own threads, never on the loop
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._slot_waiters = ThreadPoolExecutor(max_workers=self.max_concurrency * 4,
+                                                thread_name_prefix="llm-slot")
+
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._counters = {"calls": 0, "errors": 0, "retries": 0,
+                          "prompt_tokens": 0, "completion_tokens": 0}
+
+    # ----------------------------------------------------
+    # BOOKKEEPING
+    # ----------------------------------------------------
+    def _request(self, messages, max_tokens, **kwargs):
+        return {"model": kwargs.pop("model", self.model), "messages": messages,
+                "max_tokens": max_tokens, **kwargs}
+
+    def _result(self, response, started, retries):
+        usage = getattr(response, "usage", None)
+        result = {
+            "text": (response.choices[0].message.content or "").strip(),
+            "latency": round(time.perf_counter() - started, 4),
+            "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+            "retries": retries,
+        }
+        self._record(result)
+        return result
+
+    def _record(self, result=None, error=False, retry=False):
+        with self._stats_lock:
+            if retry:
+                self._counters["retries"] += 1
+                return
+            self._counters["calls"] += 1
+            if error:
+                self._counters["errors"] += 1
+                return
+            self._latencies.append(result["latency"])
+            self._counters["prompt_tokens"] += result["prompt_tokens"]
+            self._counters["completion_tokens"] += result["completion_tokens"]
+
+    def _backoff(self, attempt, deadline):
+        """Seconds to wait before the next attempt, or None if out of retries / time."""
+        if attempt >= self.max_retries:
+            return None
+        delay = min(0.5 * 2 ** attempt, 8.0) * (0.5 + random.random())
+        if time.monotonic() + delay >= deadline:
+            return None
+        self._record(retry=True)
+        return delay
+
+    def _remaining(self, deadline, limit=None):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded(f"LLM call exceeded its {limit or self.timeout}s deadline")
+        return remaining
+
+    # ----------------------------------------------------
+    # CONCURRENCY SLOTS
+    # ----------------------------------------------------
+    def _acquire(self, deadline):
+        if not self._slots.acquire(timeout=self._remaining(deadline)):
+            raise LLMDeadlineExceeded("No free LLM slot before the deadline")
+
+    async def _aacquire(self, deadline):
+        """Same limiter as the sync calls, acquired without blocking the event loop."""
+        if self._slots.acquire(blocking=False):
+            return
+
+        loop = asyncio.get_running_loop()
+        waiting = loop.run_in_executor(self._slot_waiters, self._slots.acquire, True, self._remaining(deadline))
+        try:
+            acquired = await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # The waiter thread may still get the slot → hand it straight back
+            waiting.add_done_callback(lambda f: f.cancelled() or f.exception() or not f.result()
+                                      or self._slots.release())
+            raise
+        if not acquired:
+            raise LLMDeadlineExceeded("No free LLM slot before the deadline")
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+
+        def pct(p):
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)] if latencies else None
+
+        return {**counters, "model": self.model, "max_concurrency": self.max_concurrency,
+                "latency_p50": pct(0.50), "latency_p95": pct(0.95), "latency_p99": pct(0.99)}
+
+    # ----------------------------------------------------
+    # SYNC
+    # ----------------------------------------------------
+    def complete(self, messages, max_tokens=400, timeout=None, **kwargs):
+        """Chat completion → {"text", "latency", "prompt_tokens", "completion_tokens", "retries"}."""
+        started = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.timeout)
+        request = self._request(messages, max_tokens, **kwargs)
+
+        self._acquire(deadline)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = self.sync_client.chat.completions.create(
+                        **request, timeout=self._remaining(deadline)
+                    )
+                    return self._result(response, started, attempt)
+                except RETRYABLE_ERRORS:
+                    delay = self._backoff(attempt, deadline)
+                    if delay is None:
+                        self._record(error=True)
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+                except Exception:
+                    self._record(error=True)
+                    raise
+        finally:
+            self._slots.release()
+
+    def stream(self, messages, max_tokens=400, timeout=None, max_seconds=None, **kwargs):
+        """
+        Yields text deltas. Holds a concurrency slot until the stream is consumed.
+        timeout → idle limit (first token, then between chunks; default LLM_TIMEOUT)
+        max_seconds → whole generation (default LLM_STREAM_MAX_SECONDS)
+        """
+        started = time.perf_counter()
+        idle = timeout or self.timeout
+        max_seconds = max_seconds or LLM_STREAM_MAX_SECONDS
+        deadline = time.monotonic() + max_seconds
+        request = self._request(messages, max_tokens, stream=True, **kwargs)
+
+        self._acquire(min(deadline, time.monotonic() + idle))
+        stream = None
+        try:
+            # The request timeout bounds each socket read → idle limit; the overall
+            # deadline is checked per chunk (a blocked read can pass it by ≤ idle)
+            stream = self.sync_client.chat.completions.create(
+                **request, timeout=min(idle, self._remaining(deadline, max_seconds))
+            )
+            completion_tokens = 0
+            for chunk in stream:
+                self._remaining(deadline, max_seconds)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    completion_tokens += 1   # one delta ≈ one token
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            self._record(error=True)
+            raise
+        finally:
+            if stream is not None:
+                stream.close()   # early exit / deadline → release the connection
+            self._slots.release()
+
+        self._record({"latency": round(time.perf_counter() - started, 4),
+                      "prompt_tokens": 0, "completion_tokens": completion_tokens})
+
+    # ----------------------------------------------------
+    # ASYNC
+    # ----------------------------------------------------
+    def _async_client(self):
+        """
+        Async client for the running loop, created on first use. The server's
+        loop keeps its client for its lifetime; asyncio.run() callers (CLI,
+        scripts) get their own and should close it with aclose_loop() before
+        the loop ends (see run_sync) — an httpx.AsyncClient can only be closed
+        on the loop that opened its connections.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async.get(loop)
+            if client is None:
+                # Loops that ended without aclose_loop() → their connections are already gone
+                for old in [l for l in self._async if l.is_closed()]:
+                    del self._async[old]
+                client = self._async[loop] = AsyncOpenAI(
+                    base_url=self.base_url, api_key=self._api_key, max_retries=0,
+                    http_client=httpx.AsyncClient(limits=self._limits, timeout=self.timeout),
+                )
+            return client
+
+    async def acomplete(self, messages, max_tokens=400, timeout=None, **kwargs):
+        started = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.timeout)
+        request = self._request(messages, max_tokens, **kwargs)
+
+        client = self._async_client()
+        await self._aacquire(deadline)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await client.chat.completions.create(
+                        **request, timeout=self._remaining(deadline)
+                    )
+                    return self._result(response, started, attempt)
+                except RETRYABLE_ERRORS:
+                    delay = self._backoff(attempt, deadline)
+                    if delay is None:
+                        self._record(error=True)
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                except Exception:
+                    self._record(error=True)
+                    raise
+        finally:
+            self._slots.release()
+
+    async def astream(self, messages, max_tokens=400, timeout=None, max_seconds=None, **kwargs):
+        """Async stream(): same idle limit / overall budget, enforced on every chunk."""
+        started = time.perf_counter()
+        idle = timeout or self.timeout
+        max_seconds = max_seconds or LLM_STREAM_MAX_SECONDS
+        deadline = time.monotonic() + max_seconds
+        request = self._request(messages, max_tokens, stream=True, **kwargs)
+
+        client = self._async_client()
+        await self._aacquire(min(deadline, time.monotonic() + idle))
+        stream = None
+        try:
+            stream = await client.chat.completions.create(
+                **request, timeout=min(idle, self._remaining(deadline, max_seconds))
+            )
+            chunks = stream.__aiter__()
+            completion_tokens = 0
+            while True:
+                wait = min(idle, self._remaining(deadline, max_seconds))
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), wait)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise LLMDeadlineExceeded(f"LLM stream sent nothing for {wait:.1f}s "
+                                              f"(idle limit {idle}s, budget {max_seconds}s)")
+                if chunk.choices and chunk.choices[0].delta.content:
+                    completion_tokens += 1
+                    yield chunk.choices[0].delta.content
+        except Exception:
+            self._record(error=True)
+            raise
+        finally:
+            if stream is not None:
+                await stream.close()
+            self._slots.release()
+
+        self._record({"latency": round(time.perf_counter() - started, 4),
+                      "prompt_tokens": 0, "completion_tokens": completion_tokens})
+
+    # ----------------------------------------------------
+    # LIFECYCLE
+    # ----------------------------------------------------
+    async def aclose_loop(self):
+        """Closes the running loop's async client (its connections belong to this loop)."""
+        with self._async_lock:
+            client = self._async.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    async def aclose(self):
+        self.sync_client.close()
+        self._slot_waiters.shutdown(wait=False, cancel_futures=True)
+        await self.aclose_loop()
+
+        # Clients of loops still running on other threads are closed there
+        with self._async_lock:
+            others, self._async = self._async, {}
+        for loop, client in others.items():
+            if not loop.is_closed() and loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.close(), loop)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def init_llm_client(**options):
+    """Create (or replace) the process-wide client — called from the FastAPI lifespan."""
+    global _client
+    with _client_lock:
+        _client = LLMClient(**options)
+    print(f"🤖 LLM client ready → {_client.base_url} ({_client.model})")
+    return _client
+
+
+def get_llm_client():
+    """Shared client; created with env defaults if the lifespan did not run (scripts, CLI)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
+
+
+def run_sync(coro):
+    """
+    asyncio.run() for blocking callers that use the shared client: the
+    loop's async client is closed before the loop ends → no pools leak
+    across repeated calls.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            if _client is not None:
+                await _client.aclose_loop()
+
+    return asyncio.run(main())
+
+
+async def close_llm_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
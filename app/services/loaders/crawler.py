@@ -0,0 +1,209 @@
+"""
+crawler.py
+----------
+Concurrent same-site crawler on top of url_extractor's parsing.
+
+- One pooled httpx.AsyncClient (keep-alive) for the whole crawl
+- Politeness: at most CRAWL_PER_HOST requests in flight per host and
+  CRAWL_DELAY seconds between request starts to the same host
+- Follows links on the seed's site only, up to max_depth hops / max_pages pages
+- Conditional GETs: validators(url) → {"etag", "last_modified", "links"} from
+  the previous crawl; a 304 is reported as "not_modified" with the remembered
+  links → the crawl goes on without downloading, parsing or embedding the page
+- Pages are handed to on_page() one at a time on a worker thread, while the
+  fetchers keep going (bounded read-ahead)
+"""
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urldefrag, urlsplit
+
+import httpx
+
+from .url_extractor import DEFAULT_HEADERS, parse_html
+
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "2"))
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "0.25"))
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "2"))
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "100"))
+CRAWL_TIMEOUT = float(os.getenv("CRAWL_TIMEOUT", "10"))
+
+# Never worth a request when following links
+SKIP_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+                   ".zip", ".gz", ".tar", ".mp3", ".mp4", ".avi", ".mov", ".woff", ".woff2")
+
+
+# ----------------------------------------------------
+# URL HELPERS
+# ----------------------------------------------------
+def normalize_url(url):
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    return parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower(),
+                          path=parts.path or "/").geturl()
+
+
+def site_key(url):
+    """Same site → same host, with or without "www."."""
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def should_follow(url):
+    return not urlsplit(url).path.lower().endswith(SKIP_EXTENSIONS)
+
+
+# ----------------------------------------------------
+# POLITENESS
+# ----------------------------------------------------
+class HostLimiter:
+    """Per-host concurrency cap + minimum delay between request starts."""
+
+    def __init__(self, per_host=None, delay=None):
+        self.per_host = per_host or CRAWL_PER_HOST
+        self.delay = CRAWL_DELAY if delay is None else delay
+        self._slots = {}
+        self._locks = {}
+        self._next_start = {}
+
+    @asynccontextmanager
+    async def slot(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._slots:
+            self._slots[host] = asyncio.Semaphore(self.per_host)
+            self._locks[host] = asyncio.Lock()
+
+        async with self._slots[host]:
+            async with self._locks[host]:
+                wait = self._next_start.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start[host] = time.monotonic() + self.delay
+            yield
+
+
+# ----------------------------------------------------
+# FETCH
+# ----------------------------------------------------
+async def fetch_page(client, limiter, url, depth, known=None):
+    """
+    One GET (conditional when known validators exist) → page dict:
+    {"url", "depth", "status": ok | not_modified | skipped | failed,
+     "records", "links", "etag", "last_modified", "error"}
+    """
+    page = {"url": url, "depth": depth, "records": [], "links": [],
+            "etag": None, "last_modified": None, "error": None}
+
+    headers = {}
+    if known:
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+    try:
+        async with limiter.slot(url):
+            response = await client.get(url, headers=headers)
+    except httpx.HTTPError as e:
+        return {**page, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+    if response.status_code == 304 and known:
+        return {**page, "status": "not_modified", "links": known.get("links") or [],
+                "etag": known.get("etag"), "last_modified": known.get("last_modified")}
+
+    if response.status_code >= 400:
+        return {**page, "status": "failed", "error": f"HTTP {response.status_code}"}
+
+    if "html" not in response.headers.get("content-type", ""):
+        return {**page, "status": "skipped", "error": "not an HTML page"}
+
+    # Parsing is CPU work → off the event loop
+    records, links = await asyncio.to_thread(parse_html, response.content, url, str(response.url))
+
+    return {**page, "status": "ok", "records": records, "links": links,
+            "etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified")}
+
+
+# ----------------------------------------------------
+# CRAWL
+# ----------------------------------------------------
+async def crawl(seed_urls, on_page, max_depth=None, max_pages=None, validators=None,
+                concurrency=None, per_host=None, delay=None, timeout=None):
+    """
+    Crawls the seeds' sites; on_page(page) runs on a worker thread for every
+    fetched page (see fetch_page), one page at a time. An exception raised
+    by on_page stops the crawl and is re-raised.
+
+    validators → optional callable url → previous {"etag", "last_modified", "links"} or None.
+    Returns counts per page status.
+    """
+    max_depth = CRAWL_MAX_DEPTH if max_depth is None else max_depth
+    max_pages = max_pages or CRAWL_MAX_PAGES
+    concurrency = concurrency or CRAWL_CONCURRENCY
+
+    seeds = list(dict.fromkeys(normalize_url(u) for u in seed_urls))[:max_pages]
+    sites = {site_key(u) for u in seeds}
+    seen = set(seeds)
+    counts = {"ok": 0, "not_modified": 0, "skipped": 0, "failed": 0}
+
+    frontier = asyncio.Queue()
+    pages = asyncio.Queue(maxsize=concurrency * 2)   # read-ahead while on_page works
+    for url in seeds:
+        frontier.put_nowait((url, 0))
+
+    limiter = HostLimiter(per_host, delay)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=DEFAULT_HEADERS, timeout=timeout or CRAWL_TIMEOUT,
+                                 follow_redirects=True, limits=limits) as client:
+
+        async def fetcher():
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    page = await fetch_page(client, limiter, url, depth,
+                                            validators(url) if validators else None)
+                    counts[page["status"]] += 1
+
+                    if depth < max_depth:
+                        for link in map(normalize_url, page["links"]):
+                            if len(seen) >= max_pages:
+                                break
+                            if link not in seen and site_key(link) in sites and should_follow(link):
+                                seen.add(link)
+                                frontier.put_nowait((link, depth + 1))
+
+                    if page["status"] in ("ok", "not_modified"):
+                        await pages.put(page)
+                finally:
+                    frontier.task_done()
+
+        async def consumer():
+            while True:
+                page = await pages.get()
+                try:
+                    await asyncio.to_thread(on_page, page)
+                finally:
+                    pages.task_done()
+
+        async def finished():
+            await frontier.join()
+            await pages.join()
+
+        tasks = [asyncio.create_task(fetcher()) for _ in range(concurrency)]
+        consuming = asyncio.create_task(consumer())
+        waiting = asyncio.create_task(finished())
+
+        try:
+            await asyncio.wait({waiting, consuming}, return_when=asyncio.FIRST_COMPLETED)
+            if consuming.done():
+                consuming.result()   # on_page raised → propagate (e.g. cancelled ingest)
+        finally:
+            for task in tasks + [consuming, waiting]:
+                task.cancel()
+            await asyncio.gather(*tasks, consuming, waiting, return_exceptions=True)
+
+    return counts
@@ -7,37 +7,42 @@ except ImportError:
     Document = None   # Safe fallback
 
 
-def process_docx(file_path):
+def iter_docx(file_path):
+    """Yields one record per non-empty paragraph."""
     file_path = Path(file_path)
 
     # Docx not installed
     if Document is None:
         print("python-docx is not installed. Install it using: pip install python-docx")
-        return []
+        return
 
     # File missing
     if not file_path.exists():
         print(f"DOCX file not found: {file_path}")
-        return []
-
-    results = []
+        return
 
     try:
         doc = Document(file_path)
-        paragraphs = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
+        chunk_index = 0   # running global counter
 
-        for para in paragraphs:
-            results.append({
+        for p in doc.paragraphs:
+            para = p.text.strip()
+            if not para:
+                continue
+
+            yield {
                 "text": para,
                 "source": str(file_path),
                 "type": "docx",
                 "title": file_path.name,
-                "chunk_index": len(results)   # running global counter
-            })
-
-        return results
+                "chunk_index": chunk_index
+            }
+            chunk_index += 1
 
     except Exception as e:
         print("DOCX extraction failed:", e)
-        return []
+
+
+def process_docx(file_path):
+    return list(iter_docx(file_path))
 
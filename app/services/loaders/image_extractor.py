@@ -1,58 +1,47 @@
 # png_extractor.py
 from pathlib import Path
 
-# ---- Safe import handling (professional way) ----
-try:
-    import pytesseract
-    from PIL import Image
-except ImportError:
-    pytesseract = None
-    Image = None
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from . import ocr
 
 
-def process_image(file_path):
+def iter_image(file_path):
+    """Streaming entrypoint — yields one record per paragraph, frame by frame."""
     file_path = Path(file_path)
 
     if not file_path.exists():
         print(f"image file not found: {file_path}")
-        return []
+        return
 
     # Check if OCR libraries are available
-    if pytesseract is None or Image is None:
+    if not ocr.OCR_AVAILABLE:
         raise RuntimeError("pytesseract or Pillow is not installed")
 
-    results = []
+    count = 0
 
     try:
-        # Open image
-        img = Image.open(file_path)
-
-        # Extract text using Tesseract OCR
-        text = pytesseract.image_to_string(img)
-
-        # Clean text
-        text = text.strip()
-
-        if not text:
-            print(f"No text extracted from PNG: {file_path}")
-            return []
-
-        # Split into paragraphs
-        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
-
-        for i, para in enumerate(paragraphs):
-            results.append({
-                "text": para,
-                "source": str(file_path),
-                "type": "image",
-                "title": file_path.name,
-                "chunk_index": len(results)  # global running index
-            })
-
-        return results
+        # One task per frame; cached frames skip tesseract, several frames run in parallel
+        tasks = ocr.image_file_tasks(file_path)
+        workers = 1 if len(tasks) == 1 else None
+
+        # iter_ocr yields each frame as soon as it (and the ones before it) are done
+        for frame, text in ocr.iter_ocr(enumerate(tasks), workers=workers):
+            # Split into paragraphs
+            for para in ocr.split_paragraphs(text or ""):
+                yield {
+                    "text": para,
+                    "source": str(file_path),
+                    "type": "image",
+                    "title": file_path.name,
+                    "chunk_index": count  # global running index
+                }
+                count += 1
+
+        if not count:
+            print(f"No text extracted from image: {file_path}")
 
     except Exception as e:
-        print("PNG extraction failed:", e)
-        return []
+        print("Image extraction failed:", e)
 
+
+def process_image(file_path):
+    return list(iter_image(file_path))
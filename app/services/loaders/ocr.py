@@ -0,0 +1,264 @@
+"""
+ocr.py
+------
+Shared OCR for images and scanned (image-only) PDF pages.
+
+- TESSERACT_CMD → tesseract binary (default: whatever is on PATH)
+- Preprocessing: grayscale → downscale to OCR_DPI → deskew (±OCR_MAX_SKEW°)
+- Results cached in SQLite by image hash (+ OCR settings) → a re-run never
+  calls tesseract again
+- iter_ocr() runs cache misses on OCR_WORKERS processes (default: CPU count
+  / INGEST_WORKERS) and yields results in input order; the pool is only
+  started once there is a miss
+"""
+
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+
+from ..ingest_manifest import file_sha256
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+OCR_AVAILABLE = pytesseract is not None and Image is not None
+
+TESSERACT_CMD = os.getenv("TESSERACT_CMD")
+if TESSERACT_CMD and pytesseract is not None:
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "5000"))   # px cap when an image has no DPI info
+OCR_DESKEW = os.getenv("OCR_DESKEW", "true").lower() == "true"
+OCR_MAX_SKEW = float(os.getenv("OCR_MAX_SKEW", "5"))
+# INGEST_WORKERS jobs can OCR at once → each gets its share of the CPUs by default
+PROCESSES_PER_JOB = max(1, (os.cpu_count() or 1) // max(1, int(os.getenv("INGEST_WORKERS", "2"))))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(PROCESSES_PER_JOB)))
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "data/ocr_cache")
+PDF_OCR_ENABLED = os.getenv("PDF_OCR_ENABLED", "true").lower() == "true"
+
+# Different settings → different text → part of every cache key
+_SETTINGS = f"{OCR_LANG}|{OCR_DPI}|{OCR_MAX_SIDE}|{OCR_DESKEW}|{OCR_MAX_SKEW}"
+
+
+# ----------------------------------------------------
+# CACHE
+# ----------------------------------------------------
+def image_key(*parts):
+    """Cache key from image bytes / hashes / ids, salted with the OCR settings."""
+    h = hashlib.sha256(_SETTINGS.encode("utf-8"))
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def pdf_page_key(pdf, page_number):
+    """Raw embedded image streams of the page (no rendering) + its geometry."""
+    page = pdf[page_number]
+    parts = [page.rotation, tuple(page.rect)]
+    parts += [pdf.xref_stream_raw(img[0]) or b"" for img in page.get_images(full=True)]
+    return image_key(*parts)
+
+
+class OCRCache:
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, text TEXT)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM ocr WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, text):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO ocr (key, text) VALUES (?, ?)", (key, text))
+            self._conn.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRCache(os.path.join(OCR_CACHE_DIR, "ocr.db"))
+        return _cache
+
+
+# ----------------------------------------------------
+# PREPROCESSING
+# ----------------------------------------------------
+def _skew_angle(gray):
+    """Projection profile: text lines are sharpest when the rows are level."""
+    thumb = gray.copy()
+    thumb.thumbnail((800, 800))
+    ink = thumb.point(lambda v: 255 if v < 128 else 0)   # ink → 255, rotation fills with 0
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-OCR_MAX_SKEW, OCR_MAX_SKEW + 1e-9, 0.5):
+        profile = np.asarray(ink.rotate(float(angle)), dtype=np.float32).sum(axis=1)
+        score = float(np.sum(np.diff(profile) ** 2))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def deskew(gray):
+    angle = _skew_angle(gray)
+    if abs(angle) < 0.25:
+        return gray
+    return gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def preprocess(img, dpi=None):
+    """Any PIL image → grayscale at (at most) OCR_DPI, deskewed."""
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        rgba = img.convert("RGBA")
+        img = Image.alpha_composite(Image.new("RGBA", rgba.size, "white"), rgba)
+    gray = img.convert("L")
+
+    scale = OCR_DPI / dpi if dpi and dpi > OCR_DPI else 1.0
+    scale = min(scale, OCR_MAX_SIDE / max(gray.size))
+    if scale < 1.0:
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        gray = gray.resize(size, Image.LANCZOS)
+
+    return deskew(gray) if OCR_DESKEW else gray
+
+
+def ocr_image(img, dpi=None):
+    return pytesseract.image_to_string(preprocess(img, dpi), lang=OCR_LANG)
+
+
+def split_paragraphs(text):
+    return [p.strip() for p in text.split("\n\n") if p.strip()]
+
+
+# ----------------------------------------------------
+# WORKERS (module level → picklable for the process pool)
+# ----------------------------------------------------
+def image_frames(file_path):
+    with Image.open(file_path) as img:
+        return getattr(img, "n_frames", 1)
+
+
+def ocr_image_file(file_path, frame=0):
+    with Image.open(file_path) as img:
+        img.seek(frame)
+        dpi = img.info.get("dpi")
+        return ocr_image(img, dpi[0] if dpi else None)
+
+
+def ocr_pdf_page(file_path, page_number):
+    import fitz  # PyMuPDF
+
+    with fitz.open(file_path) as pdf:
+        pix = pdf[page_number].get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY)
+        img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    return ocr_image(img)   # rendered at OCR_DPI already
+
+
+def image_file_tasks(file_path):
+    """One OCR task per frame (multi-page TIFF scans → many)."""
+    file_hash = file_sha256(file_path)
+    return [(image_key(file_hash, frame), ocr_image_file, str(file_path), frame)
+            for frame in range(image_frames(file_path))]
+
+
+# ----------------------------------------------------
+# ORDERED, CACHED, PARALLEL OCR
+# ----------------------------------------------------
+def _run(fn, args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        print("OCR failed:", e)
+        return None
+
+
+def iter_ocr(items, workers=None):
+    """
+    items → iterable of (payload, task), task = None (nothing to OCR)
+            or (cache key, worker function, *args) → text.
+    Yields (payload, text or None) in input order. Cache hits never reach
+    the pool; at most 4 × workers items are read ahead.
+    """
+    workers = workers or OCR_WORKERS
+    cache = None        # opened on the first task → text-only PDFs never touch it
+    executor = None
+    pending = deque()   # (payload, text | Future | None, key)
+
+    def resolve(entry):
+        payload, text, key = entry
+        if isinstance(text, Future):
+            try:
+                text = text.result()
+            except Exception as e:
+                print("OCR failed:", e)
+                text = None
+        if cache is not None and key is not None and text is not None:
+            cache.set(key, text)
+        return payload, text
+
+    try:
+        for payload, task in items:
+            text = key = None
+
+            if task is not None:
+                key, fn, *args = task
+                if OCR_CACHE_ENABLED and cache is None:
+                    cache = get_ocr_cache()
+                text = cache.get(key) if cache is not None else None
+
+                if text is not None:
+                    key = None   # already cached
+                elif workers <= 1:
+                    text = _run(fn, args)
+                else:
+                    if executor is None:
+                        # spawn → safe even when called from a threaded server process
+                        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+                    text = executor.submit(fn, *args)
+
+            pending.append((payload, text, key))
+
+            while pending and (len(pending) >= 4 * workers
+                               or not isinstance(pending[0][1], Future) or pending[0][1].done()):
+                yield resolve(pending.popleft())
+
+        while pending:
+            yield resolve(pending.popleft())
+
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,45 +1,140 @@
 # pdf_loader.py
-import fitz  # PyMuPDF
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def process_pdf(file_path):
+import fitz  # PyMuPDF
+
+from . import ocr
+
+# Large PDFs are split into page ranges and extracted in a process pool
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "200"))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(ocr.PROCESSES_PER_JOB)))   # CPU count / INGEST_WORKERS
+
+
+def _page_paragraphs(page):
+    text = page.get_text("text")
+
+    # Image-only (scanned) page → None = "OCR me" (see _ocr_scanned_pages), else skip
+    if not text.strip():
+        if ocr.PDF_OCR_ENABLED and ocr.OCR_AVAILABLE and page.get_images():
+            return None
+        return []
+
+    # Split into meaningful paragraphs
+    return [p.strip() for p in text.split("\n\n") if p.strip()]
+
+
+def _extract_page_range(file_path, start, stop):
+    """Worker: open the PDF in this process → [(page_number, [paragraphs]), ...]."""
+    with fitz.open(file_path) as pdf:
+        return [(n, _page_paragraphs(pdf[n])) for n in range(start, stop)]
+
+
+def _iter_pages_serial(pdf):
+    for n, page in enumerate(pdf):
+        yield n, _page_paragraphs(page)
+
+
+def _iter_pages_parallel(file_path, page_count, workers):
+    """
+    Page ranges run in a process pool; results are yielded in page order
+    as soon as the next range is done (at most 2 × workers ranges in flight).
+    """
+    ranges = deque(
+        (start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    )
+
+    # spawn → safe even when called from a threaded server process
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    in_flight = deque()
+
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < 2 * workers:
+                start, stop = ranges.popleft()
+                in_flight.append(executor.submit(_extract_page_range, str(file_path), start, stop))
+
+            yield from in_flight.popleft().result()
+
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _ocr_scanned_pages(file_path, pages):
+    """(page_number, paragraphs | None) → (page_number, paragraphs), scanned pages OCR'd."""
+    with fitz.open(file_path) as pdf:   # cache keys come from the raw image streams
+        def items():
+            for page_number, paragraphs in pages:
+                task = None
+                if paragraphs is None:
+                    task = (ocr.pdf_page_key(pdf, page_number), ocr.ocr_pdf_page, str(file_path), page_number)
+                yield (page_number, paragraphs), task
+
+        for (page_number, paragraphs), text in ocr.iter_ocr(items()):
+            if paragraphs is None:
+                paragraphs = ocr.split_paragraphs(text or "")
+            yield page_number, paragraphs
+
+
+def iter_pdf(file_path, workers=None):
+    """
+    Yields one record per paragraph, in page order (no full-document list).
+
+    PDFs with >= PDF_PARALLEL_MIN_PAGES pages are extracted by `workers`
+    processes (default PDF_WORKERS); smaller ones stay single-process.
+    Pages without a text layer are OCR'd (ocr.py: cached, OCR_WORKERS processes).
+    """
     file_path = Path(file_path)
+    workers = workers or PDF_WORKERS
 
     if not file_path.exists():
         print(f"PDF file not found: {file_path}")
-        return []
+        return
 
-    results = []
     chunk_index = 0  # restart counting for every PDF
 
     try:
         # Open PDF
         pdf = fitz.open(file_path)
+    except Exception as e:
+        print("PDF extraction failed:", e)
+        return
 
-        for page in pdf:
-            text = page.get_text("text")
+    try:
+        page_count = pdf.page_count
 
-            # Skip empty pages
-            if not text.strip():
-                continue
+        if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+            pdf.close()
+            pages = _iter_pages_parallel(file_path, page_count, workers)
+        else:
+            pages = _iter_pages_serial(pdf)
 
-            # Split into meaningful paragraphs
-            paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+        pages = _ocr_scanned_pages(file_path, pages)
 
+        for page_number, paragraphs in pages:
             for para in paragraphs:
-                results.append({
+                yield {
                     "text": para,
                     "source": str(file_path),
                     "type": "pdf",
                     "title": file_path.name,
-                    "chunk_index": chunk_index
-                })
+                    "chunk_index": chunk_index,
+                    "page": page_number + 1
+                }
                 chunk_index += 1
 
-        pdf.close()
-        return results
-
     except Exception as e:
         print("PDF extraction failed:", e)
-        return []
 
+    finally:
+        if not pdf.is_closed:
+            pdf.close()
+
+
+def process_pdf(file_path):
+    return list(iter_pdf(file_path))
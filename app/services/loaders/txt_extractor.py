@@ -1,40 +1,66 @@
 # process_txt.py
 from pathlib import Path
 
-def process_txt(file_path):
+
+def _iter_paragraphs(f):
+    """Non-empty paragraphs (lists of lines) of an open text file."""
+    paragraph = []
+
+    for line in f:
+        line = line.rstrip("\n")
+
+        # Empty line → paragraph boundary
+        if not line:
+            if "".join(paragraph).strip():
+                yield paragraph
+            paragraph = []
+            continue
+
+        paragraph.append(line)
+
+    if "".join(paragraph).strip():
+        yield paragraph
+
+
+def iter_txt(file_path):
+    """Yields one record per paragraph while reading the file line by line (single pass)."""
     file_path = Path(file_path)
 
     if not file_path.exists():
         print(f"TXT file not found: {file_path}")
-        return []
+        return
 
-    try:
-        # Read file safely
-        try:
-            text = file_path.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            # Fallback for badly encoded txt files
-            text = file_path.read_text(encoding="latin-1")
+    def make_record(lines, i):
+        return {
+            "text": "\n".join(lines).strip(),
+            "source": str(file_path),
+            "type": "txt",
+            "title": file_path.name,
+            "chunk_index": i
+        }
 
-        # Normalize line endings
-        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    emitted = 0
 
-        # Split into paragraphs
-        chunks = [chunk.strip() for chunk in text.split("\n\n") if chunk.strip()]
+    for encoding in ("utf-8", "latin-1"):
+        try:
+            # newline=None → normalizes \r\n and \r line endings
+            with open(file_path, encoding=encoding, newline=None) as f:
+                for i, lines in enumerate(_iter_paragraphs(f)):
+                    if i < emitted:
+                        continue   # already yielded before the decode error
+                    yield make_record(lines, i)
+                    emitted += 1
+            return
 
-        results = []
-        for i, chunk in enumerate(chunks):
-            results.append({
-                "text": chunk,
-                "source": str(file_path),
-                "type": "txt",
-                "title": file_path.name,
-                "chunk_index": i
-            })
+        except UnicodeDecodeError:
+            # Fallback for badly encoded txt files → re-read as latin-1 (only then is
+            # the file read twice), resuming after the paragraphs already yielded
+            continue
 
-        return results
+        except Exception as e:
+            print("TXT extraction failed:", e)
+            return
 
-    except Exception as e:
-        print("TXT extraction failed:", e)
-        return []
 
+def process_txt(file_path):
+    return list(iter_txt(file_path))
@@ -3,34 +3,53 @@ url_loader.py
 ----------------
 Responsible for extracting clean text from any webpage URL.
 Returns unified structured documents.
+
+- One pooled requests.Session → repeated loads reuse keep-alive connections
+- lxml parser when installed (much faster), else the stdlib html.parser
+- parse_html() is shared with the site crawler (crawler.py)
 """
 
+from urllib.parse import urljoin, urldefrag
+
 import requests
 from bs4 import BeautifulSoup
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
 DEFAULT_HEADERS = {
     "User-Agent": "KeerthiScraper/1.0 (+https://github.com/keerthi)"
 }
 
+_session = requests.Session()
+_session.headers.update(DEFAULT_HEADERS)
 
-def process_url(url: str):
-    """
-    Extract clean text from a webpage.
-    Always returns a list of standardized document dicts.
-    """
 
-    try:
-        response = requests.get(url, headers=DEFAULT_HEADERS, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        raise RuntimeError(f"URL fetch failed for {url}: {e}")
+def extract_links(soup, base_url):
+    """Absolute http(s) links of the page, fragments removed, in page order."""
+    links = []
+    for a in soup.find_all("a", href=True):
+        url, _ = urldefrag(urljoin(base_url, a["href"].strip()))
+        if url.startswith(("http://", "https://")) and url not in links:
+            links.append(url)
+    return links
 
+
+def parse_html(content, source, base_url=None):
+    """
+    HTML bytes → (records, links).
+    records → one standardized document dict per paragraph
+    links   → see extract_links() (relative to base_url, default source)
+    """
     try:
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = BeautifulSoup(content, HTML_PARSER)
     except Exception as e:
-        raise RuntimeError(f"HTML parsing failed for {url}: {e}")
+        raise RuntimeError(f"HTML parsing failed for {source}: {e}")
 
-    title = soup.title.string.strip() if soup.title else "Untitled"
+    title = soup.title.string.strip() if soup.title and soup.title.string else "Untitled"
 
     # Collect all paragraph text
     paragraphs = [
@@ -47,16 +66,36 @@ def process_url(url: str):
             if div.get_text().strip()
         ]
 
-    output = []
-    for i, text in enumerate(paragraphs):
-        output.append(
-            {
-                "text": text,
-                "source": url,
-                "type": "url",
-                "title": title,
-                "chunk_index": i
-            }
-        )
-
-    return output
+    records = [
+        {
+            "text": text,
+            "source": source,
+            "type": "url",
+            "title": title,
+            "chunk_index": i
+        }
+        for i, text in enumerate(paragraphs)
+    ]
+
+    return records, extract_links(soup, base_url or source)
+
+
+def process_url(url: str):
+    """
+    Extract clean text from a webpage.
+    Always returns a list of standardized document dicts.
+    """
+
+    try:
+        response = _session.get(url, timeout=10)
+        response.raise_for_status()
+    except Exception as e:
+        raise RuntimeError(f"URL fetch failed for {url}: {e}")
+
+    records, _ = parse_html(response.content, url, base_url=response.url)
+    return records
+
+
+def iter_url(url: str):
+    """Streaming entrypoint — a page is fetched in one request, then yielded record by record."""
+    yield from process_url(url)
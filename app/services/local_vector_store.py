@@ -0,0 +1,500 @@
+"""
+local_vector_store.py
+---------------------
+In-process vector backend (no Milvus server needed).
+
+- Vectors: memory-mapped float32 / float16 matrix on disk (normalized → cosine = dot)
+- Index:   "flat"   → brute-force BLAS matmul over the matrix
+           "hnsw"   → hnswlib graph (optional dependency, persisted next to the matrix)
+           "sq8"    → int8 codes (4× smaller than float32) scanned, shortlist
+                      re-scored exactly on the float matrix
+           "binary" → sign bits (32× smaller), Hamming pre-filter, float re-scoring
+- Metadata: SQLite (persistence) + in-memory columns (fast filtering)
+
+Row number == vector id. Deleted rows are tombstoned, never reused.
+Made for edge deployments, CI and benchmarks on small/medium corpora.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.services.vector_store import (
+    VectorStore, VECTOR_DIM, NUMERIC_FIELDS, check_filters, notify_store_change
+)
+
+# Optional HNSW index
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+INITIAL_CAPACITY = 1024
+SEARCH_BLOCK_ROWS = 65536   # float16 matrices / sq8 codes are upcast block by block
+INDEX_TYPES = ("flat", "hnsw", "sq8", "binary")
+CODE_INDEXES = ("sq8", "binary")
+
+# Shortlist size = k × factor; only those rows of the float matrix are read
+RESCORE_FACTORS = {
+    "sq8": int(os.getenv("LOCAL_SQ8_RESCORE", "4")),
+    "binary": int(os.getenv("LOCAL_BINARY_RESCORE", "16")),
+}
+# NumPy >= 2.0 has a vectorized popcount; older versions use a byte lookup table
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+popcount = getattr(np, "bitwise_count", lambda x: _POPCOUNT_TABLE[x])
+META_FIELDS = ("text", "type", "title", "source", "chunk_index", "ingested_at", "page")
+
+
+class LocalVectorStore(VectorStore):
+    backend = "local"
+
+    def __init__(self, path="data/vectors/knowledge_base_vectors", dim=VECTOR_DIM,
+                 dtype=None, index=None, hnsw_m=16, hnsw_ef_construction=200, hnsw_ef=64):
+        self.path = path
+        self.name = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype or os.getenv("LOCAL_VECTOR_DTYPE", "float32"))
+        self.index_type = (index or os.getenv("LOCAL_VECTOR_INDEX", "flat")).lower()
+        self.hnsw_params = {"M": hnsw_m, "ef_construction": hnsw_ef_construction, "ef": hnsw_ef}
+        self._lock = threading.RLock()
+
+        if self.dtype not in (np.float32, np.float16):
+            raise ValueError("LocalVectorStore supports float32 / float16 storage only")
+
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown local index: {self.index_type} (expected one of {INDEX_TYPES})")
+
+        if self.index_type == "hnsw" and not HNSWLIB_AVAILABLE:
+            print("⚠ hnswlib not installed → falling back to flat (brute-force) index")
+            self.index_type = "flat"
+
+        os.makedirs(path, exist_ok=True)
+        self._open_metadata()
+        self._open_matrix()
+        self._hnsw = self._open_hnsw() if self.index_type == "hnsw" else None
+
+        self._codes = None
+        if self.index_type in CODE_INDEXES:
+            self._open_codes()
+            self._catch_up_codes()
+
+    # ----------------------------------------------------
+    # STORAGE
+    # ----------------------------------------------------
+    def _open_metadata(self):
+        self._db = sqlite3.connect(os.path.join(self.path, "meta.db"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS rows (
+                id          INTEGER PRIMARY KEY,
+                text        TEXT,
+                type        TEXT,
+                title       TEXT,
+                source      TEXT,
+                chunk_index INTEGER,
+                ingested_at INTEGER DEFAULT 0,
+                page        INTEGER DEFAULT -1,
+                deleted     INTEGER DEFAULT 0
+            );
+        """)
+
+        # Stores created before ingested_at / page existed → add the columns
+        # (old rows read as ingested_at 0, page -1)
+        columns = {r[1] for r in self._db.execute("PRAGMA table_info(rows)")}
+        if "ingested_at" not in columns:
+            self._db.execute("ALTER TABLE rows ADD COLUMN ingested_at INTEGER DEFAULT 0")
+        if "page" not in columns:
+            self._db.execute("ALTER TABLE rows ADD COLUMN page INTEGER DEFAULT -1")
+        self._db.commit()
+
+        stored = dict(self._db.execute("SELECT key, value FROM settings").fetchall())
+        self._settings = stored
+        if stored:
+            if int(stored["dim"]) != self.dim or stored["dtype"] != self.dtype.name:
+                raise ValueError(
+                    f"Store at {self.path} was created with dim={stored['dim']}, "
+                    f"dtype={stored['dtype']}"
+                )
+        else:
+            self._db.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?)",
+                [("dim", str(self.dim)), ("dtype", self.dtype.name)]
+            )
+            self._db.commit()
+
+        rows = self._db.execute(
+            f"SELECT {', '.join(META_FIELDS)}, deleted FROM rows ORDER BY id"
+        ).fetchall()
+
+        self._meta = {field: [r[i] for r in rows] for i, field in enumerate(META_FIELDS)}
+        self._deleted = [bool(r[-1]) for r in rows]
+        self._columns = None   # numpy views of _meta, rebuilt lazily for filtering
+        self._n = len(rows)
+
+    def _matrix_file(self):
+        return os.path.join(self.path, f"vectors.{self.dtype.name}.bin")
+
+    def _open_matrix(self, capacity=None):
+        file_path = self._matrix_file()
+        row_bytes = self.dim * self.dtype.itemsize
+        existing = os.path.getsize(file_path) // row_bytes if os.path.exists(file_path) else 0
+        capacity = max(capacity or 0, existing, self._n, INITIAL_CAPACITY)
+
+        if existing < capacity:
+            with open(file_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+
+        self._matrix = np.memmap(file_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._n] = ~np.array(self._deleted, dtype=bool)
+        self._alive = alive
+
+    def _grow(self, needed):
+        capacity = len(self._matrix)
+        while capacity < needed:
+            capacity *= 2
+
+        self._matrix.flush()
+        del self._matrix
+        self._open_matrix(capacity)
+
+        if self._hnsw is not None:
+            self._hnsw.resize_index(capacity)
+
+        if self._codes is not None:
+            self._codes.flush()
+            del self._codes
+            self._open_codes()
+
+    def _open_hnsw(self):
+        index = hnswlib.Index(space="cosine", dim=self.dim)
+        index_file = os.path.join(self.path, "index.hnsw")
+
+        if os.path.exists(index_file) and self._n:
+            index.load_index(index_file, max_elements=len(self._matrix))
+
+            # Rows inserted after the last save (no flush before exit) → catch up
+            saved = index.get_current_count()
+            if saved < self._n:
+                index.add_items(np.asarray(self._matrix[saved:self._n], dtype=np.float32),
+                                np.arange(saved, self._n))
+                for i in np.flatnonzero(~self._alive[saved:self._n]):
+                    index.mark_deleted(int(saved + i))
+        else:
+            index.init_index(
+                max_elements=len(self._matrix),
+                M=self.hnsw_params["M"],
+                ef_construction=self.hnsw_params["ef_construction"]
+            )
+            if self._n:   # index missing → rebuild from the matrix
+                index.add_items(np.asarray(self._matrix[:self._n], dtype=np.float32),
+                                np.arange(self._n))
+                for i in np.flatnonzero(~self._alive[:self._n]):
+                    index.mark_deleted(int(i))
+
+        index.set_ef(self.hnsw_params["ef"])
+        return index
+
+    # ----------------------------------------------------
+    # COMPRESSED CODES (sq8 / binary)
+    # ----------------------------------------------------
+    def _codes_file(self):
+        return os.path.join(self.path, f"codes.{self.index_type}.bin")
+
+    def _encode(self, vectors):
+        """Normalized float vectors → sq8 (int8 per dim) or binary (packed sign bits) codes."""
+        if self.index_type == "sq8":
+            return np.clip(np.rint(vectors * 127), -127, 127).astype(np.int8)
+        return np.packbits(vectors > 0, axis=1)
+
+    def _open_codes(self):
+        """Codes memmap with the same capacity as the matrix."""
+        code_dtype = np.int8 if self.index_type == "sq8" else np.uint8
+        code_dim = self.dim if self.index_type == "sq8" else (self.dim + 7) // 8
+        file_path = self._codes_file()
+        capacity = len(self._matrix)
+
+        existing = os.path.getsize(file_path) // code_dim if os.path.exists(file_path) else 0
+        if existing < capacity:
+            with open(file_path, "ab") as f:
+                f.truncate(capacity * code_dim)
+
+        self._codes = np.memmap(file_path, dtype=code_dtype, mode="r+", shape=(capacity, code_dim))
+        self._codes_on_disk = min(existing, capacity)
+
+    def _catch_up_codes(self):
+        """Rows inserted after the last flush (or a missing codes file) → encode from the matrix."""
+        done = min(int(self._settings.get(f"codes_rows.{self.index_type}", 0)), self._codes_on_disk)
+
+        for start in range(done, self._n, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self._n)
+            self._codes[start:stop] = self._encode(np.asarray(self._matrix[start:stop], dtype=np.float32))
+
+    def _coarse_scores(self, Q):
+        """(n, B) approximate similarities from the codes (higher = closer)."""
+        n = self._n
+        scores = np.empty((n, len(Q)), dtype=np.float32)
+
+        if self.index_type == "sq8":
+            for start in range(0, n, SEARCH_BLOCK_ROWS):
+                stop = min(start + SEARCH_BLOCK_ROWS, n)
+                scores[start:stop] = self._codes[start:stop].astype(np.float32) @ Q.T
+            return scores
+
+        # Binary: negative Hamming distance between sign bits (XOR + popcount)
+        q_bits = np.packbits(Q > 0, axis=1)
+        rows = max(1024, (1 << 22) // (len(Q) * q_bits.shape[1]))   # ~4 MB of XOR per block
+        for start in range(0, n, rows):
+            stop = min(start + rows, n)
+            xor = self._codes[start:stop, None, :] ^ q_bits[None, :, :]
+            scores[start:stop] = -popcount(xor).sum(axis=2, dtype=np.int32)
+        return scores
+
+    def _search_codes(self, Q, k, mask):
+        """Coarse scan over the codes → k × factor shortlist → exact float re-scoring."""
+        shortlist_k = min(k * RESCORE_FACTORS[self.index_type], int(mask.sum()))
+
+        coarse = np.where(mask[:, None], self._coarse_scores(Q), -np.inf).T   # → (B, n)
+        shortlists = np.argpartition(-coarse, shortlist_k - 1, axis=1)[:, :shortlist_k]
+
+        ids = np.empty((len(Q), k), dtype=np.int64)
+        scores = np.empty((len(Q), k), dtype=np.float32)
+        for b, rows in enumerate(shortlists):
+            rows = np.sort(rows)   # ascending → sequential memmap reads
+            exact = np.asarray(self._matrix[rows], dtype=np.float32) @ Q[b]
+            top = np.argsort(-exact)[:k]
+            ids[b], scores[b] = rows[top], exact[top]
+        return ids, scores
+
+    # ----------------------------------------------------
+    # FILTERING
+    # ----------------------------------------------------
+    def _filter_mask(self, filters):
+        """Boolean mask over rows [0, n) → alive AND matches every filter clause."""
+        clauses = check_filters(filters)
+        mask = self._alive[:self._n].copy()
+        if not clauses:
+            return mask
+
+        if self._columns is None:
+            # Column arrays act as the scalar indexes: one vectorized compare per clause
+            self._columns = {
+                f: np.array(v, dtype=np.int64 if f in NUMERIC_FIELDS else object)
+                for f, v in self._meta.items() if f != "text"
+            }
+
+        for field, op, value in clauses:
+            column = self._columns[field]
+            if op == "in":
+                mask &= np.isin(column, value)
+            elif op == "==":
+                mask &= column == value
+            elif op == ">":
+                mask &= column > value
+            elif op == ">=":
+                mask &= column >= value
+            elif op == "<":
+                mask &= column < value
+            else:
+                mask &= column <= value
+        return mask
+
+    # ----------------------------------------------------
+    # VectorStore API
+    # ----------------------------------------------------
+    def insert(self, docs, embeddings, flush=True):
+        if len(docs) != len(embeddings):
+            raise ValueError(f"Docs & embeddings count mismatch: {len(docs)} != {len(embeddings)}")
+        if not docs:
+            return []
+
+        vectors = np.array(embeddings, dtype=np.float32)   # copy → caller's array untouched
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        now = int(time.time())
+
+        with self._lock:
+            start, end = self._n, self._n + len(docs)
+            if end > len(self._matrix):
+                self._grow(end)
+
+            self._matrix[start:end] = vectors
+            ids = list(range(start, end))
+
+            rows = [
+                (i, d.page_content, d.metadata.get("type", ""), d.metadata.get("title", ""),
+                 d.metadata.get("source", ""), d.metadata["chunk_index"],
+                 d.metadata.get("ingested_at", now), d.metadata.get("page", -1))
+                for i, d in zip(ids, docs)
+            ]
+            self._db.executemany(
+                "INSERT INTO rows (id, text, type, title, source, chunk_index, ingested_at, page) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+
+            for row in rows:
+                for field, value in zip(META_FIELDS, row[1:]):
+                    self._meta[field].append(value)
+            self._deleted.extend([False] * len(rows))
+            self._alive[start:end] = True
+            self._columns = None
+            self._n = end
+
+            if self._hnsw is not None:
+                self._hnsw.add_items(vectors, ids)
+
+            if self._codes is not None:
+                self._codes[start:end] = self._encode(vectors)
+
+            if self.lexical is not None:
+                self.lexical.add(ids, docs, ingested_at=now)
+
+            if flush:
+                self.flush()
+
+        notify_store_change(self)
+        print(f"🟩 Successfully inserted {len(docs)} vectors (local).")
+        return ids
+
+    def search(self, vector, k=5, filters=None):
+        return self.search_batch([vector], k=k, filters=filters)[0]
+
+    def search_batch(self, vectors, k=5, filters=None):
+        """All queries scored in one (n × d) @ (d × B) matmul / one HNSW call."""
+        check_filters(filters)   # fail fast, even on an empty store
+        Q = np.array(vectors, dtype=np.float32).reshape(-1, self.dim)
+        Q /= np.maximum(np.linalg.norm(Q, axis=1, keepdims=True), 1e-12)
+
+        with self._lock:
+            if not self._n:
+                return [[] for _ in Q]
+
+            mask = self._filter_mask(filters)
+            k = min(k, int(mask.sum()))
+            if k <= 0:
+                return [[] for _ in Q]
+
+            if self._hnsw is not None:
+                ids, scores = self._search_hnsw(Q, k, mask)
+            elif self._codes is not None:
+                ids, scores = self._search_codes(Q, k, mask)
+            else:
+                ids, scores = self._search_flat(Q, k, mask)
+
+            return [
+                [self._to_document(i, s) for i, s in zip(row_ids, row_scores)]
+                for row_ids, row_scores in zip(ids, scores)
+            ]
+
+    def _search_flat(self, Q, k, mask):
+        n = self._n
+        if self.dtype == np.float32:
+            scores = self._matrix[:n] @ Q.T
+        else:
+            scores = np.empty((n, len(Q)), dtype=np.float32)
+            for start in range(0, n, SEARCH_BLOCK_ROWS):
+                stop = min(start + SEARCH_BLOCK_ROWS, n)
+                block = np.asarray(self._matrix[start:stop], dtype=np.float32)
+                scores[start:stop] = block @ Q.T
+
+        scores = np.where(mask[:, None], scores, -np.inf).T   # → (B, n)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def _search_hnsw(self, Q, k, mask):
+        try:
+            labels, distances = self._hnsw.knn_query(Q, k=k, filter=lambda i: bool(mask[i]))
+        except RuntimeError:
+            # Heavily filtered queries can starve the graph walk → exact scan
+            return self._search_flat(Q, k, mask)
+        return labels, 1.0 - distances   # cosine distance → similarity
+
+    def _to_document(self, i, score):
+        i = int(i)
+        return Document(
+            page_content=self._meta["text"][i],
+            metadata={
+                "id": i,
+                "score": float(score),
+                "source": self._meta["source"][i],
+                "title": self._meta["title"][i],
+                "type": self._meta["type"][i],
+                "chunk_index": self._meta["chunk_index"][i],
+                "ingested_at": self._meta["ingested_at"][i],
+                "page": self._meta["page"][i],
+            }
+        )
+
+    def query(self, filters=None, limit=100):
+        check_filters(filters)
+        with self._lock:
+            ids = np.flatnonzero(self._filter_mask(filters))[:limit]
+            return [
+                {"id": int(i), **{f: self._meta[f][i] for f in META_FIELDS}}
+                for i in ids
+            ]
+
+    def delete_ids(self, ids):
+        ids = [int(i) for i in ids if 0 <= int(i) < self._n]
+        if not ids:
+            return
+
+        with self._lock:
+            self._db.executemany("UPDATE rows SET deleted = 1 WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+
+            for i in ids:
+                if self._alive[i] and self._hnsw is not None:
+                    self._hnsw.mark_deleted(i)
+                self._deleted[i] = True
+                self._alive[i] = False
+
+            if self.lexical is not None:
+                self.lexical.delete_ids(ids)
+
+        notify_store_change(self)
+        print(f"🗑 Deleted {len(ids)} stale vectors (local).")
+
+    def delete_source(self, source, keep_ids=None):
+        keep = {int(i) for i in keep_ids or ()}
+        with self._lock:
+            ids = np.flatnonzero(self._filter_mask({"source": source}))
+            self.delete_ids([i for i in ids.tolist() if i not in keep])
+
+    def count(self):
+        return int(self._alive[:self._n].sum())
+
+    def flush(self):
+        with self._lock:
+            self._matrix.flush()
+            if self._codes is not None:
+                self._codes.flush()
+                key = f"codes_rows.{self.index_type}"
+                self._db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                 (key, str(self._n)))
+                self._settings[key] = str(self._n)
+            self._db.commit()
+            if self._hnsw is not None:
+                self._hnsw.save_index(os.path.join(self.path, "index.hnsw"))
+
+    def drop(self):
+        with self._lock:
+            self._db.close()
+            del self._matrix
+            self._codes = None
+            self._hnsw = None
+            shutil.rmtree(self.path, ignore_errors=True)
+            if self.lexical is not None:
+                self.lexical.clear()
+        notify_store_change(self)
@@ -0,0 +1,245 @@
+"""
+metrics.py
+----------
+Per-stage timings + counters, exposed in the Prometheus text format.
+
+- span(stage)        → times one block (detect, extract, split, embed, insert,
+                       flush, retrieve, rerank, context, generate, evaluate)
+                       into the rag_stage_seconds histogram
+- accumulator(stage) → sums many small blocks (e.g. every batch of one
+                       ingestion) into a single observation
+- record_timings()   → per-request breakdown: every span inside the block
+                       (including worker threads started via asyncio.to_thread)
+                       adds its seconds to the yielded dict
+- render()           → /metrics payload; LLM tokens and cache hits are read
+                       from the existing stats() counters at scrape time
+
+METRICS_ENABLED=false → span() returns a shared no-op (one ContextVar read)
+unless a per-request breakdown was asked for.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Seconds; stages range from sub-millisecond (cache, filters) to LLM calls
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_timings = contextvars.ContextVar("rag_timings", default=None)
+
+
+# ----------------------------------------------------
+# METRIC TYPES
+# ----------------------------------------------------
+def _label_text(names, values):
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_label_text(self.labels, values)}}} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._series = {}   # label values → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                labels = _label_text(self.labels, values)
+                prefix = f"{labels}," if labels else ""
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series[-1]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {round(series[-2], 6)}")
+                lines.append(f"{self.name}_count{{{labels}}} {series[-1]}")
+        return lines
+
+
+stage_seconds = Histogram("rag_stage_seconds", "Time spent per pipeline stage", ("stage",))
+request_seconds = Histogram("rag_request_seconds", "End-to-end API request time", ("endpoint",))
+chunks_total = Counter("rag_chunks_total", "Chunks processed by ingestion", ("op",))
+
+
+# ----------------------------------------------------
+# SPANS
+# ----------------------------------------------------
+class _Span:
+    __slots__ = ("stage", "timings", "seconds", "_started")
+
+    def __init__(self, stage, timings):
+        self.stage, self.timings = stage, timings
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._started
+
+    def observe(self):
+        if METRICS_ENABLED:
+            stage_seconds.observe(self.seconds, self.stage)
+        if self.timings is not None:
+            self.timings[self.stage] = self.timings.get(self.stage, 0.0) + self.seconds
+
+
+class _OneShotSpan(_Span):
+    __slots__ = ()
+
+    def __exit__(self, *exc):
+        super().__exit__(*exc)
+        self.observe()
+
+
+class _NoopSpan:
+    seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def observe(self):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(stage):
+    """with span("embed"): ... → one rag_stage_seconds observation."""
+    timings = _timings.get()
+    if not METRICS_ENABLED and timings is None:
+        return _NOOP
+    return _OneShotSpan(stage, timings)
+
+
+def accumulator(stage):
+    """Re-enterable timer: `with acc:` any number of times, then acc.observe() once."""
+    timings = _timings.get()
+    if not METRICS_ENABLED and timings is None:
+        return _NOOP
+    return _Span(stage, timings)
+
+
+def timed_iter(iterable, timer):
+    """Yields from iterable, charging the time spent producing each item to timer."""
+    if timer is _NOOP:
+        return iterable
+
+    def generate():
+        iterator = iter(iterable)
+        while True:
+            with timer:
+                item = next(iterator, _NOOP)
+            if item is _NOOP:
+                return
+            yield item
+
+    return generate()
+
+
+@contextmanager
+def record_timings():
+    """Per-request breakdown → yields {stage: seconds}, filled by spans in this context."""
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def timings_ms(timings):
+    return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+
+def count_chunks(stats):
+    """Ingestion stats dict → rag_chunks_total{op=extracted|embedded|inserted|skipped|deleted}."""
+    if METRICS_ENABLED:
+        for op in ("extracted", "embedded", "inserted", "skipped", "deleted"):
+            if stats.get(op):
+                chunks_total.inc(stats[op], op)
+
+
+def observe_request(endpoint, seconds):
+    if METRICS_ENABLED:
+        request_seconds.observe(seconds, endpoint)
+
+
+# ----------------------------------------------------
+# EXPOSITION
+# ----------------------------------------------------
+def _sample_lines(name, help_text, kind, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{{{labels}}} {value}" if labels else f"{name} {value}" for labels, value in samples]
+    return lines
+
+
+def _runtime_lines():
+    """Counters already kept by other modules (read at scrape time → no hot-path cost)."""
+    from app.services.Embeddings import query_embedding_cache
+    from app.services.llm_client import get_llm_client
+    from app.services.semantic_cache import semantic_cache
+
+    lines = []
+    caches = {"query_embedding": query_embedding_cache.stats(), "semantic": semantic_cache.stats()}
+    lines += _sample_lines("rag_cache_requests_total", "Cache lookups by result", "counter", [
+        (f'cache="{name}",result="{result}"', stats[key])
+        for name, stats in caches.items() for result, key in (("hit", "hits"), ("miss", "misses"))
+    ])
+
+    llm = get_llm_client().stats()
+    lines += _sample_lines("rag_llm_tokens_total", "LLM tokens by kind", "counter", [
+        ('kind="prompt"', llm["prompt_tokens"]), ('kind="completion"', llm["completion_tokens"])])
+    lines += _sample_lines("rag_llm_calls_total", "LLM calls by outcome", "counter", [
+        ('outcome="ok"', llm["calls"] - llm["errors"]), ('outcome="error"', llm["errors"]),
+        ('outcome="retry"', llm["retries"])])
+    return lines
+
+
+def render():
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in (stage_seconds, request_seconds, chunks_total):
+        lines += metric.render()
+    lines += _runtime_lines()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,215 @@
+"""
+model_registry.py
+-----------------
+Process-wide registry of loaded embedding (and reranking) models.
+
+- One copy of each model per (model_name, device) in a worker
+- Warmed once at startup (FastAPI lifespan)
+- Shared by ingestion, retrieval and evaluation
+- Records load time + memory footprint of every loaded model
+- Embedding backend per EMBEDDING_BACKEND:
+    "torch" → PyTorch (default)
+    "onnx"  → ONNX Runtime on CPU (needs optimum[onnxruntime]), same vectors
+  EMBEDDING_QUANTIZE=int8 → dynamically quantized ONNX model, exported once
+  into ONNX_MODEL_DIR; EMBEDDING_THREADS → ONNX Runtime intra-op threads
+"""
+
+import os
+import threading
+import time
+
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+EMBEDDING_BACKENDS = ("torch", "onnx")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "data/onnx")
+ONNX_QUANTIZATION_CONFIG = os.getenv("ONNX_QUANTIZATION_CONFIG", "avx2")   # arm64 | avx2 | avx512 | avx512_vnni
+
+_models = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+# ----------------------------------------------------
+# NAME / DEVICE RESOLUTION
+# ----------------------------------------------------
+def default_model_name() -> str:
+    return os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+
+
+def default_device():
+    # None → let SentenceTransformer pick (cuda if available, else cpu)
+    return os.getenv("EMBEDDING_DEVICE") or None
+
+
+def default_backend():
+    return os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+
+def default_quantize():
+    return os.getenv("EMBEDDING_QUANTIZE", "none").lower()
+
+
+def normalize_model_name(model_name: str) -> str:
+    """
+    "all-MiniLM-L6-v2" and "sentence-transformers/all-MiniLM-L6-v2"
+    are the same weights → map both to the same registry key.
+    """
+    if "/" not in model_name and not os.path.exists(model_name):
+        return f"sentence-transformers/{model_name}"
+    return model_name
+
+
+def _registry_key(model_name, device, backend="torch", quantize="none"):
+    key = (normalize_model_name(model_name), device or "auto")
+    # torch keys stay 2-tuples → existing callers / stats unchanged
+    return key if backend == "torch" else key + (backend, quantize)
+
+
+def _model_nbytes(model) -> int:
+    """Bytes held by the model's parameters + buffers."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+# ----------------------------------------------------
+# ONNX BACKEND
+# ----------------------------------------------------
+def _onnx_model_kwargs(threads=None):
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    threads = threads or int(os.getenv("EMBEDDING_THREADS", "0"))
+    if threads:
+        options.intra_op_num_threads = threads
+
+    return {"provider": "CPUExecutionProvider", "session_options": options}
+
+
+def _load_onnx_model(model_name, quantize="none", threads=None):
+    """
+    ONNX Runtime SentenceTransformer. int8: the exported model is quantized
+    once (dynamic quantization) and cached under ONNX_MODEL_DIR.
+    """
+    if quantize == "none":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx",
+                                   model_kwargs=_onnx_model_kwargs(threads))
+    if quantize != "int8":
+        raise ValueError(f"Unsupported EMBEDDING_QUANTIZE: {quantize} (expected none | int8)")
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    local_dir = os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+    suffix = f"int8_{ONNX_QUANTIZATION_CONFIG}"
+    file_name = f"onnx/model_{suffix}.onnx"
+
+    if not os.path.exists(os.path.join(local_dir, file_name)):
+        print(f"⚙ Quantizing '{model_name}' to int8 ({ONNX_QUANTIZATION_CONFIG}) → {local_dir}")
+        exported = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        exported.save(local_dir)
+        export_dynamic_quantized_onnx_model(
+            exported, ONNX_QUANTIZATION_CONFIG, local_dir, file_suffix=suffix
+        )
+
+    return SentenceTransformer(local_dir, device="cpu", backend="onnx",
+                               model_kwargs={**_onnx_model_kwargs(threads), "file_name": file_name})
+
+
+# ----------------------------------------------------
+# MAIN ACCESSOR
+# ----------------------------------------------------
+def get_embedding_model(model_name=None, device=None, backend=None, quantize=None):
+    """
+    Returns the shared SentenceTransformer for (model_name, device, backend),
+    loading it on first use only.
+    """
+    model_name = model_name or default_model_name()
+    device = device or default_device()
+    backend = (backend or default_backend()).lower()
+    quantize = (quantize or default_quantize()).lower() if backend == "onnx" else "none"
+
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unsupported EMBEDDING_BACKEND: {backend} (expected one of {EMBEDDING_BACKENDS})")
+
+    key = _registry_key(model_name, device, backend, quantize)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have loaded it while we waited
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        start = time.perf_counter()
+        if backend == "onnx":
+            model = _load_onnx_model(key[0], quantize)
+        else:
+            model = SentenceTransformer(key[0], device=device)
+        load_seconds = time.perf_counter() - start
+
+        _models[key] = model
+        _stats[key] = {
+            "model_name": key[0],
+            "backend": backend if quantize == "none" else f"{backend}-{quantize}",
+            "device": str(model.device),
+            "load_seconds": round(load_seconds, 3),
+            # ONNX weights live inside the ORT session, not in torch tensors
+            "memory_mb": round(_model_nbytes(model) / (1024 * 1024), 2) if backend == "torch" else None,
+            "embedding_dim": model.get_sentence_embedding_dimension(),
+        }
+
+    print(f"🧠 Loaded embedding model '{key[0]}' ({_stats[key]['backend']}) on {model.device} "
+          f"in {load_seconds:.2f}s")
+    return model
+
+
+def get_cross_encoder(model_name=None, device=None):
+    """Shared CrossEncoder for reranking (RERANK_MODEL), loaded on first use only."""
+    model_name = model_name or os.getenv("RERANK_MODEL", DEFAULT_RERANK_MODEL)
+    device = device or default_device()
+    key = ("cross-encoder", model_name, device or "auto")
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        start = time.perf_counter()
+        model = CrossEncoder(model_name, device=device)
+        load_seconds = time.perf_counter() - start
+
+        _models[key] = model
+        _stats[key] = {
+            "model_name": model_name,
+            "kind": "cross-encoder",
+            "device": str(model.model.device),
+            "load_seconds": round(load_seconds, 3),
+            "memory_mb": round(_model_nbytes(model.model) / (1024 * 1024), 2),
+        }
+
+    print(f"🧠 Loaded cross-encoder '{model_name}' on {model.model.device} "
+          f"in {load_seconds:.2f}s ({_stats[key]['memory_mb']} MB)")
+    return model
+
+
+def warm_models(model_names=None, device=None):
+    """
+    Load + run one dummy encode for every model, so the first real
+    request pays neither the load nor the first-call kernel setup.
+    """
+    for name in model_names or [default_model_name()]:
+        get_embedding_model(name, device).encode(["warmup"])
+    return model_stats()
+
+
+def model_stats():
+    """Load time + memory footprint of every model held by this worker."""
+    return list(_stats.values())
@@ -0,0 +1,300 @@
+"""
+pipeline.py
+-----------
+Streaming ingestion: extract → split → embed → insert, in batches.
+
+- Loader records are consumed lazily (generators all the way down)
+- Chunks are embedded `batch_size` at a time
+- Batch N is inserted on a background thread while batch N+1 is embedded
+- Store flush happens every `flush_every` batches (0 → once at the end)
+- ingest_site() crawls a website (loaders/crawler.py) → one document per page,
+  a single flush for the whole crawl
+- Time per stage (extract, split, embed, insert, flush) → metrics.py
+
+Peak memory ≈ 2 batches of chunks + vectors, independent of document size.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from app.services import metrics
+from app.services.detector import is_url
+from app.services.Embeddings import (
+    iter_langchain_docs, iter_split_documents, embed_documents
+)
+from app.services.ingest_manifest import (
+    get_manifest, file_sha256, records_sha256, chunk_key
+)
+from app.services.loaders.crawler import crawl, normalize_url
+from app.services.router import stream_from_loader
+
+DEFAULT_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+DEFAULT_FLUSH_EVERY = int(os.getenv("INGEST_FLUSH_EVERY", "0"))
+
+
+class IngestCancelled(Exception):
+    """Raised between batches when the caller's cancel_event is set."""
+
+    def __init__(self, message, stats=None):
+        super().__init__(message)
+        self.stats = stats or {}
+
+
+PROGRESS_KEYS = ("pages", "extracted", "embedded", "inserted", "skipped")
+
+
+def progress_view(stats):
+    """Plain counters only (no hash sets) → safe to hand to progress callbacks."""
+    return {k: stats[k] for k in PROGRESS_KEYS if k in stats}
+
+
+def iter_batches(iterable, batch_size):
+    """Yields lists of up to batch_size items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def ingest_records(records, store, batch_size=None, flush_every=None,
+                   chunk_size=600, chunk_overlap=100, on_progress=None,
+                   cancel_event=None, known_hashes=None, flush=True):
+    """
+    Streams loader records into the vector store.
+
+    records     → any iterable of loader dicts (list or generator)
+    on_progress → optional callback(stats) after every batch, where stats =
+                  {"extracted": .., "embedded": .., "inserted": ..}
+    cancel_event → optional threading.Event; checked before every batch.
+                   Batches already inserted are kept (and flushed).
+    known_hashes → optional set of chunk keys (ingest_manifest.chunk_key) already
+                   stored for this source. Matching chunks are skipped, not re-embedded.
+                   stats then also holds "skipped", "seen_hashes" and
+                   "chunk_ids" ({new chunk key: [vector ids]}).
+    flush       → False leaves the final store.flush() to the caller
+                  (many small documents in a row, e.g. a crawl).
+
+    Returns the stats dict (stats["inserted"] = chunks stored).
+    """
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    flush_every = DEFAULT_FLUSH_EVERY if flush_every is None else flush_every
+
+    stats = {"extracted": 0, "embedded": 0, "inserted": 0}
+
+    def counted(items):
+        for item in items:
+            stats["extracted"] += 1
+            yield item
+
+    def skip_known(chunks):
+        for chunk in chunks:
+            h = chunk_key(chunk.page_content, chunk.metadata["chunk_index"])
+
+            if h in known_hashes or h in stats["seen_hashes"]:
+                stats["seen_hashes"].add(h)
+                stats["skipped"] += 1
+                continue
+
+            stats["seen_hashes"].add(h)
+            chunk.metadata["content_hash"] = h
+            yield chunk
+
+    # Streamed stages interleave → each one is summed over the whole run
+    extract_timer = metrics.accumulator("extract")
+    split_timer = metrics.accumulator("split")
+    embed_timer = metrics.accumulator("embed")
+    insert_timer = metrics.accumulator("insert")
+
+    def insert_batch(batch, embeddings, flush_now):
+        with insert_timer:   # single inserter thread → no concurrent updates
+            ids = store.insert(batch, embeddings, flush=flush_now)
+        stats["inserted"] += len(batch)
+
+        if known_hashes is not None:
+            for doc, pk in zip(batch, ids):
+                stats["chunk_ids"].setdefault(doc.metadata["content_hash"], []).append(pk)
+
+    docs = iter_langchain_docs(counted(metrics.timed_iter(records, extract_timer)))
+    chunks = iter_split_documents(docs, chunk_size, chunk_overlap)
+
+    if known_hashes is not None:
+        stats.update(skipped=0, seen_hashes=set(), chunk_ids={})
+        chunks = skip_known(chunks)
+
+    # One insert in flight while the next batch is being embedded
+    with ThreadPoolExecutor(max_workers=1) as inserter:
+        pending = None
+
+        batches = metrics.timed_iter(iter_batches(chunks, batch_size), split_timer)
+
+        for n, batch in enumerate(batches, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+            with embed_timer:
+                embeddings = embed_documents(batch)
+            stats["embedded"] += len(batch)
+
+            if pending is not None:
+                pending.result()   # surfaces insert errors + bounds memory
+
+            flush_now = bool(flush_every) and n % flush_every == 0
+            pending = inserter.submit(insert_batch, batch, embeddings, flush_now)
+
+            if on_progress:
+                on_progress(progress_view(stats))
+
+        if pending is not None:
+            pending.result()
+
+    if flush and stats["inserted"]:
+        with metrics.span("flush"):
+            store.flush()
+
+    # Producing a batch also pulled records from the loader → split time excludes extraction
+    split_timer.seconds -= extract_timer.seconds
+    for timer in (extract_timer, split_timer, embed_timer, insert_timer):
+        timer.observe()
+    metrics.count_chunks(stats)
+
+    if on_progress:
+        on_progress(progress_view(stats))
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise IngestCancelled(f"Cancelled after {stats['inserted']} chunks", stats)
+
+    return stats
+
+
+def source_key(input_path):
+    """
+    The "source" value stored in metadata + the manifest for this input.
+    URLs are normalized the way the crawler does → /load/url and a crawl share one key.
+    """
+    return normalize_url(input_path) if is_url(input_path) else str(Path(input_path))
+
+
+def ingest_source(input_path, store, manifest=None, **kwargs):
+    """
+    Incremental ingestion of one file / URL.
+
+    - unchanged source (same document hash) → skipped, nothing extracted or embedded
+    - changed source → only new chunks embedded, vanished chunks deleted
+    - first time seen → any vectors stored before fingerprinting are dropped
+
+    kwargs are passed to ingest_records(). Returns its stats, plus
+    "deleted" (stale vectors removed) and "unchanged" (bool).
+    """
+    manifest = manifest or get_manifest(store.manifest_namespace)
+    source = source_key(input_path)
+    with metrics.span("detect"):
+        records = stream_from_loader(input_path)   # raises ValueError if unsupported
+
+    if is_url(input_path):
+        with metrics.span("extract"):
+            records = list(records)   # one page → hash the text before embedding
+        for record in records:
+            record["source"] = source
+        doc_hash = records_sha256(records)
+    else:
+        doc_hash = file_sha256(input_path)
+
+    return ingest_document(source, records, doc_hash, store, manifest, **kwargs)
+
+
+def ingest_document(source, records, doc_hash, store, manifest=None, **kwargs):
+    """
+    Incremental ingestion of already-fingerprinted records (see ingest_source).
+    """
+    manifest = manifest or get_manifest(store.manifest_namespace)
+
+    if manifest.get_doc_hash(source) == doc_hash:
+        print(f"⏭ Unchanged since last ingest, skipping → {source}")
+        stats = {"extracted": 0, "embedded": 0, "inserted": 0, "skipped": 0,
+                 "deleted": 0, "unchanged": True}
+        if kwargs.get("on_progress"):
+            kwargs["on_progress"](progress_view(stats))
+        return stats
+
+    existing = manifest.chunk_ids(source)
+
+    if not manifest.has_source(source):
+        # First time seen → drop vectors stored before fingerprinting, but keep the
+        # chunks a cancelled earlier attempt recorded (they are skipped below)
+        store.delete_source(source, keep_ids=[pk for ids in existing.values() for pk in ids])
+
+    try:
+        stats = ingest_records(records, store, known_hashes=set(existing), **kwargs)
+    except IngestCancelled as e:
+        # Remember what did land → the retry won't duplicate it
+        manifest.add_chunks(source, e.stats.get("chunk_ids", {}))
+        raise
+
+    stale = [h for h in existing if h not in stats["seen_hashes"]]
+    stale_ids = [pk for h in stale for pk in existing[h]]
+    if stale_ids:
+        store.delete_ids(stale_ids)
+        manifest.remove_chunks(source, stale)
+        metrics.count_chunks({"deleted": len(stale_ids)})
+
+    manifest.add_chunks(source, stats["chunk_ids"])
+    manifest.set_doc_hash(source, doc_hash)
+
+    stats["deleted"] = len(stale_ids)
+    stats["unchanged"] = False
+    return stats
+
+
+def ingest_site(seed_url, store, manifest=None, max_depth=None, max_pages=None,
+                on_progress=None, cancel_event=None, **kwargs):
+    """
+    Crawls seed_url's site and ingests every page as its own source.
+
+    - pages answered 304 Not Modified → counted as "not_modified", no download or parse
+    - pages with unchanged text → "unchanged", nothing embedded
+    - changed pages → ingest_document() (only new chunks embedded)
+
+    kwargs are passed to ingest_records(). Returns totals over all pages.
+    """
+    manifest = manifest or get_manifest(store.manifest_namespace)
+    totals = {"pages": 0, "changed": 0, "unchanged": 0, "not_modified": 0,
+              "extracted": 0, "embedded": 0, "inserted": 0, "skipped": 0, "deleted": 0}
+
+    def on_page(page):
+        if cancel_event is not None and cancel_event.is_set():
+            raise IngestCancelled(f"Cancelled after {totals['pages']} pages", totals)
+
+        totals["pages"] += 1
+        if page["status"] == "not_modified":
+            totals["not_modified"] += 1
+        else:
+            records = page["records"]
+            stats = ingest_document(page["url"], records, records_sha256(records), store, manifest,
+                                    flush=False, cancel_event=cancel_event, **kwargs)
+            totals["unchanged" if stats["unchanged"] else "changed"] += 1
+            for key in ("extracted", "embedded", "inserted", "skipped", "deleted"):
+                totals[key] += stats.get(key, 0)
+            manifest.set_http_validators(page["url"], page["etag"], page["last_modified"], page["links"])
+
+        if on_progress:
+            on_progress(progress_view(totals))
+
+    try:
+        counts = asyncio.run(crawl([seed_url], on_page, max_depth=max_depth, max_pages=max_pages,
+                                   validators=manifest.get_http_validators))
+    finally:
+        if totals["inserted"] or totals["deleted"]:
+            with metrics.span("flush"):
+                store.flush()
+
+    totals["failed"] = counts["failed"]
+    totals["non_html"] = counts["skipped"]
+    print(f"🕸 Crawled {normalize_url(seed_url)} → {totals['pages']} pages "
+          f"({totals['changed']} changed, {totals['unchanged']} unchanged, "
+          f"{totals['not_modified']} not modified, {counts['failed']} failed)")
+    return totals
@@ -1,56 +1,88 @@
 import os
-from openai import OpenAI
-from langchain_milvus import Milvus
-from app.services.Embeddings import embed_documents
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from sentence_transformers import SentenceTransformer, util
+from app.services import evaluations
+from app.services import hybrid, metrics, reranker
+from app.services.context_builder import build_context
+from app.services.Embeddings import (
+    embed_query, embed_queries, embed_documents, aembed_query, aembed_documents
+)
+from app.services.llm_client import get_llm_client, run_sync
+from app.services.semantic_cache import semantic_cache, SEMANTIC_CACHE_ENABLED
+from app.services.vector_store import init_vector_store, check_filters
+from sentence_transformers import util
 import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 
-def init_vectorstore(collection_name="knowledge_base_vectors", host="localhost", port="19530"):
+def init_vectorstore(collection_name="knowledge_base_vectors", backend=None, **options):
+    """Vector store for RAG (backend from VECTOR_BACKEND → milvus | local)."""
+    return init_vector_store(backend=backend, collection_name=collection_name, **options)
 
-    embedding_function = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
-    )
-
-    vectorstore = Milvus(
-        embedding_function=embedding_function,   # ← REQUIRED
-        collection_name=collection_name,
-        connection_args={"host": host, "port": port},
-        search_params={"metric_type": "COSINE", "params": {"ef": 64}}
-    )
-
-    print(f"Milvus VectorStore initialized → {collection_name}")
-    return vectorstore
 
-
-def retrieve_documents(vectorstore, query, top_k=5):
+def retrieve_documents(store, query, top_k=5, filters=None, mode=None, rerank=None):
     """
     Embeds user query → retrieves similar chunks.
+    filters → optional metadata filters (see vector_store.py), e.g. {"type": "pdf"}
+    mode    → "dense" | "hybrid" (dense + BM25, RRF-fused; default RETRIEVAL_MODE)
+    rerank  → over-fetch + cross-encoder rerank to top_k (default RERANK_ENABLED)
     """
-    query_emb = embed_documents([query])[0]
+    with metrics.span("embed"):
+        query_emb = embed_query(query)   # cached → repeated questions skip the encoder
+    fetch_k = reranker.candidates(top_k, rerank)
 
-    results = vectorstore.similarity_search_by_vector(
-        embedding=query_emb,
-        k=top_k,
-        expr=None  # optional filters later like type == 'pdf'
-    )
+    with metrics.span("retrieve"):
+        if hybrid.resolve_retrieval_mode(mode, store) == "hybrid":
+            docs = hybrid.hybrid_search(store, query, query_emb, top_k=fetch_k, filters=filters)
+        else:
+            docs = store.search(query_emb, k=fetch_k, filters=filters)
 
-    return results
+    if reranker.should_rerank(rerank):
+        with metrics.span("rerank"):
+            return reranker.rerank(query, docs, top_k)
+    return docs
 
 
+def retrieve_documents_batch(store, queries, top_k=5, filters=None, mode=None):
+    """
+    Many queries → one encode batch + one multi-vector search.
+    Returns one list of Documents per query, in input order.
+    """
+    with metrics.span("embed"):
+        query_embs = embed_queries(queries)
 
-def get_llm_answer(context, question):
+    with metrics.span("retrieve"):
+        if hybrid.resolve_retrieval_mode(mode, store) == "hybrid":
+            return hybrid.hybrid_search_batch(store, queries, query_embs, top_k=top_k, filters=filters)
+        return store.search_batch(query_embs, k=top_k, filters=filters)
+
+
+async def aretrieve_documents(store, query, top_k=5, filters=None, query_emb=None, mode=None,
+                              rerank=None):
     """
-    LLM call — now clean & reusable.
+    retrieve_documents() for the event loop: encoding runs on the embedding
+    executor, the (blocking) store searches + reranking on worker threads.
     """
+    if query_emb is None:
+        with metrics.span("embed"):
+            query_emb = await aembed_query(query)
+    fetch_k = reranker.candidates(top_k, rerank)
 
-    client = OpenAI(
-        base_url="https://integrate.api.nvidia.com/v1",
-        api_key=os.getenv("NVIDIA_API_KEY")
-    )
+    with metrics.span("retrieve"):
+        if hybrid.resolve_retrieval_mode(mode, store) == "hybrid":
+            docs = await hybrid.ahybrid_search(store, query, query_emb, top_k=fetch_k, filters=filters)
+        else:
+            docs = await asyncio.to_thread(store.search, query_emb, k=fetch_k, filters=filters)
 
-    prompt = f"""
+    if reranker.should_rerank(rerank):
+        with metrics.span("rerank"):
+            return await asyncio.to_thread(reranker.rerank, query, docs, top_k)
+    return docs
+
+
+def build_prompt(context, question):
+    return f"""
 You are a RAG assistant. Answer based ONLY on the given context.
 If information is missing, respond with "Not enough data found in memory."
 
@@ -61,48 +93,192 @@ Question: {question}
 Answer:
 """
 
-    response = client.chat.completions.create(
-        model="meta/llama-3.2-3b-instruct",
-        messages=[{"role": "user", "content": prompt}],
+
+def get_llm_answer(context, question):
+    """
+    LLM call — now clean & reusable.
+    """
+
+    with metrics.span("generate"):
+        result = get_llm_client().complete(
+            [{"role": "user", "content": build_prompt(context, question)}],
+            max_tokens=400
+        )
+
+    return result["text"]
+
+
+async def aget_llm_answer(context, question):
+    """get_llm_answer() over the async client → no thread held while waiting."""
+
+    with metrics.span("generate"):
+        result = await get_llm_client().acomplete(
+            [{"role": "user", "content": build_prompt(context, question)}],
+            max_tokens=400
+        )
+
+    return result["text"]
+
+
+def stream_llm_answer(context, question):
+    """Same as get_llm_answer(), but yields text deltas as the LLM produces them."""
+
+    yield from get_llm_client().stream(
+        [{"role": "user", "content": build_prompt(context, question)}],
         max_tokens=400
     )
 
-    return response.choices[0].message.content.strip()
 
 
+def cache_scope(top_k, filters, retrieval_mode=None, rerank=None):
+    return (top_k, json.dumps(filters or {}, sort_keys=True),
+            hybrid.resolve_retrieval_mode(retrieval_mode), reranker.should_rerank(rerank))
+
+
+def cached_answer(question, top_k, query_emb=None, filters=None, retrieval_mode=None,
+                  rerank=None):
+    """
+    Semantic cache hit → result shaped like generate_rag_answer(), else None.
+    Every hit is a new query: fresh query_id (the original one is kept as
+    cached_query_id) and no scores — the caller evaluates it per its own
+    eval_mode (see evaluate_answer / aevaluate_answer).
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+
+    if query_emb is None:
+        query_emb = embed_query(question)
+
+    hit = semantic_cache.lookup(query_emb, cache_scope(top_k, filters, retrieval_mode, rerank))
+    if hit is None:
+        return None
+
+    return {**hit["result"], "query_id": uuid.uuid4().hex,
+            "cached_query_id": hit["result"]["query_id"], "cached": True,
+            "cache_similarity": round(hit["similarity"], 4),
+            "rag_score": None, "details": {}, "evaluation_status": "skipped"}
+
 
-async def generate_rag_answer(vectorstore, question, top_k=5):
+def evaluate_answer(mode, query_id, question, docs, answer):
+    """Evaluation per resolved eval mode (worker threads) → (scores, status)."""
+    if mode == "inline":
+        scores = evaluate_rag_sync(question, docs, answer)
+        evaluations.record(query_id, question, "done", scores=scores)
+        return scores, "done"
+    if mode == "background":
+        evaluations.submit(query_id, question, lambda: evaluate_rag_sync(question, docs, answer))
+        return {}, "pending"
+    return {}, "skipped"
+
+
+async def aevaluate_answer(mode, query_id, question, docs, answer):
+    """evaluate_answer() for the event loop (inline evaluation awaits the async LLM client)."""
+    if mode == "inline":
+        scores = await evaluate_rag(question, docs, answer)
+        evaluations.record(query_id, question, "done", scores=scores)
+        return scores, "done"
+    return evaluate_answer(mode, query_id, question, docs, answer)
+
+
+def _with_evaluation(result, scores, status):
+    return {**result, "rag_score": scores.get("rag_score"), "details": scores,
+            "evaluation_status": status}
+
+
+def cache_answer(question, top_k, result, started, generation, query_emb=None, filters=None,
+                 retrieval_mode=None, rerank=None):
+    if SEMANTIC_CACHE_ENABLED:
+        if query_emb is None:
+            query_emb = embed_query(question)
+        semantic_cache.put(query_emb, cache_scope(top_k, filters, retrieval_mode, rerank),
+                           question, result,
+                           time.perf_counter() - started, generation)
+
+
+async def generate_rag_answer(store, question, top_k=5, eval_mode=None, filters=None,
+                              retrieval_mode=None, rerank=None):
     """
     Full RAG cycle:
+    - semantic cache lookup (paraphrases of a recent question skip everything below)
     - retrieve docs
     - create answer
-    - evaluate answer
-    """
+    - evaluate answer (inline / background / sampled / off → see evaluations.py)
 
-    docs = retrieve_documents(vectorstore, question, top_k=top_k)
+    rag_score is None unless evaluated inline; background results are
+    fetched later by query_id. filters → scope retrieval (see vector_store.py),
+    retrieval_mode → "dense" | "hybrid" (see hybrid.py), rerank → see reranker.py.
+
+    Never blocks the event loop: encoding and store search run on worker
+    threads, LLM calls go through the async client.
+    """
+    mode = evaluations.resolve_mode(eval_mode)
+    check_filters(filters)   # bad filters / mode → ValueError before any work
+    hybrid.resolve_retrieval_mode(retrieval_mode)
+    with metrics.span("embed"):
+        query_emb = await aembed_query(question)
+
+    with metrics.span("cache"):
+        cached = cached_answer(question, top_k, query_emb, filters, retrieval_mode, rerank)
+    if cached is not None:
+        scores, status = await aevaluate_answer(mode, cached["query_id"], question,
+                                                cached["docs"], cached["answer"])
+        return _with_evaluation(cached, scores, status)
+
+    started = time.perf_counter()
+    generation = semantic_cache.invalidations
+    query_id = uuid.uuid4().hex
+
+    docs = await aretrieve_documents(store, question, top_k=top_k, filters=filters,
+                                     query_emb=query_emb, mode=retrieval_mode, rerank=rerank)
 
     if not docs:
         return {
+            "query_id": query_id,
             "answer": "No relevant memory found.",
             "rag_score": 0,
             "details": {},
+            "evaluation_status": "skipped",
+            "cached": False,
             "docs": []
         }
 
-    context = "\n\n".join([doc.page_content for doc in docs])
-    answer = get_llm_answer(context, question)
+    # Merged, de-overlapped, relevance-ordered, capped at CONTEXT_TOKEN_BUDGET
+    with metrics.span("context"):
+        context, context_stats = await asyncio.to_thread(build_context, docs)
+    answer = await aget_llm_answer(context, question)
 
-    eval_scores = await evaluate_rag(question, docs, answer)
+    eval_scores, status = await aevaluate_answer(mode, query_id, question, docs, answer)
 
-    return {
+    result = {
+        "query_id": query_id,
         "answer": answer,
-        "rag_score": eval_scores["rag_score"],
+        "rag_score": eval_scores.get("rag_score"),
         "details": eval_scores,
+        "evaluation_status": status,
+        "cached": False,
+        "context_tokens": context_stats["tokens"],
         "docs": docs
     }
 
+    cache_answer(question, top_k, result, started, generation, query_emb, filters,
+                 retrieval_mode, rerank)
+    return result
+
+
+def faithfulness_prompt(retrieved_docs, answer):
+    context_text, _ = build_context(retrieved_docs)   # same context the answer was built from
+
+    return f"""
+Evaluate if the ANSWER is fully supported by the CONTEXT.
+Return ONLY a floating number between 0 and 1.
+
+CONTEXT:
+{context_text}
+
+ANSWER:
+{answer}
+"""
 
-model_eval = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 
 async def evaluate_rag(query, retrieved_docs, answer):
     """
@@ -112,43 +288,41 @@ async def evaluate_rag(query, retrieved_docs, answer):
     - Final RAG Score (percentage)
     """
 
-    # --- 1. Context Recall ---
-    query_emb = model_eval.encode(query, convert_to_tensor=True)
-    doc_embs = model_eval.encode(
-        [doc.page_content for doc in retrieved_docs],
-        convert_to_tensor=True
-    )
+    with metrics.span("evaluate"):
+        # --- 1. Context Recall ---
+        query_emb = await aembed_query(query)   # already encoded during retrieval
+        doc_embs = await aembed_documents(retrieved_docs)
 
-    similarities = util.cos_sim(query_emb, doc_embs)[0]
-    context_recall = float(similarities.max().item())
+        # --- 2. Faithfulness ---
+        faith_resp = await get_llm_client().acomplete(
+            [{"role": "user", "content": faithfulness_prompt(retrieved_docs, answer)}],
+            max_tokens=10
+        )
 
-    # --- 2. Faithfulness ---
-    client = OpenAI(
-        base_url="https://integrate.api.nvidia.com/v1",
-        api_key=os.getenv("NVIDIA_API_KEY")
-    )
+    return rag_scores(query_emb, doc_embs, faith_resp["text"])
 
-    context_text = "\n\n".join([d.page_content for d in retrieved_docs])
 
-    check_prompt = f"""
-Evaluate if the ANSWER is fully supported by the CONTEXT.
-Return ONLY a floating number between 0 and 1.
+def evaluate_rag_sync(query, retrieved_docs, answer):
+    """evaluate_rag() for worker threads (background evaluations, streaming, batch)."""
 
-CONTEXT:
-{context_text}
+    with metrics.span("evaluate"):
+        query_emb = embed_query(query)
+        doc_embs = embed_documents(retrieved_docs)
 
-ANSWER:
-{answer}
-"""
+        faith_resp = get_llm_client().complete(
+            [{"role": "user", "content": faithfulness_prompt(retrieved_docs, answer)}],
+            max_tokens=10
+        )
+
+    return rag_scores(query_emb, doc_embs, faith_resp["text"])
 
-    faith_resp = client.chat.completions.create(
-        model="meta/llama-3.2-3b-instruct",
-        messages=[{"role": "user", "content": check_prompt}],
-        max_tokens=10
-    )
+
+def rag_scores(query_emb, doc_embs, faithfulness_text):
+    similarities = util.cos_sim(query_emb, doc_embs)[0]
+    context_recall = float(similarities.max().item())
 
     try:
-        faithfulness = float(faith_resp.choices[0].message.content.strip())
+        faithfulness = float(faithfulness_text)
     except:
         faithfulness = 0.0
 
@@ -160,11 +334,132 @@ ANSWER:
         "rag_score": round(rag_score, 2)
     }
 
-def generate_rag_answer_with_eval(vectorstore, question, top_k=4):
-    result = asyncio.run(generate_rag_answer(vectorstore, question, top_k))
+def generate_rag_answer_with_eval(store, question, top_k=4, eval_mode=None, filters=None,
+                                  retrieval_mode=None, rerank=None):
+    """Blocking wrapper for scripts / CLI (the API awaits generate_rag_answer directly)."""
+    result = run_sync(
+        generate_rag_answer(store, question, top_k, eval_mode, filters, retrieval_mode, rerank)
+    )
 
     return {
+        "query_id": result["query_id"],
         "answer": result["answer"],
         "score": result["rag_score"],
+        "evaluation_status": result["evaluation_status"],
+        "cached": result["cached"],
         "docs": result["docs"]
     }
+
+
+def stream_rag_answer(store, question, top_k=5, eval_mode=None, filters=None,
+                      retrieval_mode=None, rerank=None):
+    """
+    Streaming RAG cycle → yields (event, data) tuples:
+    - ("docs", {...})        retrieved document metadata, before generation starts
+    - ("token", "...")       answer text deltas as they arrive
+    - ("evaluation", {...})  scores (inline) or pending status (background)
+    - ("done", {...})
+    """
+    mode = evaluations.resolve_mode(eval_mode)
+    cached = cached_answer(question, top_k, filters=filters, retrieval_mode=retrieval_mode,
+                           rerank=rerank)
+    if cached is not None:
+        query_id = cached["query_id"]
+        yield "docs", {
+            "query_id": query_id,
+            "documents": [doc.metadata for doc in cached["docs"]]
+        }
+        yield "token", cached["answer"]
+        scores, status = evaluate_answer(mode, query_id, question, cached["docs"], cached["answer"])
+        if status != "skipped":
+            yield "evaluation", {"query_id": query_id, "status": status, **scores}
+        yield "done", {"query_id": query_id, "cached": True}
+        return
+
+    started = time.perf_counter()
+    generation = semantic_cache.invalidations
+    query_id = uuid.uuid4().hex
+
+    docs = retrieve_documents(store, question, top_k=top_k, filters=filters, mode=retrieval_mode,
+                              rerank=rerank)
+
+    yield "docs", {
+        "query_id": query_id,
+        "documents": [doc.metadata for doc in docs]
+    }
+
+    if not docs:
+        yield "token", "No relevant memory found."
+        yield "done", {"query_id": query_id}
+        return
+
+    with metrics.span("context"):
+        context, _ = build_context(docs)
+    parts = []
+
+    # Only the time spent waiting on the LLM counts, not the client reading the stream
+    generate_timer = metrics.accumulator("generate")
+    for delta in metrics.timed_iter(stream_llm_answer(context, question), generate_timer):
+        parts.append(delta)
+        yield "token", delta
+    generate_timer.observe()
+
+    answer = "".join(parts).strip()
+    eval_scores, status = evaluate_answer(mode, query_id, question, docs, answer)
+    if status != "skipped":
+        yield "evaluation", {"query_id": query_id, "status": status, **eval_scores}
+
+    cache_answer(question, top_k, {
+        "query_id": query_id, "answer": answer, "rag_score": eval_scores.get("rag_score"),
+        "details": eval_scores, "evaluation_status": status, "cached": False, "docs": docs
+    }, started, generation, filters=filters, retrieval_mode=retrieval_mode, rerank=rerank)
+
+    yield "done", {"query_id": query_id, "cached": False}
+
+
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "8"))
+
+
+def generate_rag_answers_batch(store, questions, top_k=5, eval_mode=None, concurrency=None,
+                               filters=None, retrieval_mode=None, rerank=None):
+    """
+    Batch RAG cycle:
+    - one encode + one vector search for all questions
+    - LLM answer (+ inline evaluation) per question, at most `concurrency` in flight
+
+    Returns one result per question (input order). A failing question gets
+    an "error" entry instead of failing the whole batch.
+    """
+    # Over-fetched once for all questions; each question is reranked on its own LLM thread
+    all_docs = retrieve_documents_batch(store, questions, top_k=reranker.candidates(top_k, rerank),
+                                        filters=filters, mode=retrieval_mode)
+
+    def answer_one(question, docs):
+        query_id = uuid.uuid4().hex
+
+        if docs and reranker.should_rerank(rerank):
+            with metrics.span("rerank"):
+                docs = reranker.rerank(question, docs, top_k)
+
+        if not docs:
+            return {"query_id": query_id, "question": question,
+                    "answer": "No relevant memory found.", "rag_score": 0,
+                    "evaluation_status": "skipped", "docs": []}
+
+        try:
+            mode = evaluations.resolve_mode(eval_mode)
+            with metrics.span("context"):
+                context, _ = build_context(docs)
+            answer = get_llm_answer(context, question)
+            eval_scores, status = evaluate_answer(mode, query_id, question, docs, answer)
+
+            return {"query_id": query_id, "question": question, "answer": answer,
+                    "rag_score": eval_scores.get("rag_score"),
+                    "evaluation_status": status, "docs": docs}
+
+        except Exception as e:
+            print(f"❌ Batch question failed ({question!r}):", e)
+            return {"query_id": query_id, "question": question, "error": str(e), "docs": docs}
+
+    with ThreadPoolExecutor(max_workers=concurrency or LLM_BATCH_CONCURRENCY) as pool:
+        return list(pool.map(answer_one, questions, all_docs))
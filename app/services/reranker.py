@@ -0,0 +1,124 @@
+"""
+reranker.py
+-----------
+Optional cross-encoder reranking between retrieval and the prompt.
+
+- Retrieval over-fetches RERANK_CANDIDATES chunks
+- A small CPU-friendly cross-encoder (RERANK_MODEL) scores (question, chunk)
+  pairs in batches of RERANK_BATCH_SIZE; the best top_k go into the prompt
+- Per-request budget (RERANK_BUDGET_MS): each batch is shrunk to the pairs
+  expected to fit the remaining time (moving average per pair); a batch
+  that has started always finishes and its scores are kept → the overrun is
+  bounded by one batch's estimation error (≤ RERANK_BATCH_SIZE pairs)
+- Candidates left unscored when the budget runs out keep retrieval order,
+  after the scored ones
+- Off unless RERANK_ENABLED=true (or requested per call)
+"""
+
+import os
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from app.services.model_registry import get_cross_encoder
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+
+_stats_lock = threading.Lock()
+_stats = {"reranked": 0, "partial": 0, "fallbacks": 0, "pair_seconds": None}
+
+
+def should_rerank(rerank=None):
+    return RERANK_ENABLED if rerank is None else bool(rerank)
+
+
+def candidates(top_k, rerank=None):
+    """How many chunks retrieval should fetch for a top_k answer."""
+    return max(top_k, RERANK_CANDIDATES) if should_rerank(rerank) else top_k
+
+
+def _batch_size(remaining):
+    """Pairs expected to fit in the remaining seconds (0 → stop scoring)."""
+    with _stats_lock:
+        pair_seconds = _stats["pair_seconds"]
+    if remaining <= 0:
+        return 0
+    if not pair_seconds:
+        return RERANK_BATCH_SIZE
+    return min(RERANK_BATCH_SIZE, int(remaining / pair_seconds))
+
+
+def _observe_batch(seconds, pairs):
+    # Moving average per pair → sizes the next batch to the remaining budget
+    with _stats_lock:
+        previous = _stats["pair_seconds"]
+        current = seconds / pairs
+        _stats["pair_seconds"] = current if previous is None else 0.8 * previous + 0.2 * current
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def rerank(question, docs, top_k, budget_ms=None):
+    """
+    docs (retrieval order) → best top_k by cross-encoder score.
+    If the budget runs out, the scored prefix is ranked and the rest keeps
+    retrieval order behind it (nothing scored → docs[:top_k]).
+    """
+    if len(docs) <= 1:
+        return docs[:top_k]
+
+    model = get_cross_encoder()   # warmed at startup when enabled → not charged to the budget
+    budget = (RERANK_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+    deadline = time.monotonic() + budget
+    pairs = [(question, doc.page_content) for doc in docs]
+    scores = []
+
+    while len(scores) < len(pairs):
+        size = _batch_size(deadline - time.monotonic())
+        if size < 1:
+            break
+
+        batch = pairs[len(scores):len(scores) + size]
+        batch_started = time.monotonic()
+        scores.extend(float(s) for s in model.predict(batch))
+        _observe_batch(time.monotonic() - batch_started, len(batch))
+
+    if not scores:
+        _record("fallbacks")
+        return docs[:top_k]
+
+    _record("reranked" if len(scores) == len(docs) else "partial")
+    ranked = sorted(zip(docs, scores), key=lambda pair: pair[1], reverse=True)
+
+    reranked = [
+        Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "rerank_score": round(score, 4)}
+        )
+        for doc, score in ranked[:top_k]
+    ]
+    return reranked + docs[len(scores):len(scores) + top_k - len(reranked)]
+
+
+def warm_reranker():
+    """Load the cross-encoder + score one pair (FastAPI lifespan, when enabled)."""
+    get_cross_encoder().predict([("warmup", "warmup")])
+
+
+def stats():
+    with _stats_lock:
+        total = _stats["reranked"] + _stats["partial"] + _stats["fallbacks"]
+        return {
+            "enabled": RERANK_ENABLED,
+            "candidates": RERANK_CANDIDATES,
+            "budget_ms": RERANK_BUDGET_MS,
+            **_stats,
+            "fallback_rate": round(_stats["fallbacks"] / total, 4) if total else 0.0,
+        }
@@ -4,43 +4,49 @@ router.py
 - Imports loaders safely (optional dependencies)
 - Maps loader types to loader functions
 - Provides one unified entrypoint: route_to_loader()
+  (+ stream_from_loader() for generator-based ingestion)
 """
 
 from .detector import detect_input_type
 
+
+class UnsupportedInput(ValueError):
+    """No loader exists for the detected input type."""
+
+
 # ---------------------------------------------
 # Safe optional imports for each loader
 # ---------------------------------------------
 
 # URL Loader
 try:
-    from .loaders.url_extractor import process_url
+    from .loaders.url_extractor import process_url, iter_url
 except Exception:
-    process_url = None
+    process_url = iter_url = None
 
 # TXT Loader
 try:
-    from .loaders.txt_extractor import process_txt
+    from .loaders.txt_extractor import process_txt, iter_txt
 except Exception:
-    process_txt = None
+    process_txt = iter_txt = None
 
 # PDF Loader
 try:
-    from .loaders.pdf_extractor import process_pdf
+    from .loaders.pdf_extractor import process_pdf, iter_pdf
 except Exception:
-    process_pdf = None
+    process_pdf = iter_pdf = None
 
 # DOCX Loader
 try:
-    from .loaders.docx_extractor import process_docx
+    from .loaders.docx_extractor import process_docx, iter_docx
 except Exception:
-    process_docx = None
+    process_docx = iter_docx = None
 
 # IMAGE Loader
 try:
-    from .loaders.image_extractor import process_image
+    from .loaders.image_extractor import process_image, iter_image
 except Exception:
-    process_image = None
+    process_image = iter_image = None
 
 
 # ---------------------------------------------
@@ -55,6 +61,33 @@ LOADER_MAP = {
 }
 
 
+# Streaming variants → yield records one at a time
+STREAM_LOADER_MAP = {
+    "url": iter_url,
+    "txt": iter_txt,
+    "pdf": iter_pdf,
+    "docx": iter_docx,
+    "image": iter_image,
+}
+
+
+def _resolve_loader(input_path: str, loader_map):
+    input_type = detect_input_type(input_path)
+
+    if input_type not in loader_map:
+        raise UnsupportedInput(f"Unsupported input type: {input_type}")
+
+    loader_fn = loader_map[input_type]
+
+    if loader_fn is None:
+        raise RuntimeError(
+            f"Loader for '{input_type}' not installed. "
+            f"Check optional dependencies."
+        )
+
+    return loader_fn
+
+
 # ---------------------------------------------
 # MAIN ROUTER
 # ---------------------------------------------
@@ -76,17 +109,14 @@ def route_to_loader(input_path: str):
     ]
     """
 
-    input_type = detect_input_type(input_path)
-
-    if input_type not in LOADER_MAP:
-        raise ValueError(f"Unsupported input type: {input_type}")
+    return _resolve_loader(input_path, LOADER_MAP)(input_path)
 
-    loader_fn = LOADER_MAP[input_type]
 
-    if loader_fn is None:
-        raise RuntimeError(
-            f"Loader for '{input_type}' not installed. "
-            f"Check optional dependencies."
-        )
+def stream_from_loader(input_path: str):
+    """
+    Same as route_to_loader(), but returns a generator of the same
+    dicts → callers never hold the full extraction in memory.
 
-    return loader_fn(input_path)
+    Unsupported / missing loaders raise immediately (not on first next()).
+    """
+    return _resolve_loader(input_path, STREAM_LOADER_MAP)(input_path)
@@ -0,0 +1,140 @@
+"""
+semantic_cache.py
+-----------------
+Answer cache keyed on query-embedding similarity.
+
+- A new question whose embedding is within SEMANTIC_CACHE_THRESHOLD cosine
+  similarity of a cached one (same scope: top_k + filters) reuses its answer,
+  docs and score
+- Index: normalized vectors in one NumPy matrix, scored with a single matmul
+  (exact, well under a millisecond at the default 1000 entries — no ANN
+  structure needed at this size)
+- LRU eviction when full + TTL expiry
+- Cleared whenever the vector store changes (insert / delete / drop)
+- Reports hit rate and the latency the hits saved
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.services.vector_store import on_store_change, VECTOR_DIM
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+
+
+class SemanticCache:
+    def __init__(self, dim=VECTOR_DIM, maxsize=1000, ttl=3600.0, threshold=0.95):
+        self.dim = dim
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._entries = [None] * maxsize   # slot → dict (None = free)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _normalize(vector):
+        v = np.asarray(vector, dtype=np.float32)
+        return v / max(float(np.linalg.norm(v)), 1e-12)
+
+    def lookup(self, vector, scope):
+        """
+        Cached entry for a near-identical question, else None.
+        scope → must match exactly (e.g. top_k + filters), any hashable value.
+        """
+        q = self._normalize(vector)
+        now = time.monotonic()
+
+        with self._lock:
+            scores = self._vectors @ q
+            for slot in np.argsort(-scores):
+                if scores[slot] < self.threshold:
+                    break
+
+                entry = self._entries[slot]
+                if entry is None or entry["scope"] != scope:
+                    continue
+                if now - entry["stored_at"] >= self.ttl:
+                    self._free(slot)
+                    continue
+
+                entry["last_used"] = now
+                self.hits += 1
+                self.saved_seconds += entry["latency"]
+                return {**entry, "similarity": float(scores[slot])}
+
+            self.misses += 1
+            return None
+
+    def put(self, vector, scope, question, result, latency, generation=None):
+        """
+        generation → self.invalidations read before the answer was computed;
+        if the store changed meanwhile, the (possibly stale) answer is dropped.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if generation is not None and generation != self.invalidations:
+                return
+
+            slot = self._free_slot(now)
+            self._vectors[slot] = self._normalize(vector)
+            self._entries[slot] = {
+                "question": question,
+                "scope": scope,
+                "result": result,
+                "latency": latency,
+                "stored_at": now,
+                "last_used": now,
+            }
+
+    def _free(self, slot):
+        self._entries[slot] = None
+        self._vectors[slot] = 0.0
+
+    def _free_slot(self, now):
+        """First empty / expired slot, else the least recently used one."""
+        lru_slot, lru_time = 0, float("inf")
+        for slot, entry in enumerate(self._entries):
+            if entry is None or now - entry["stored_at"] >= self.ttl:
+                return slot
+            if entry["last_used"] < lru_time:
+                lru_slot, lru_time = slot, entry["last_used"]
+        return lru_slot
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = [None] * self.maxsize
+            self._vectors[:] = 0.0
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": SEMANTIC_CACHE_ENABLED,
+            "size": sum(e is not None for e in self._entries),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "invalidations": self.invalidations,
+        }
+
+
+semantic_cache = SemanticCache(
+    maxsize=int(os.getenv("SEMANTIC_CACHE_SIZE", "1000")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+)
+
+# New / removed chunks can change answers → start over
+on_store_change(lambda store: semantic_cache.invalidate())
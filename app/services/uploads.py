@@ -0,0 +1,68 @@
+"""
+uploads.py
+----------
+Streams uploaded files to disk.
+
+- Copied in fixed-size chunks → constant memory per upload, whatever the file size
+- SHA-256 computed while writing (same digest as ingest_manifest.file_sha256)
+  → duplicates are recognised before any extraction
+- Written under a unique temp name, then renamed to
+  UPLOAD_DIR/<hash prefix>-<filename> → concurrent uploads never overwrite
+  each other, and the same bytes always get the same path (stable source)
+- UPLOAD_MAX_MB enforced while streaming (0 → no limit)
+"""
+
+import hashlib
+import os
+import re
+import uuid
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", "1024")) * 1024 * 1024)
+
+
+class UploadTooLarge(Exception):
+    """Raised (and the partial file removed) once an upload passes the size limit."""
+
+
+def safe_filename(filename):
+    """Client-supplied name → plain file name (no directories), extension kept."""
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    name = re.sub(r"[^\w.\- ]", "_", name).strip(" .")
+    return name or "upload"
+
+
+def save_upload(fileobj, filename, directory=None, max_bytes=None, chunk_size=None):
+    """
+    Copies a readable binary file object to disk.
+    Returns {"path", "sha256", "size"}; raises UploadTooLarge.
+    """
+    directory = directory or UPLOAD_DIR
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+    os.makedirs(directory, exist_ok=True)
+
+    name = safe_filename(filename)
+    part_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    h = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(part_path, "wb") as out:
+            for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLarge(f"{name} exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                h.update(chunk)
+                out.write(chunk)
+
+        digest = h.hexdigest()
+        path = os.path.join(directory, f"{digest[:16]}-{name}")
+        os.replace(part_path, path)   # atomic; same bytes → same path
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return {"path": path, "sha256": digest, "size": size}
@@ -1,5 +1,10 @@
 # vector_db.py (FULLY UPDATED)
 
+import json
+import os
+import time
+
+from langchain_core.documents import Document
 from pymilvus import (
     connections, utility, FieldSchema, CollectionSchema,
     DataType, Collection
@@ -9,6 +14,15 @@ from pymilvus import (
 DEFAULT_DB_NAME = "knowledge_base_vectors"
 VECTOR_DIM = 384   # must match embedding model
 
+# Vector index: HNSW (full floats in RAM) or compressed IVF variants
+#   IVF_SQ8 → 1 byte / dim (4× smaller), IVF_PQ → MILVUS_PQ_M bytes / vector
+# Binary codes + Hamming search are local-store only (LOCAL_VECTOR_INDEX=binary):
+# Milvus BIN_* indexes need a separate BINARY_VECTOR field / collection.
+MILVUS_INDEX_TYPE = os.getenv("MILVUS_INDEX_TYPE", "HNSW").upper()
+MILVUS_IVF_NLIST = int(os.getenv("MILVUS_IVF_NLIST", "1024"))
+MILVUS_IVF_NPROBE = int(os.getenv("MILVUS_IVF_NPROBE", "32"))
+MILVUS_PQ_M = int(os.getenv("MILVUS_PQ_M", "48"))   # must divide the vector dim
+
 
 def connect_to_milvus(host="localhost", port="19530"):
     connections.connect("default", host=host, port=port)
@@ -18,8 +32,9 @@ def connect_to_milvus(host="localhost", port="19530"):
 # ---------------------------------------------------------
 # 1️⃣ Create / Load Collection with full schema support
 # ---------------------------------------------------------
-def init_collection(collection_name=DEFAULT_DB_NAME, vector_dim=VECTOR_DIM):
-    connect_to_milvus()
+def init_collection(collection_name=DEFAULT_DB_NAME, vector_dim=VECTOR_DIM,
+                    host="localhost", port="19530", index_type=None):
+    connect_to_milvus(host, port)
 
     # ─ If exists → load instead of creating new one
     if collection_name in utility.list_collections():
@@ -37,6 +52,8 @@ def init_collection(collection_name=DEFAULT_DB_NAME, vector_dim=VECTOR_DIM):
         FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=300),
         FieldSchema(name="source", dtype=DataType.VARCHAR, max_length=1000),
         FieldSchema(name="chunk_index", dtype=DataType.INT64),
+        FieldSchema(name="ingested_at", dtype=DataType.INT64),   # unix seconds
+        FieldSchema(name="page", dtype=DataType.INT64),          # 1-based PDF page, -1 otherwise
 
         # --- Vector Field ---
         FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=vector_dim),
@@ -45,25 +62,27 @@ def init_collection(collection_name=DEFAULT_DB_NAME, vector_dim=VECTOR_DIM):
     schema = CollectionSchema(fields, description="Multi‑format knowledge embeddings")
 
     collection = Collection(name=collection_name, schema=schema)
-    print("🔨 Creating HNSW (COSINE) index...")
-    collection.create_index(
-            "vector",
-            index_params={
-                "index_type": "HNSW",
-                "metric_type": "COSINE",
-                "params": {"M": 12, "efConstruction": 100}
-            }
-        )
+    index_params = vector_index_params(index_type)
+    print(f"🔨 Creating {index_params['index_type']} (COSINE) index...")
+    collection.create_index("vector", index_params=index_params)
     print("✅ COSINE index ready!")
 
+    create_scalar_indexes(collection)
+
     return collection
 # ---------------------------------------------------------
 # 2️⃣ Insert Documents into Milvus
 # ---------------------------------------------------------
-def insert_documents(collection, split_docs, embeddings):
-    if not split_docs or len(split_docs) != len(embeddings):
-        print("❌ Error: Docs & embeddings count mismatch!")
-        return
+def insert_documents(collection, split_docs, embeddings, flush=True):
+    """
+    flush=False → leave sealing to Milvus / the caller (batched ingestion
+    flushes once at the end instead of once per batch).
+    Raises ValueError when docs and embeddings differ in length.
+    """
+    if len(split_docs) != len(embeddings):
+        raise ValueError(f"Docs & embeddings count mismatch: {len(split_docs)} != {len(embeddings)}")
+    if not split_docs:
+        return None
 
     print(f"📥 Inserting {len(split_docs)} chunks into Milvus...")
 
@@ -74,48 +93,191 @@ def insert_documents(collection, split_docs, embeddings):
     chunk_indices  = [d.metadata["chunk_index"]    for d in split_docs]
     vectors        = embeddings
 
-    collection.insert([
-        texts,
-        types,
-        titles,
-        sources,
-        chunk_indices,
-        vectors
-    ])
+    columns = [texts, types, titles, sources, chunk_indices]
+
+    # Older collections were created without ingested_at
+    if any(f.name == "ingested_at" for f in collection.schema.fields):
+        now = int(time.time())
+        columns.append([d.metadata.get("ingested_at", now) for d in split_docs])
+
+    # ... and without page
+    if any(f.name == "page" for f in collection.schema.fields):
+        columns.append([d.metadata.get("page", -1) for d in split_docs])
+
+    result = collection.insert(columns + [vectors])
 
-    collection.flush()
     print(f"🟩 Successfully inserted {len(split_docs)} vectors.")
-    print("Total stored:", collection.num_entities)
+
+    if flush:
+        collection.flush()
+        print("Total stored:", collection.num_entities)
+
+    return result
 
 
 # ---------------------------------------------------------
-# 3️⃣ Create HNSW Index (Only if Missing)
+# Delete helpers (re-ingestion replaces changed chunks)
 # ---------------------------------------------------------
-def create_index_if_missing(collection, field_name="vector"):
-    found = any(idx.field_name == field_name for idx in collection.indexes)
-
-    if found:
-        print(f"Index already exists on '{field_name}' — OK")
+def delete_by_ids(collection, ids):
+    if not ids:
         return
+    collection.delete(expr=f"id in {list(ids)}")
+    print(f"🗑 Deleted {len(ids)} stale vectors.")
+
+
+def delete_by_source(collection, source, keep_ids=None):
+    # json.dumps → quoted + escaped string literal for the Milvus expression
+    expr = f"source == {json.dumps(source)}"
+    if keep_ids:
+        expr += f" and id not in {[int(i) for i in keep_ids]}"
+    collection.delete(expr=expr)
 
-    print("⚙ Creating HNSW index...")
 
-    collection.create_index(
-        field_name=field_name,
-        index_params={
-            "index_type": "HNSW",
-            "metric_type": "COSINE",
-            "params": {"M": 16, "efConstruction": 200}
+# ---------------------------------------------------------
+# Search helpers (used by vector_store.MilvusVectorStore)
+# ---------------------------------------------------------
+def build_filter_expr(clauses):
+    """
+    [(field, op, value), ...] (see vector_store.check_filters) → Milvus boolean expression
+    e.g. 'type == "pdf" and chunk_index >= 10' (None if empty).
+    json.dumps → quoted + escaped string literals.
+    """
+    if not clauses:
+        return None
+    return " and ".join(f"{field} {op} {json.dumps(value)}" for field, op, value in clauses)
+
+
+def _entity_value(entity, field):
+    # Fields missing from older collections raise on some pymilvus versions
+    try:
+        return entity.get(field)
+    except Exception:
+        return None
+
+
+def hit_to_document(hit):
+    entity = hit.entity
+    return Document(
+        page_content=entity.get("text"),
+        metadata={
+            "id": hit.id,
+            "score": float(hit.distance),   # COSINE → higher is more similar
+            "source": entity.get("source"),
+            "title": entity.get("title"),
+            "type": entity.get("type"),
+            "chunk_index": entity.get("chunk_index"),
+            "ingested_at": _entity_value(entity, "ingested_at"),
+            "page": _entity_value(entity, "page"),
         }
     )
 
+
+# ---------------------------------------------------------
+# 3️⃣ Vector Index (HNSW / IVF_FLAT / IVF_SQ8 / IVF_PQ)
+# ---------------------------------------------------------
+COMPRESSED_INDEX_TYPES = ("IVF_SQ8", "IVF_PQ")
+
+
+def vector_index_params(index_type=None):
+    index_type = (index_type or MILVUS_INDEX_TYPE).upper()
+    params = {
+        "HNSW": {"M": 16, "efConstruction": 200},
+        "IVF_FLAT": {"nlist": MILVUS_IVF_NLIST},
+        "IVF_SQ8": {"nlist": MILVUS_IVF_NLIST},
+        "IVF_PQ": {"nlist": MILVUS_IVF_NLIST, "m": MILVUS_PQ_M, "nbits": 8},
+    }
+    if index_type not in params:
+        raise ValueError(f"Unsupported Milvus index type: {index_type} (expected one of {list(params)})")
+
+    return {"index_type": index_type, "metric_type": "COSINE", "params": params[index_type]}
+
+
+def vector_search_params(index_type, ef=64, nprobe=None):
+    if index_type == "HNSW":
+        return {"metric_type": "COSINE", "params": {"ef": ef}}
+    return {"metric_type": "COSINE", "params": {"nprobe": nprobe or MILVUS_IVF_NPROBE}}
+
+
+def current_index_type(collection, field_name="vector"):
+    for idx in collection.indexes:
+        if idx.field_name == field_name:
+            return idx.params.get("index_type")
+    return None
+
+
+def create_index_if_missing(collection, field_name="vector", index_type=None, rebuild=False):
+    """
+    Builds the vector index if the collection has none. With rebuild=True an
+    index of a different type is dropped and rebuilt (collection is released).
+    """
+    wanted = vector_index_params(index_type)
+    found = current_index_type(collection, field_name)
+
+    if found == wanted["index_type"]:
+        print(f"Index already exists on '{field_name}' — OK")
+        return
+
+    if found is not None:
+        if not rebuild:
+            print(f"⚠ '{field_name}' has a {found} index (wanted {wanted['index_type']}); "
+                  f"set MILVUS_REBUILD_INDEX=true to rebuild it")
+            return
+
+        print(f"♻ Replacing {found} index on '{field_name}'...")
+        collection.release()
+        collection.drop_index(index_name=next(
+            idx.index_name for idx in collection.indexes if idx.field_name == field_name
+        ))
+
+    print(f"⚙ Creating {wanted['index_type']} index...")
+
+    collection.create_index(field_name=field_name, index_params=wanted)
+
     print("🧩 Index Created Successfully!")
 
 
+# ---------------------------------------------------------
+# Scalar indexes → filtered searches don't scan every row
+# ---------------------------------------------------------
+SCALAR_INDEXES = {
+    "type": "INVERTED",         # equality / in
+    "source": "INVERTED",
+    "title": "Trie",            # equality / prefix
+    "chunk_index": "STL_SORT",  # ranges
+    "ingested_at": "STL_SORT",
+    "page": "STL_SORT",
+}
+
+
+def create_scalar_indexes(collection):
+    schema_fields = {f.name for f in collection.schema.fields}
+    indexed = {idx.field_name for idx in collection.indexes}
+    missing = [f for f in SCALAR_INDEXES if f in schema_fields and f not in indexed]
+
+    if not missing:
+        return
+
+    # Milvus refuses new indexes on a loaded collection
+    collection.release()
+
+    for field in missing:
+        try:
+            collection.create_index(
+                field_name=field,
+                index_params={"index_type": SCALAR_INDEXES[field]},
+                index_name=f"{field}_idx"
+            )
+            print(f"🧩 Scalar index ({SCALAR_INDEXES[field]}) created on '{field}'")
+        except Exception as e:
+            # Older Milvus servers lack some scalar index types → filter still works, unindexed
+            print(f"⚠ Could not index '{field}':", e)
+
+
 # ---------------------------------------------------------
 # Quick Constructor Helper for Routers
 # ---------------------------------------------------------
-def setup_vector_db(name=DEFAULT_DB_NAME):
-    collection = init_collection(name)
+def setup_vector_db(name=DEFAULT_DB_NAME, host="localhost", port="19530"):
+    collection = init_collection(name, host=host, port=port)
     create_index_if_missing(collection)
+    create_scalar_indexes(collection)
     return collection
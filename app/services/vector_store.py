@@ -0,0 +1,312 @@
+"""
+vector_store.py
+---------------
+Pluggable vector-store interface + backend selection.
+
+Backends:
+- "milvus" → Milvus server (vector_db.py primitives)
+- "local"  → in-process mmap matrix + flat/HNSW index (local_vector_store.py)
+
+Pick one with VECTOR_BACKEND (default: milvus). Everything above this layer
+(pipeline, Main, rag, api) only talks to the VectorStore methods.
+
+Filters are plain dicts of metadata field → condition:
+- value          → equality           {"type": "pdf"}
+- list of values → membership         {"source": ["a.pdf", "b.pdf"]}
+- range dict     → gt / gte / lt / lte {"chunk_index": {"gte": 10, "lt": 20}}
+ingested_at is unix seconds (ISO-8601 strings are accepted too).
+page is the 1-based PDF page (-1 for sources without pages).
+"""
+
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+VECTOR_DIM = 384   # must match embedding model
+DEFAULT_COLLECTION = "knowledge_base_vectors"
+STRING_FIELDS = ("type", "source", "title")
+NUMERIC_FIELDS = ("chunk_index", "ingested_at", "page")
+FILTER_FIELDS = STRING_FIELDS + NUMERIC_FIELDS
+OUTPUT_FIELDS = ["text", "source", "title", "type", "chunk_index", "ingested_at", "page"]
+RANGE_OPS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+_change_listeners = []
+
+
+def on_store_change(listener):
+    """Register listener(store), called after every insert / delete / drop."""
+    _change_listeners.append(listener)
+
+
+def notify_store_change(store):
+    for listener in _change_listeners:
+        listener(store)
+
+
+class VectorStore:
+    """Interface every backend implements."""
+
+    backend = "base"
+    name = ""
+    lexical = None   # LexicalIndex kept in sync by the backend (hybrid search), see lexical_index.py
+
+    def insert(self, docs, embeddings, flush=True):
+        """
+        Store LangChain Documents + their vectors → list of new ids (one per doc).
+        Raises ValueError when docs and embeddings differ in length.
+        """
+        raise NotImplementedError
+
+    def search(self, vector, k=5, filters=None):
+        """Top-k most similar chunks → list of Documents (metadata has id + score)."""
+        raise NotImplementedError
+
+    def search_batch(self, vectors, k=5, filters=None):
+        """One result list per query vector (backends override with a single round trip)."""
+        return [self.search(v, k=k, filters=filters) for v in vectors]
+
+    def query(self, filters=None, limit=100):
+        """Stored chunks matching filters (no vector search) → list of dicts."""
+        raise NotImplementedError
+
+    def delete_ids(self, ids):
+        raise NotImplementedError
+
+    def delete_source(self, source, keep_ids=None):
+        """Removes every vector of source, except keep_ids."""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def flush(self):
+        """Make inserts / deletes durable."""
+
+    def load(self):
+        """Make the store searchable (no-op for in-process backends)."""
+
+    def drop(self):
+        """Delete everything, including the store itself."""
+        raise NotImplementedError
+
+    @property
+    def manifest_namespace(self):
+        """Ingest fingerprints are kept per backend + store name."""
+        return f"{self.backend}-{os.path.basename(str(self.name).rstrip('/'))}"
+
+
+def _filter_value(field, value):
+    if field == "ingested_at" and isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value).timestamp())
+        except ValueError:
+            raise ValueError(f"ingested_at: not an ISO-8601 timestamp: {value!r}")
+
+    expected = str if field in STRING_FIELDS else (int, float)
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError(f"{field}: unsupported filter value {value!r}")
+    return value
+
+
+def check_filters(filters):
+    """
+    Validates a filter dict → list of (field, op, value) clauses, op in
+    "==", "in", ">", ">=", "<", "<=". Raises ValueError on anything else.
+    """
+    unknown = set(filters or {}) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unsupported filter fields: {sorted(unknown)}")
+
+    clauses = []
+    for field, condition in (filters or {}).items():
+        if isinstance(condition, (list, tuple)):
+            if not condition:
+                raise ValueError(f"{field}: empty value list")
+            clauses.append((field, "in", [_filter_value(field, v) for v in condition]))
+
+        elif isinstance(condition, dict):
+            if field not in NUMERIC_FIELDS:
+                raise ValueError(f"{field}: range filters need a numeric field")
+            if not condition or set(condition) - set(RANGE_OPS):
+                raise ValueError(f"{field}: range keys must be among {sorted(RANGE_OPS)}")
+            for op, value in condition.items():
+                clauses.append((field, RANGE_OPS[op], _filter_value(field, value)))
+
+        else:
+            clauses.append((field, "==", _filter_value(field, condition)))
+
+    return clauses
+
+
+# ---------------------------------------------------------
+# Milvus backend
+# ---------------------------------------------------------
+class MilvusVectorStore(VectorStore):
+    backend = "milvus"
+
+    def __init__(self, collection_name=DEFAULT_COLLECTION, host=None, port=None,
+                 dim=VECTOR_DIM, ef=64, index_type=None, nprobe=None, rescore_factor=None):
+        """
+        index_type     → HNSW | IVF_FLAT | IVF_SQ8 | IVF_PQ (default MILVUS_INDEX_TYPE)
+        rescore_factor → compressed indexes fetch k × factor candidates and re-rank
+                         them on the stored float vectors (default MILVUS_RESCORE_FACTOR,
+                         1 = off). Opt-in: returning the raw "vector" field makes Milvus
+                         read the float data the compressed index exists to avoid, so it
+                         trades the memory / IO savings back for recall.
+        """
+        from app.services import vector_db
+
+        self._db = vector_db
+        self.name = collection_name
+        self.collection = vector_db.init_collection(
+            collection_name, dim,
+            host=host or os.getenv("MILVUS_HOST", "localhost"),
+            port=port or os.getenv("MILVUS_PORT", "19530"),
+            index_type=index_type,
+        )
+        vector_db.create_index_if_missing(
+            self.collection, index_type=index_type,
+            rebuild=os.getenv("MILVUS_REBUILD_INDEX", "false").lower() == "true"
+        )
+        vector_db.create_scalar_indexes(self.collection)
+        self.collection.load()
+
+        # Search with whatever index the collection actually has
+        self.index_type = vector_db.current_index_type(self.collection) or "HNSW"
+        self.search_params = vector_db.vector_search_params(self.index_type, ef=ef, nprobe=nprobe)
+        if rescore_factor is None:
+            rescore_factor = int(os.getenv("MILVUS_RESCORE_FACTOR", "1"))
+        self.rescore_factor = rescore_factor if self.index_type in vector_db.COMPRESSED_INDEX_TYPES else 1
+
+        # Collections created before ingested_at / page existed simply lack them
+        schema_fields = {f.name for f in self.collection.schema.fields}
+        self.output_fields = [f for f in OUTPUT_FIELDS if f in schema_fields]
+        self.filter_fields = [f for f in FILTER_FIELDS if f in schema_fields]
+
+    def _filter_expr(self, filters):
+        clauses = check_filters(filters)
+        missing = {field for field, _, _ in clauses} - set(self.filter_fields)
+        if missing:
+            raise ValueError(f"Collection '{self.name}' has no field(s) {sorted(missing)} "
+                             f"(created before they were added)")
+        return self._db.build_filter_expr(clauses)
+
+    def insert(self, docs, embeddings, flush=True):
+        result = self._db.insert_documents(self.collection, docs, embeddings, flush=flush)
+        ids = list(result.primary_keys) if result is not None else []
+        if len(ids) != len(docs):
+            raise RuntimeError(f"Milvus returned {len(ids)} ids for {len(docs)} chunks")
+
+        if self.lexical is not None and ids:
+            self.lexical.add(ids, docs, ingested_at=int(time.time()))
+
+        notify_store_change(self)
+        return ids
+
+    def search(self, vector, k=5, filters=None):
+        return self.search_batch([vector], k=k, filters=filters)[0]
+
+    def search_batch(self, vectors, k=5, filters=None):
+        """All query vectors in one Milvus search request."""
+        rescore = self.rescore_factor > 1
+        results = self.collection.search(
+            data=[list(map(float, v)) for v in vectors],
+            anns_field="vector",
+            param=self.search_params,
+            limit=k * self.rescore_factor,
+            expr=self._filter_expr(filters),   # evaluated against the scalar indexes
+            output_fields=self.output_fields + (["vector"] if rescore else []),
+        )
+
+        if not rescore:
+            return [[self._db.hit_to_document(hit) for hit in hits] for hits in results]
+        return [self._rescore(vector, hits, k) for vector, hits in zip(vectors, results)]
+
+    def _rescore(self, vector, hits, k):
+        """Compressed-index shortlist → exact cosine on the stored float vectors → top k."""
+        hits = list(hits)
+        if not hits:
+            return []
+
+        q = np.asarray(vector, dtype=np.float32)
+        stored = np.array([hit.entity.get("vector") for hit in hits], dtype=np.float32)
+        exact = stored @ q / np.maximum(np.linalg.norm(stored, axis=1) * np.linalg.norm(q), 1e-12)
+
+        docs = []
+        for i in np.argsort(-exact)[:k]:
+            doc = self._db.hit_to_document(hits[i])
+            doc.metadata["score"] = float(exact[i])
+            docs.append(doc)
+        return docs
+
+    def query(self, filters=None, limit=100):
+        return self.collection.query(
+            expr=self._filter_expr(filters) or "id >= 0",
+            output_fields=self.output_fields,
+            limit=limit
+        )
+
+    def delete_ids(self, ids):
+        self._db.delete_by_ids(self.collection, ids)
+        if self.lexical is not None:
+            self.lexical.delete_ids(ids)
+        notify_store_change(self)
+
+    def delete_source(self, source, keep_ids=None):
+        self._db.delete_by_source(self.collection, source, keep_ids)
+        if self.lexical is not None:
+            self.lexical.delete_source(source, keep_ids)
+        notify_store_change(self)
+
+    def count(self):
+        return self.collection.num_entities
+
+    def flush(self):
+        self.collection.flush()
+
+    def load(self):
+        self.collection.load()
+
+    def drop(self):
+        from pymilvus import utility
+
+        self.collection.release()
+        utility.drop_collection(self.name)
+        if self.lexical is not None:
+            self.lexical.clear()
+        notify_store_change(self)
+
+
+# ---------------------------------------------------------
+# Factory
+# ---------------------------------------------------------
+def init_vector_store(backend=None, collection_name=DEFAULT_COLLECTION, **options):
+    """
+    backend → "milvus" | "local" (default: VECTOR_BACKEND env, else milvus)
+    options → passed to the backend constructor (host/port, path/dtype/index, ...)
+
+    A BM25 keyword index is attached unless LEXICAL_INDEX=false (needed for hybrid search).
+    """
+    backend = (backend or os.getenv("VECTOR_BACKEND", "milvus")).lower()
+
+    if backend == "milvus":
+        store = MilvusVectorStore(collection_name, **options)
+    elif backend == "local":
+        from app.services.local_vector_store import LocalVectorStore
+
+        options.setdefault(
+            "path", os.path.join(os.getenv("LOCAL_VECTOR_DIR", "data/vectors"), collection_name)
+        )
+        store = LocalVectorStore(**options)
+    else:
+        raise ValueError(f"Unknown vector backend: {backend}")
+
+    if os.getenv("LEXICAL_INDEX", "true").lower() == "true":
+        from app.services.lexical_index import open_lexical_index
+
+        store.lexical = open_lexical_index(store)
+
+    print(f"✅ Vector store ready → {store.backend}:{store.name} ({store.count()} vectors)")
+    return store
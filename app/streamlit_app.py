@@ -1,8 +1,79 @@
+import json
+import time
+
 import streamlit as st
 import requests
 
 API_URL = "http://127.0.0.1:8000"
 
+
+def wait_for_job(job_id, label):
+    """Poll GET /jobs/{id} until the ingestion job finishes, showing progress."""
+    status_box = st.empty()
+    bar = st.progress(0.0)
+
+    while True:
+        job = requests.get(f"{API_URL}/jobs/{job_id}").json()
+        progress = job.get("progress", {})
+        embedded = progress.get("embedded", 0)
+        inserted = progress.get("inserted", 0)
+
+        status_box.write(
+            f"{label}: **{job.get('status')}** — "
+            f"{progress.get('extracted', 0)} extracted · {embedded} embedded · {inserted} inserted"
+        )
+        bar.progress(min(inserted / embedded, 1.0) if embedded else 0.0)
+
+        if job.get("status") in ("done", "failed", "cancelled"):
+            bar.progress(1.0)
+            return job
+
+        time.sleep(1)
+
+
+def iter_sse(response):
+    """Parse a text/event-stream response → (event, data) pairs."""
+    event, data = "message", []
+
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+def stream_query(question, placeholder):
+    """Call /query/stream, rendering the answer into `placeholder` token by token."""
+    result = {"answer": "", "evaluation_status": "skipped"}
+
+    try:
+        with requests.post(
+            f"{API_URL}/query/stream",
+            json={"question": question, "top_k": 4},
+            stream=True
+        ) as response:
+            for event, data in iter_sse(response):
+                if event == "docs":
+                    result["query_id"] = data["query_id"]
+                elif event == "token":
+                    result["answer"] += data
+                    placeholder.markdown(result["answer"] + "▌")
+                elif event == "evaluation":
+                    result["evaluation_status"] = data["status"]
+                    result["evaluation_score"] = data.get("rag_score")
+                elif event == "error":
+                    st.error(f"Backend error: {data.get('detail')}")
+    except Exception as e:
+        st.error(f"Error contacting backend: {e}")
+        return {}
+
+    placeholder.markdown(result["answer"] or "No answer returned")
+    return result
+
 st.set_page_config(page_title="RAG App", layout="wide")
 
 left, right = st.columns([1, 2])
@@ -31,9 +102,17 @@ with left:
                 st.error(f"Error uploading file: {e}")
                 resp_json = None
 
-        if resp_json:
-            st.success(f"File indexed ✔ — {resp_json.get('chunks_indexed', 0)} chunks added")
-            st.json(resp_json)
+        if resp_json and resp_json.get("job_id"):
+            job = wait_for_job(resp_json["job_id"], uploaded_file.name)
+            if job.get("status") == "done":
+                st.success(f"File indexed ✔ — {job['result'].get('chunks_indexed', 0)} chunks added")
+            else:
+                st.error(f"Indexing {job.get('status')}: {job.get('error')}")
+            st.json(job)
+        elif resp_json and resp_json.get("status") == "duplicate":
+            st.info(f"Already indexed ✔ — same content as {resp_json.get('source')}, nothing to do")
+        elif resp_json:
+            st.error(resp_json.get("detail", "Upload rejected"))
 
     url = st.text_input("Enter URL here")
 
@@ -49,9 +128,15 @@ with left:
                 st.error(f"Error loading URL: {e}")
                 resp_json = None
 
-        if resp_json:
-            st.success(f"URL indexed ✔ — {resp_json.get('chunks_indexed', 0)} chunks added")
-            st.json(resp_json)
+        if resp_json and resp_json.get("job_id"):
+            job = wait_for_job(resp_json["job_id"], url)
+            if job.get("status") == "done":
+                st.success(f"URL indexed ✔ — {job['result'].get('chunks_indexed', 0)} chunks added")
+            else:
+                st.error(f"Indexing {job.get('status')}: {job.get('error')}")
+            st.json(job)
+        elif resp_json:
+            st.error(resp_json.get("detail", "URL rejected"))
 
 
 # ============================================
@@ -63,27 +148,49 @@ with right:
 
     question = st.text_input("Ask a Question")
 
-    if st.button("Get RAG Answer") and question.strip():
-        with st.spinner("Searching + Generating..."):
-            try:
-                response = requests.post(
-                    f"{API_URL}/query",
-                    json={"question": question, "top_k": 4}
-                )
-                result = response.json()
-            except Exception as e:
-                st.error(f"Error contacting backend: {e}")
-                result = {}
+    stream_answer = st.checkbox("Stream answer", value=True)
 
-        if result:
+    if st.button("Get RAG Answer") and question.strip():
+        if stream_answer:
             st.subheader("Answer")
-            st.write(result.get("answer", "No answer returned"))
+            result = stream_query(question, st.empty())
+        else:
+            with st.spinner("Searching + Generating..."):
+                try:
+                    response = requests.post(
+                        f"{API_URL}/query",
+                        json={"question": question, "top_k": 4}
+                    )
+                    result = response.json()
+                except Exception as e:
+                    st.error(f"Error contacting backend: {e}")
+                    result = {}
+
+            if result:
+                st.subheader("Answer")
+                st.write(result.get("answer", "No answer returned"))
 
+        if result:
             # === Evaluation Score ===
             score = result.get("evaluation_score", None)
+            eval_status = result.get("evaluation_status")
+
+            # Background evaluation → give it a few seconds, then show what we have
+            if score is None and eval_status == "pending":
+                for _ in range(10):
+                    time.sleep(1)
+                    evaluation = requests.get(f"{API_URL}/evaluations/{result['query_id']}").json()
+                    if evaluation.get("status") == "done":
+                        score = evaluation["scores"]["rag_score"]
+                        break
+
             if score is not None:
                 st.subheader("RAG Evaluation Score")
                 st.write(f"**{score:.2f}%**")
                 st.progress(min(max(score / 100, 0), 1))
+            elif eval_status == "pending":
+                st.info(f"Evaluation still running — see /evaluations/{result['query_id']}")
+            elif eval_status == "skipped":
+                st.caption("Evaluation skipped for this query.")
             else:
                 st.warning("Backend did not return 'evaluation_score'.")
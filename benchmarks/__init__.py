@@ -0,0 +1,12 @@
+"""
+benchmarks
+----------
+Offline performance harness (no Milvus, no hosted LLM needed).
+
+- run.py              → ingest / embed / query / load scenarios → results JSON
+- compare.py          → diff two result files, flag regressions
+- corpora.py          → synthetic txt / pdf / docx / html fixtures
+- fake_llm.py         → OpenAI-compatible stand-in with configurable latency
+- compare_indexes.py  → vector index recall / latency / memory
+- embedding_parity.py → embedding backend parity + throughput
+"""
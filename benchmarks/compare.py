@@ -0,0 +1,78 @@
+"""
+compare.py
+----------
+Diff two benchmark result files (from run.py) and flag regressions.
+
+- *_per_second → higher is better;  *_ms → lower is better
+- A change worse than --threshold percent is a regression → exit code 1
+
+Usage:
+    python -m benchmarks.compare old.json new.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def direction(metric):
+    """+1 higher is better, -1 lower is better, 0 not a performance metric."""
+    if metric.endswith("_per_second"):
+        return 1
+    if metric.endswith("_ms"):
+        return -1
+    return 0
+
+
+def compare(old, new, threshold):
+    old_flat, new_flat = flatten(old["scenarios"]), flatten(new["scenarios"])
+    rows = []
+
+    for metric in sorted(old_flat.keys() & new_flat.keys()):
+        sign = direction(metric)
+        before, after = old_flat[metric], new_flat[metric]
+        if not sign or not before:
+            continue
+
+        change = (after - before) / before * 100
+        rows.append({"metric": metric, "old": before, "new": after, "change_pct": round(change, 1),
+                     "regression": sign * change < -threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    print(f"📊 {(old.get('commit') or '?')[:10]} → {(new.get('commit') or '?')[:10]}")
+    rows = compare(old, new, args.threshold)
+    for row in rows:
+        flag = "❌" if row["regression"] else "  "
+        print(f"{flag} {row['metric']:<40} {row['old']:>12} → {row['new']:>12}  ({row['change_pct']:+.1f}%)")
+
+    regressions = [r for r in rows if r["regression"]]
+    print(f"{'❌' if regressions else '✅'} {len(regressions)} regression(s) beyond {args.threshold}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+compare_indexes.py
+------------------
+Recall / latency / memory comparison of vector index settings.
+
+- Local backend:  flat, hnsw, sq8, binary (+ float32 / float16 storage)
+- Milvus backend: HNSW, IVF_FLAT, IVF_SQ8, IVF_PQ (needs a running server);
+  binary / Hamming is local-only. --rescore N turns on float rescoring for
+  the compressed indexes (MILVUS_RESCORE_FACTOR)
+- Memory: local → file sizes; Milvus → loaded segment memory reported by the
+  query nodes (measured) next to a formula estimate of the index alone
+- Ground truth: exact cosine top-k over the same float32 vectors
+- Corpus: clustered synthetic vectors, or real chunks (--texts, one per line)
+  embedded with the configured embedding model
+
+Usage:
+    python -m benchmarks.compare_indexes --n 100000 --indexes flat,sq8,binary
+    python -m benchmarks.compare_indexes --backend milvus --indexes HNSW,IVF_SQ8,IVF_PQ
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+INSERT_BATCH = 10000
+
+
+# ---------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------
+def normalize(x):
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def synthetic_vectors(n, n_queries, dim, clusters=256, seed=0):
+    """Gaussian clusters (embeddings are clustered, uniform noise is not)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+
+    def sample(count):
+        points = centers[rng.integers(0, clusters, count)]
+        return normalize(points + 1.0 * rng.standard_normal((count, dim)).astype(np.float32))
+
+    return sample(n), sample(n_queries)
+
+
+def text_vectors(path, n_queries, seed=0):
+    from app.services.Embeddings import embed_documents
+
+    with open(path, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+
+    vectors = normalize(np.asarray(embed_documents(texts), dtype=np.float32))
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), n_queries, replace=False)]
+    return vectors, normalize(queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32))
+
+
+def ground_truth(vectors, queries, k):
+    truth = []
+    for q in queries:
+        scores = vectors @ q
+        top = np.argpartition(-scores, k - 1)[:k]
+        truth.append(set(top[np.argsort(-scores[top])].tolist()))
+    return truth
+
+
+# ---------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------
+def fill(store, vectors):
+    started = time.perf_counter()
+    ids = []
+    for start in range(0, len(vectors), INSERT_BATCH):
+        batch = vectors[start:start + INSERT_BATCH]
+        docs = [Document(page_content="", metadata={"source": "bench", "chunk_index": start + i})
+                for i in range(len(batch))]
+        ids.extend(store.insert(docs, batch, flush=False))
+    store.flush()
+    store.load()
+    return ids, time.perf_counter() - started
+
+
+def measure(store, ids, queries, truth, k):
+    position = {int(vid): row for row, vid in enumerate(ids)}   # store id → corpus row
+
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        started = time.perf_counter()
+        docs = store.search(q, k=k)
+        latencies.append(time.perf_counter() - started)
+        found = {position[int(d.metadata["id"])] for d in docs}
+        recalls.append(len(found & expected) / k)
+
+    started = time.perf_counter()
+    store.search_batch(queries, k=k)
+    batch_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+        "batch_qps": round(len(queries) / batch_seconds, 1),
+    }
+
+
+def local_memory(store, n):
+    """Bytes per vector the search scans (RAM-resident) vs. everything on disk."""
+    files = {name: os.path.getsize(os.path.join(store.path, name)) for name in os.listdir(store.path)}
+
+    if store.index_type in ("sq8", "binary"):
+        scanned = store._codes.shape[1] * store._codes.itemsize
+    else:
+        scanned = store.dim * store.dtype.itemsize
+        if store.index_type == "hnsw":
+            scanned += files.get("index.hnsw", 0) / n
+
+    return {"scanned_bytes_per_vector": round(scanned, 1),
+            "disk_bytes_per_vector": round(sum(files.values()) / n, 1)}
+
+
+def milvus_memory(store, n, dim, m=16):
+    """
+    measured  → loaded segment memory of the collection (query node segment
+                info: index + any raw field data kept in memory), per vector
+    estimated → formula for the vector index alone, NOT a measurement
+    """
+    from pymilvus import utility
+    from app.services.vector_db import MILVUS_PQ_M
+
+    segments = utility.get_query_segment_info(store.name)
+    measured = sum(seg.mem_size for seg in segments)
+
+    estimate = {
+        "HNSW": dim * 4 + m * 2 * 4,
+        "IVF_FLAT": dim * 4,
+        "IVF_SQ8": dim,
+        "IVF_PQ": MILVUS_PQ_M,
+    }[store.index_type]
+    return {"measured_loaded_bytes_per_vector": round(measured / n, 1) if measured else None,
+            "estimated_index_bytes_per_vector": estimate}
+
+
+# ---------------------------------------------------------
+# Runs
+# ---------------------------------------------------------
+def run_local(index, dtype, vectors, queries, truth, k):
+    from app.services.local_vector_store import LocalVectorStore
+
+    path = tempfile.mkdtemp(prefix=f"bench-{index}-")
+    try:
+        store = LocalVectorStore(path, dim=vectors.shape[1], dtype=dtype, index=index)
+        ids, build_seconds = fill(store, vectors)
+        return {"backend": "local", "index": index, "dtype": dtype,
+                "build_seconds": round(build_seconds, 2),
+                **measure(store, ids, queries, truth, k), **local_memory(store, len(vectors))}
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def run_milvus(index, vectors, queries, truth, k, rescore_factor=None):
+    from app.services.vector_store import MilvusVectorStore
+
+    store = MilvusVectorStore(f"bench_{index.lower()}", dim=vectors.shape[1], index_type=index,
+                              rescore_factor=rescore_factor)
+    try:
+        ids, build_seconds = fill(store, vectors)
+        return {"backend": "milvus", "index": index, "rescore_factor": store.rescore_factor,
+                "build_seconds": round(build_seconds, 2),
+                **measure(store, ids, queries, truth, k), **milvus_memory(store, *vectors.shape)}
+    finally:
+        store.drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["local", "milvus"], default="local")
+    parser.add_argument("--indexes", default=None,
+                        help="comma-separated (default: all for the backend)")
+    parser.add_argument("--dtypes", default="float32", help="local storage dtypes, e.g. float32,float16")
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--texts", help="embed these lines instead of synthetic vectors")
+    parser.add_argument("--rescore", type=int, default=None,
+                        help="Milvus compressed indexes: k × N candidates re-ranked on float vectors")
+    parser.add_argument("--out", default="benchmarks/results/compare_indexes.json")
+    args = parser.parse_args()
+
+    if args.texts:
+        vectors, queries = text_vectors(args.texts, args.queries)
+    else:
+        vectors, queries = synthetic_vectors(args.n, args.queries, args.dim)
+    print(f"📊 {len(vectors)} vectors × {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+    truth = ground_truth(vectors, queries, args.k)
+
+    results = []
+    if args.backend == "local":
+        for index in (args.indexes or "flat,hnsw,sq8,binary").split(","):
+            for dtype in args.dtypes.split(","):
+                results.append(run_local(index, dtype, vectors, queries, truth, args.k))
+                print(json.dumps(results[-1]))
+    else:
+        for index in (args.indexes or "HNSW,IVF_FLAT,IVF_SQ8,IVF_PQ").split(","):
+            results.append(run_milvus(index.upper(), vectors, queries, truth, args.k, args.rescore))
+            print(json.dumps(results[-1]))
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump({"vectors": len(vectors), "dim": int(vectors.shape[1]), "queries": len(queries),
+                   "k": args.k, "results": results}, f, indent=2)
+    print(f"✅ Results written → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
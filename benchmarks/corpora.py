@@ -0,0 +1,194 @@
+"""
+corpora.py
+----------
+Deterministic synthetic corpora for the benchmarks (same seed → same bytes).
+
+- Text is sampled from a fixed topic vocabulary, so retrieval has something
+  to find: every document is about one topic, every question names one
+- Fixtures are written without extra dependencies:
+    txt  → paragraphs separated by blank lines
+    pdf  → minimal PDF 1.4 (Helvetica text objects, one content stream per page)
+    docx → minimal WordprocessingML package (one <w:p> per paragraph)
+    html → <title> + <p> paragraphs (served over HTTP by fake_llm.py)
+"""
+
+import json
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+FORMATS = ("txt", "pdf", "docx", "html")
+
+TOPICS = {
+    "vector": "index embedding vector cosine neighbour recall quantization cluster graph layer",
+    "ingest": "upload parse chunk overlap extract pipeline batch flush manifest hash",
+    "cache": "cache hit miss eviction ttl scope invalidate lookup threshold entry",
+    "llm": "prompt token completion stream latency retry deadline model answer context",
+    "search": "keyword bm25 fusion rank rerank filter hybrid query score candidate",
+    "storage": "disk mmap sqlite page column row segment compaction snapshot replica",
+}
+FILLER = "the a of to and in for with on by from is are was this that each every".split()
+
+
+# ---------------------------------------------------------
+# Text
+# ---------------------------------------------------------
+def sentence(rng, topic, words=14):
+    vocab = TOPICS[topic].split()
+    tokens = [rng.choice(vocab) if rng.random() < 0.45 else rng.choice(FILLER) for _ in range(words)]
+    return " ".join(tokens).capitalize() + "."
+
+
+def paragraph(rng, topic, sentences=5):
+    return " ".join(sentence(rng, topic) for _ in range(sentences))
+
+
+def document(rng, topic, paragraphs):
+    return [paragraph(rng, topic) for _ in range(paragraphs)]
+
+
+def questions(n, seed=1):
+    """Questions phrased over the topic vocabulary (distinct, so the semantic cache rarely hits)."""
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    result = []
+    for i in range(n):
+        vocab = TOPICS[topics[i % len(topics)]].split()
+        result.append(f"How does {' '.join(rng.sample(vocab, 3))} work in case {i}?")
+    return result
+
+
+# ---------------------------------------------------------
+# Writers
+# ---------------------------------------------------------
+def write_txt(path, title, paragraphs):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(title + "\n\n" + "\n\n".join(paragraphs) + "\n")
+
+
+def write_html(path, title, paragraphs):
+    body = "\n".join(f"<p>{escape(p)}</p>" for p in paragraphs)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<html><head><title>{escape(title)}</title></head><body>\n{body}\n</body></html>\n")
+
+
+def _wrap(text, width=90):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    return lines + ([line] if line else [])
+
+
+def _pdf_string(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, title, paragraphs, lines_per_page=48):
+    lines = [title, ""]
+    for p in paragraphs:
+        lines += _wrap(p) + [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    # 1 catalog, 2 page tree, 3 font, then (page, content) per page
+    objects = {3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for n, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        kids.append(f"{page_id} 0 R")
+        shown = "\n".join(f"({_pdf_string(line)}) '" for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 800 Td\n{shown}\nET".encode("latin-1", "replace")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode()
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id])
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offsets[i] for i in sorted(objects))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+
+def write_docx(path, title, paragraphs):
+    body = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(p)}</w:t></w:r></w:p>"
+                   for p in [title] + paragraphs)
+    document_xml = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                    f"<w:body>{body}</w:body></w:document>")
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        z.writestr("_rels/.rels", DOCX_RELS)
+        z.writestr("word/document.xml", document_xml)
+
+
+WRITERS = {"txt": write_txt, "pdf": write_pdf, "docx": write_docx, "html": write_html}
+
+
+# ---------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------
+def generate_corpus(out_dir, docs=40, paragraphs=12, formats=FORMATS, seed=0):
+    """
+    Writes docs fixtures (round-robin over formats) into out_dir.
+    Returns the manifest: [{"path", "format", "topic", "paragraphs", "bytes"}].
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    manifest = []
+
+    for i in range(docs):
+        fmt = formats[i % len(formats)]
+        topic = topics[i % len(topics)]
+        path = os.path.join(out_dir, f"doc_{i:04d}.{fmt}")
+
+        WRITERS[fmt](path, f"{topic.title()} notes {i}", document(rng, topic, paragraphs))
+        manifest.append({"path": path, "format": fmt, "topic": topic,
+                         "paragraphs": paragraphs, "bytes": os.path.getsize(path)})
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump({"seed": seed, "docs": manifest}, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--paragraphs", type=int, default=12)
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    written = generate_corpus(args.out_dir, args.docs, args.paragraphs, tuple(args.formats.split(",")), args.seed)
+    print(f"✅ {len(written)} fixtures written → {args.out_dir}")
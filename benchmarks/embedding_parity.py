@@ -0,0 +1,139 @@
+"""
+embedding_parity.py
+-------------------
+Parity + throughput of the embedding backends on CPU.
+
+- Backends: torch (reference), onnx, onnx-int8
+- Parity: cosine between each backend's vector and the torch vector of the
+  same text, and top-k neighbour overlap when searching the corpus
+- Throughput: texts/sec for every backend × intra-op thread count
+- Corpus: --texts (one chunk per line), else built-in sample sentences
+
+Usage:
+    python -m benchmarks.embedding_parity --texts chunks.txt --threads 1,2,4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_TEXTS = [
+    "Milvus stores the chunk embeddings in an HNSW index.",
+    "The semantic cache returns a stored answer for near-duplicate questions.",
+    "Reciprocal rank fusion combines the BM25 and vector rankings.",
+    "Scanned PDF pages need OCR before they can be chunked.",
+    "The cross-encoder rescoring step has a strict latency budget.",
+    "Uploads are hashed while streaming so duplicates are skipped.",
+    "Context packing merges adjacent chunks and drops the overlap.",
+    "Dynamic int8 quantization shrinks the linear layers of the encoder.",
+]
+
+BACKENDS = {
+    "torch": ("torch", "none"),
+    "onnx": ("onnx", "none"),
+    "onnx-int8": ("onnx", "int8"),
+}
+
+
+def load_texts(path, n):
+    if not path:
+        return (SAMPLE_TEXTS * (n // len(SAMPLE_TEXTS) + 1))[:n]
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()][:n]
+
+
+def load_model(name, backend, quantize, threads):
+    """Fresh model (not the shared registry copy) so each thread count gets its own session."""
+    from sentence_transformers import SentenceTransformer
+    from app.services.model_registry import _load_onnx_model
+
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+        return SentenceTransformer(name, device="cpu")
+    return _load_onnx_model(name, quantize, threads)
+
+
+def encode(model, texts, batch_size):
+    return np.asarray(model.encode(texts, batch_size=batch_size, normalize_embeddings=True),
+                      dtype=np.float32)
+
+
+def throughput(model, texts, batch_size, repeats=3):
+    encode(model, texts[:batch_size], batch_size)   # first-call setup not timed
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        encode(model, texts, batch_size)
+        best = min(best, time.perf_counter() - started)
+    return round(len(texts) / best, 1)
+
+
+def parity(reference, vectors, k):
+    cosines = np.sum(reference * vectors, axis=1)
+
+    k = min(k, len(reference) - 1)
+    overlaps = []
+    for q in range(len(reference)):
+        expected = set(np.argsort(-(reference @ reference[q]))[1:k + 1].tolist())
+        found = set(np.argsort(-(vectors @ vectors[q]))[1:k + 1].tolist())
+        overlaps.append(len(expected & found) / k)
+
+    return {
+        "cosine_mean": round(float(cosines.mean()), 6),
+        "cosine_min": round(float(cosines.min()), 6),
+        f"top{k}_overlap": round(float(np.mean(overlaps)), 4),
+    }
+
+
+def main():
+    from app.services.model_registry import default_model_name, normalize_model_name
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--threads", default=str(os.cpu_count() or 1), help="comma-separated, e.g. 1,2,4")
+    parser.add_argument("--texts", help="one chunk per line (default: sample sentences)")
+    parser.add_argument("--n", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", default="benchmarks/results/embedding_parity.json")
+    args = parser.parse_args()
+
+    name = normalize_model_name(args.model or default_model_name())
+    texts = load_texts(args.texts, args.n)
+    threads = [int(t) for t in args.threads.split(",")]
+    print(f"📊 {name}: {len(texts)} texts, batch {args.batch_size}, threads {threads}")
+
+    unique = sorted({text: i for i, text in reversed(list(enumerate(texts)))}.values())   # neighbours need distinct texts
+    reference = encode(load_model(name, "torch", "none", threads[0]), texts, args.batch_size)
+    results = []
+
+    for label in args.backends.split(","):
+        backend, quantize = BACKENDS[label]
+        for count in threads:
+            model = load_model(name, backend, quantize, count)
+            vectors = encode(model, texts, args.batch_size)
+            if vectors.shape[1] != reference.shape[1]:
+                raise ValueError(f"{label} produced {vectors.shape[1]} dims, expected {reference.shape[1]}")
+
+            results.append({"backend": label, "threads": count, "dim": int(vectors.shape[1]),
+                            "texts_per_second": throughput(model, texts, args.batch_size),
+                            **parity(reference[unique], vectors[unique], args.k)})
+            print(json.dumps(results[-1]))
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump({"model": name, "texts": len(texts), "batch_size": args.batch_size,
+                   "results": results}, f, indent=2)
+    print(f"✅ Results written → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
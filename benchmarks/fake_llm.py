@@ -0,0 +1,191 @@
+"""
+fake_llm.py
+-----------
+OpenAI-compatible stand-in for the LLM endpoint (stdlib only).
+
+- POST /v1/chat/completions → canned answer after a configurable latency
+  (latency_ms ± jitter_ms; streams send one delta every token_ms)
+- Faithfulness prompts ("Return ONLY a floating number") get a number back,
+  so evaluation runs end to end
+- GET /v1/models, GET /fixtures/<file> (serves a directory, e.g. the HTML
+  fixtures for URL ingestion)
+
+Point the app at it with LLM_BASE_URL=http://127.0.0.1:<port>/v1
+
+Usage:
+    python -m benchmarks.fake_llm --port 8088 --latency-ms 400
+"""
+
+import json
+import mimetypes
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER_WORDS = ("Based on the context the system indexes chunk embeddings and answers "
+                "from the retrieved passages with a bounded latency budget").split()
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real endpoint
+
+    def log_message(self, *args):
+        pass
+
+    # ----------------------------------------------------
+    # HELPERS
+    # ----------------------------------------------------
+    def _send(self, status, body, content_type="application/json"):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _sleep_latency(self):
+        config = self.server.config
+        delay = config["latency_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+        time.sleep(max(delay, 0) / 1000)
+
+    def _answer(self, messages, max_tokens):
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        if "Return ONLY a floating number" in prompt:
+            return f"{self.server.config['faithfulness']:.2f}", len(prompt.split())
+
+        words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(self.server.config["answer_tokens"])]
+        return " ".join(words[:max_tokens]), len(prompt.split())
+
+    # ----------------------------------------------------
+    # ROUTES
+    # ----------------------------------------------------
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            return self._send(200, {"object": "list", "data": [{"id": self.server.config["model"],
+                                                                "object": "model"}]})
+
+        if self.path.startswith("/fixtures/") and self.server.config["fixtures_dir"]:
+            name = os.path.basename(self.path[len("/fixtures/"):])
+            path = os.path.join(self.server.config["fixtures_dir"], name)
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    return self._send(200, f.read(), mimetypes.guess_type(path)[0] or "text/plain")
+
+        self._send(404, {"error": {"message": f"Not found: {self.path}"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send(404, {"error": {"message": f"Not found: {self.path}"}})
+
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        text, prompt_tokens = self._answer(request.get("messages", []), request.get("max_tokens") or 400)
+
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+
+        self._sleep_latency()
+        if request.get("stream"):
+            return self._stream(text, request)
+
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", self.server.config["model"]),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(text.split()),
+                      "total_tokens": prompt_tokens + len(text.split())},
+        })
+
+    def _stream(self, text, request):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", self.server.config["model"])
+
+        def event(delta, finish_reason=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for i, word in enumerate(text.split()):
+            time.sleep(self.server.config["token_ms"] / 1000)
+            event({"content": word if i == 0 else " " + word})
+        event({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer:
+    """Runs the fake endpoint on a background thread (port 0 → any free port)."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=300, jitter_ms=50, token_ms=5,
+                 answer_tokens=60, faithfulness=0.9, model="fake-llm", fixtures_dir=None):
+        self.httpd = ThreadingHTTPServer((host, port), FakeLLMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = {"latency_ms": latency_ms, "jitter_ms": jitter_ms, "token_ms": token_ms,
+                             "answer_tokens": answer_tokens, "faithfulness": faithfulness,
+                             "model": model, "fixtures_dir": fixtures_dir}
+        self.httpd.stats = {"requests": 0}
+        self.httpd.stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self):
+        return f"{self.url}/v1"
+
+    def stats(self):
+        with self.httpd.stats_lock:
+            return dict(self.httpd.stats)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8088)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--fixtures-dir")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.token_ms,
+                           args.answer_tokens, fixtures_dir=args.fixtures_dir)
+    print(f"🤖 Fake LLM listening → {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
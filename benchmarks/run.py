@@ -0,0 +1,139 @@
+"""
+run.py
+------
+Reproducible ingestion + query benchmark → one JSON file per run.
+
+- Synthetic corpus (corpora.py), fake OpenAI-compatible LLM (fake_llm.py) and
+  the local vector backend in a temp directory → no Milvus, no NVIDIA endpoint
+- Scenarios (scenarios.py): ingest, embed, query, load
+- The results record the git commit + settings; diff two runs with compare.py
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --scenarios ingest,query --docs 100 --llm-latency-ms 200
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import corpora, scenarios
+from benchmarks.fake_llm import FakeLLMServer
+
+SCENARIOS = ("ingest", "embed", "query", "load")
+RECORDED_ENV = ("EMBEDDING_MODEL", "EMBEDDING_BACKEND", "EMBEDDING_QUANTIZE", "EMBEDDING_THREADS",
+                "LOCAL_VECTOR_INDEX", "LOCAL_VECTOR_DTYPE", "INGEST_BATCH_SIZE", "RETRIEVAL_MODE",
+                "RERANK_ENABLED", "CONTEXT_TOKEN_BUDGET", "LLM_MAX_CONCURRENCY")
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "app"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def chunk_texts(corpus, limit):
+    """Chunk-sized texts for the embed scenario (same generator as the fixtures)."""
+    import random
+
+    rng = random.Random(2)
+    topics = [entry["topic"] for entry in corpus] or sorted(corpora.TOPICS)
+    return [corpora.paragraph(rng, topics[i % len(topics)]) for i in range(limit)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--paragraphs", type=int, default=12)
+    parser.add_argument("--formats", default=",".join(corpora.FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-chunks", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--load-requests", type=int, default=200)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--workdir", help="keep corpus + stores here (default: temp dir, removed)")
+    parser.add_argument("--out", help="default: benchmarks/results/<commit>-<time>.json")
+    args = parser.parse_args()
+
+    selected = args.scenarios.split(",")
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {sorted(unknown)} (expected {SCENARIOS})")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rag-bench-")
+    fixtures_dir = os.path.join(workdir, "corpus")
+    revision = git_revision()
+
+    corpus = corpora.generate_corpus(fixtures_dir, args.docs, args.paragraphs,
+                                     tuple(args.formats.split(",")), args.seed)
+    questions = corpora.questions(args.queries, seed=args.seed + 1)
+    print(f"📊 {len(corpus)} fixtures → {fixtures_dir}, scenarios: {selected}")
+
+    server = FakeLLMServer(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+                           fixtures_dir=fixtures_dir).start()
+    scenarios.configure_environment(workdir, server.base_url)
+    results = {}
+
+    try:
+        store = scenarios.open_store()
+
+        if "ingest" in selected:
+            results["ingest"] = scenarios.run_ingest(store, corpus, f"{server.url}/fixtures")
+            print(f"📥 ingest → {json.dumps(results['ingest'])}")
+
+        if "embed" in selected:
+            results["embed"] = scenarios.run_embed(chunk_texts(corpus, args.embed_chunks))
+            print(f"🧠 embed → {results['embed']['chunks_per_second']} chunks/sec")
+
+        if "query" in selected:
+            results["query"] = scenarios.run_query(store, questions, args.top_k)
+            print(f"🔍 query → {json.dumps(results['query'])}")
+
+        store.flush()   # the app opens the same store directory in the load scenario
+
+        if "load" in selected:
+            results["load"] = scenarios.run_load(questions, args.concurrency, args.load_requests, args.top_k)
+            print(f"🚦 load → {json.dumps(results['load'])}")
+    finally:
+        server.stop()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        **revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {**{k: v for k, v in vars(args).items() if k not in ("workdir", "out")},
+                     "env": {k: os.environ[k] for k in RECORDED_ENV if k in os.environ}},
+        "fake_llm_requests": server.stats()["requests"],
+        "scenarios": results,
+    }
+
+    out = args.out or os.path.join("benchmarks", "results",
+                                   f"{(revision['commit'] or 'nogit')[:10]}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written → {out}")
+
+
+if __name__ == "__main__":
+    main()
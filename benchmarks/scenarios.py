@@ -0,0 +1,235 @@
+"""
+scenarios.py
+------------
+The measured workloads. Each scenario returns a plain dict (→ results JSON).
+
+- ingest → extract + split + embed + insert of the fixture corpus (docs/sec)
+- embed  → embed_documents throughput on chunk-sized texts (chunks/sec)
+- query  → sequential retrieval and end-to-end answers in-process (p50/p95/p99)
+- load   → concurrent POST /query against the real FastAPI app (uvicorn)
+
+App modules are imported inside the scenarios: configure_environment() must
+run first, because app settings are read from the environment at import time.
+"""
+
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+# ---------------------------------------------------------
+# Environment
+# ---------------------------------------------------------
+def configure_environment(workdir, llm_base_url):
+    """Local vector backend + fake LLM, all state under workdir."""
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "LOCAL_VECTOR_DIR": os.path.join(workdir, "vectors"),
+        "INGEST_MANIFEST_DIR": os.path.join(workdir, "manifests"),
+        "LEXICAL_INDEX_DIR": os.path.join(workdir, "lexical"),
+        "LLM_BASE_URL": llm_base_url,
+        "LLM_MODEL": "fake-llm",
+    })
+    os.environ.setdefault("RAG_EVAL_MODE", "off")
+    os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")   # measure the pipeline, not the cache
+
+
+def open_store():
+    from app.services.rag import init_vectorstore
+    return init_vectorstore(collection_name="knowledge_base_vectors", backend="local")
+
+
+def latency_summary(seconds):
+    """Latencies in seconds → count / mean / p50 / p95 / p99 / max in ms."""
+    if not seconds:
+        return {"count": 0}
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+# ---------------------------------------------------------
+# Ingest
+# ---------------------------------------------------------
+def run_ingest(store, corpus, fixtures_url):
+    """Every fixture through ingest_source() (HTML via the fake server, as a URL)."""
+    from app.services.pipeline import ingest_source
+
+    per_format = {}
+    totals = {"docs": 0, "chunks": 0, "bytes": 0, "errors": 0}
+    started = time.perf_counter()
+
+    for entry in corpus:
+        fmt = entry["format"]
+        target = (f"{fixtures_url}/{os.path.basename(entry['path'])}" if fmt == "html"
+                  else entry["path"])
+        bucket = per_format.setdefault(fmt, {"docs": 0, "chunks": 0, "seconds": 0.0, "errors": 0})
+
+        doc_started = time.perf_counter()
+        try:
+            stats = ingest_source(target, store)
+        except Exception as e:   # missing optional loader (PyMuPDF, python-docx, ...) → counted, not fatal
+            bucket["errors"] += 1
+            bucket.setdefault("error", str(e))
+            totals["errors"] += 1
+            continue
+        bucket["seconds"] += time.perf_counter() - doc_started
+
+        bucket["docs"] += 1
+        bucket["chunks"] += stats["inserted"]
+        totals["docs"] += 1
+        totals["chunks"] += stats["inserted"]
+        totals["bytes"] += entry["bytes"]
+
+    seconds = time.perf_counter() - started
+    for bucket in per_format.values():
+        elapsed = bucket.pop("seconds")
+        bucket["docs_per_second"] = round(bucket["docs"] / elapsed, 2) if elapsed else None
+
+    return {
+        **totals,
+        "seconds": round(seconds, 3),
+        "docs_per_second": round(totals["docs"] / seconds, 2),
+        "chunks_per_second": round(totals["chunks"] / seconds, 2),
+        "mb_per_second": round(totals["bytes"] / seconds / 2**20, 3),
+        "per_format": per_format,
+    }
+
+
+# ---------------------------------------------------------
+# Embed
+# ---------------------------------------------------------
+def run_embed(texts, batch_size=64, repeats=3):
+    from app.services.Embeddings import embed_documents
+    from app.services.model_registry import model_stats
+
+    embed_documents(texts[:batch_size])   # load + first-call setup not timed
+    best = float("inf")
+
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for start in range(0, len(texts), batch_size):
+            embed_documents(texts[start:start + batch_size])
+        best = min(best, time.perf_counter() - started)
+
+    return {
+        "chunks": len(texts),
+        "batch_size": batch_size,
+        "seconds": round(best, 3),
+        "chunks_per_second": round(len(texts) / best, 1),
+        "models": model_stats(),
+    }
+
+
+# ---------------------------------------------------------
+# Query (in-process, sequential)
+# ---------------------------------------------------------
+def run_query(store, questions, top_k=3):
+    from app.services.llm_client import init_llm_client, close_llm_client
+    from app.services.rag import retrieve_documents, generate_rag_answer
+
+    init_llm_client()
+    retrieve_documents(store, "warmup", top_k)
+
+    retrieval, end_to_end = [], []
+    for question in questions:
+        started = time.perf_counter()
+        retrieve_documents(store, question, top_k)
+        retrieval.append(time.perf_counter() - started)
+
+    async def answer_all():
+        for question in questions:
+            started = time.perf_counter()
+            await generate_rag_answer(store, question, top_k, eval_mode="off")
+            end_to_end.append(time.perf_counter() - started)
+        await close_llm_client()
+
+    asyncio.run(answer_all())
+
+    return {"top_k": top_k, "retrieval": latency_summary(retrieval),
+            "end_to_end": latency_summary(end_to_end)}
+
+
+# ---------------------------------------------------------
+# Load (concurrent HTTP against the app)
+# ---------------------------------------------------------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """app.api:app under uvicorn on a background thread (lifespan included)."""
+
+    def __init__(self):
+        import uvicorn
+
+        self.port = _free_port()
+        self.server = uvicorn.Server(uvicorn.Config("app.api:app", host="127.0.0.1", port=self.port,
+                                                    log_level="warning"))
+        self._thread = threading.Thread(target=self.server.run, name="bench-app", daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self.server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("App server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self._thread.join(timeout=30)
+
+
+def run_load(questions, concurrency=16, requests=200, top_k=3):
+    """requests POST /query calls, concurrency in flight at a time."""
+    import httpx
+
+    async def drive(base_url):
+        latencies, errors = [], 0
+        pending = iter(range(requests))
+
+        async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+            async def worker():
+                nonlocal errors
+                for i in pending:   # shared iterator → each request sent once
+                    started = time.perf_counter()
+                    try:
+                        response = await client.post("/query", json={
+                            "question": questions[i % len(questions)], "top_k": top_k, "eval_mode": "off"})
+                        response.raise_for_status()
+                        latencies.append(time.perf_counter() - started)
+                    except httpx.HTTPError:
+                        errors += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return latencies, errors, time.perf_counter() - started
+
+    with AppServer() as server:
+        latencies, errors, seconds = asyncio.run(drive(server.url))
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 2),
+        "latency": latency_summary(latencies),
+    }
@@ -0,0 +1,48 @@
+import pytest
+from langchain_core.documents import Document
+
+from app import bulk_ingest
+from app.services import Embeddings
+from app.services.ingest_manifest import IngestManifest
+from app.services.local_vector_store import LocalVectorStore
+
+from tests.test_pipeline import DIM, PARAGRAPHS, SOURCE, fake_embed, records
+
+
+@pytest.fixture
+def ingester(tmp_path, monkeypatch):
+    monkeypatch.setattr(Embeddings, "embed_documents", fake_embed)
+    manifest = IngestManifest(str(tmp_path / "manifest.db"))
+    monkeypatch.setattr(bulk_ingest, "get_manifest", lambda namespace: manifest)
+    store = LocalVectorStore(str(tmp_path / "vectors"), dim=DIM, index="flat")
+    return bulk_ingest.BulkIngester(store, workers=1, batch_size=4)
+
+
+def ingest(ingester, doc_hash):
+    ingester.add_document({"source": SOURCE, "doc_hash": doc_hash, "records": records(PARAGRAPHS)})
+    ingester.finish()
+
+
+def test_pre_manifest_vectors_are_replaced(ingester):
+    old = [Document(page_content=f"old chunk {i}", metadata={"source": SOURCE, "chunk_index": i})
+           for i in range(5)]
+    ingester.store.insert(old, fake_embed(old))
+
+    ingest(ingester, "h1")
+
+    rows = ingester.store.query({"source": SOURCE}, limit=1000)
+    assert sorted(r["chunk_index"] for r in rows) == list(range(10))
+    assert not any(r["text"].startswith("old chunk") for r in rows)
+
+
+def test_extract_document_status(tmp_path, monkeypatch):
+    unknown = tmp_path / "data.xyz"
+    unknown.write_bytes(b"\x00\x01binary")
+    assert bulk_ingest.extract_document("data.xyz", str(unknown), None, None)["status"] == "unsupported"
+
+    def broken(path):
+        raise ValueError("bad page tree")
+
+    monkeypatch.setattr(bulk_ingest, "route_to_loader", broken)
+    result = bulk_ingest.extract_document("doc.txt", str(unknown), None, None)
+    assert result["status"] == "failed" and "bad page tree" in result["error"]
@@ -0,0 +1,78 @@
+import re
+
+import pytest
+from langchain_core.documents import Document
+
+from app.services import context_builder
+from app.services.context_builder import build_context, merge_overlap, merge_runs
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word (offsets like a fast HF tokenizer)."""
+    is_fast = True
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        spans = [m.span() for m in re.finditer(r"\S+", text)]
+        encoded = {"input_ids": list(range(len(spans)))}
+        if return_offsets_mapping:
+            encoded["offset_mapping"] = spans
+        return encoded
+
+
+@pytest.fixture(autouse=True)
+def word_tokenizer(monkeypatch):
+    monkeypatch.setattr(context_builder, "_tokenizer", WordTokenizer())
+
+
+def chunk(text, source="a.txt", index=0):
+    return Document(page_content=text, metadata={"source": source, "chunk_index": index})
+
+
+def test_merge_overlap_drops_repeated_text():
+    left = "The quick brown fox jumps over the lazy dog"
+    right = "jumps over the lazy dog and runs away"
+    assert merge_overlap(left, right) == "The quick brown fox jumps over the lazy dog and runs away"
+
+
+def test_merge_overlap_ignores_short_coincidences():
+    assert merge_overlap("ends with the", "the start") == "ends with the\n\nthe start"
+
+
+def test_merge_runs_joins_consecutive_chunks_in_relevance_order():
+    passages = merge_runs([
+        chunk("b two", "b.txt", 0),
+        chunk("a one", "a.txt", 1),
+        chunk("a zero", "a.txt", 0),
+        chunk("a three", "a.txt", 3),   # gap → separate passage
+        chunk("b two", "b.txt", 0),     # duplicate keeps its best rank
+    ])
+    assert [(p["source"], p["chunks"], p["rank"]) for p in passages] == [
+        ("b.txt", [0], 0), ("a.txt", [0, 1], 1), ("a.txt", [3], 3)]
+    assert passages[1]["text"] == "a zero\n\na one"
+
+
+def test_build_context_fits_the_budget():
+    docs = [chunk(" ".join(f"w{i}" for i in range(60)), "a.txt", 0),
+            chunk(" ".join(f"v{i}" for i in range(80)), "b.txt", 0)]
+
+    context, stats = build_context(docs, token_budget=120)
+
+    assert stats["tokens"] == 120
+    assert context.startswith("w0 ")
+    assert context.endswith(" v59")     # second passage truncated at a token boundary
+    assert stats["passages"] == 2 and stats["passages_used"] == 2
+    assert "raw_tokens" not in stats
+
+
+def test_build_context_skips_tiny_truncated_tail():
+    docs = [chunk(" ".join(["x"] * 90), "a.txt", 0), chunk(" ".join(["y"] * 90), "b.txt", 0)]
+    context, stats = build_context(docs, token_budget=100)
+    assert stats["passages_used"] == 1
+    assert "y" not in context
+
+
+def test_build_context_debug_reports_raw_tokens():
+    docs = [chunk("one two three", "a.txt", 0), chunk("four five", "b.txt", 0)]
+    context, stats = build_context(docs, token_budget=100, debug=True)
+    assert stats["raw_tokens"] == 5
+    assert context == "one two three\n\nfour five"
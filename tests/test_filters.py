@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.vector_db import build_filter_expr
+from app.services.vector_store import check_filters
+
+
+def test_no_filters():
+    assert check_filters(None) == []
+    assert check_filters({}) == []
+    assert build_filter_expr([]) is None
+
+
+def test_equality_membership_and_ranges():
+    clauses = check_filters({
+        "type": "pdf",
+        "source": ["a.pdf", "b.pdf"],
+        "chunk_index": {"gte": 10, "lt": 20},
+        "page": {"lte": 3},
+    })
+    assert clauses == [
+        ("type", "==", "pdf"),
+        ("source", "in", ["a.pdf", "b.pdf"]),
+        ("chunk_index", ">=", 10),
+        ("chunk_index", "<", 20),
+        ("page", "<=", 3),
+    ]
+    assert build_filter_expr(clauses) == (
+        'type == "pdf" and source in ["a.pdf", "b.pdf"] and '
+        'chunk_index >= 10 and chunk_index < 20 and page <= 3'
+    )
+
+
+def test_ingested_at_accepts_iso_timestamps():
+    expected = int(datetime.fromisoformat("2024-01-01T00:00:00").timestamp())
+    assert check_filters({"ingested_at": {"gte": "2024-01-01T00:00:00"}}) == [
+        ("ingested_at", ">=", expected)]
+    assert check_filters({"ingested_at": {"gt": 5}}) == [("ingested_at", ">", 5)]
+
+
+def test_string_literals_are_escaped():
+    expr = build_filter_expr(check_filters({"title": 'say "hi" \\ bye'}))
+    assert expr == 'title == "say \\"hi\\" \\\\ bye"'
+
+
+@pytest.mark.parametrize("filters", [
+    {"unknown": 1},                       # not a filterable field
+    {"type": 3},                          # wrong value type
+    {"chunk_index": "3"},
+    {"chunk_index": True},                # bools are not numbers here
+    {"source": []},                       # empty membership
+    {"type": {"gte": "a"}},               # range on a string field
+    {"chunk_index": {}},                  # empty range
+    {"chunk_index": {"between": [1, 2]}},
+    {"ingested_at": {"gte": "yesterday"}},
+])
+def test_invalid_filters_raise(filters):
+    with pytest.raises(ValueError):
+        check_filters(filters)
@@ -0,0 +1,42 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.services.hybrid import resolve_retrieval_mode, rrf_fuse
+
+
+def docs(*ids):
+    return [Document(page_content=f"doc {i}", metadata={"id": i, "score": 0.5}) for i in ids]
+
+
+def test_rrf_scores_and_ranks():
+    fused = rrf_fuse(docs(1, 2, 3), docs(3, 4), top_k=10, rrf_k=60)
+
+    # 3 is found by both retrievers → first; 1 only by dense at rank 1 → next
+    assert [d.metadata["id"] for d in fused] == [3, 1, 2, 4]
+    top = fused[0].metadata
+    assert top["score"] == pytest.approx(1 / 63 + 1 / 61, abs=1e-6)
+    assert (top["dense_rank"], top["lexical_rank"]) == (3, 1)
+    assert fused[1].metadata["lexical_rank"] is None
+
+
+def test_rrf_top_k_and_weights():
+    fused = rrf_fuse(docs(1, 2), docs(2, 1), top_k=1, dense_weight=1.0, lexical_weight=0.0)
+    assert [d.metadata["id"] for d in fused] == [1]
+
+    fused = rrf_fuse(docs(1, 2), docs(2, 1), top_k=1, dense_weight=0.0, lexical_weight=1.0)
+    assert [d.metadata["id"] for d in fused] == [2]
+
+
+def test_rrf_with_one_empty_list():
+    assert [d.metadata["id"] for d in rrf_fuse(docs(5, 6), [], top_k=5)] == [5, 6]
+    assert rrf_fuse([], [], top_k=5) == []
+
+
+def test_resolve_retrieval_mode():
+    class Store:
+        lexical = None
+
+    assert resolve_retrieval_mode("HYBRID") == "hybrid"
+    assert resolve_retrieval_mode("hybrid", Store()) == "dense"   # no lexical index
+    with pytest.raises(ValueError):
+        resolve_retrieval_mode("sparse")
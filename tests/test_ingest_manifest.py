@@ -0,0 +1,100 @@
+from app.services.ingest_manifest import (
+    IngestManifest, chunk_key, chunk_sha256, file_sha256, records_sha256
+)
+
+
+def make_manifest(tmp_path):
+    return IngestManifest(str(tmp_path / "manifest.db"))
+
+
+def test_file_hash_is_independent_of_block_size(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_bytes(b"abc" * 1000)
+    assert file_sha256(path) == file_sha256(path, block_size=7)
+
+
+def test_records_hash_depends_on_text_and_boundaries():
+    one = records_sha256([{"text": "ab"}, {"text": "c"}])
+    assert one == records_sha256([{"text": "ab"}, {"text": "c"}])
+    assert one != records_sha256([{"text": "a"}, {"text": "bc"}])
+
+
+def test_chunk_key_includes_position():
+    assert chunk_key("same text", 0) == chunk_key("same text", 0)
+    assert chunk_key("same text", 0) != chunk_key("same text", 1)
+    assert chunk_key("same text", 0) != chunk_sha256("same text")
+
+
+def test_doc_hash_round_trip(tmp_path):
+    manifest = make_manifest(tmp_path)
+    assert manifest.get_doc_hash("a.pdf") is None
+    assert not manifest.has_source("a.pdf")
+
+    manifest.set_doc_hash("a.pdf", "h1")
+    manifest.set_doc_hash("a.pdf", "h2")
+
+    assert manifest.get_doc_hash("a.pdf") == "h2"
+    assert manifest.has_source("a.pdf")
+    assert manifest.find_source_by_hash("h2") == "a.pdf"
+    assert manifest.find_source_by_hash("h1") is None
+
+
+def test_chunks_add_remove(tmp_path):
+    manifest = make_manifest(tmp_path)
+    manifest.add_chunks("a.pdf", {"c1": [1, 2], "c2": [3]})
+    manifest.add_chunks("b.pdf", {"c1": [9]})
+
+    assert manifest.chunk_ids("a.pdf") == {"c1": [1, 2], "c2": [3]}
+
+    manifest.remove_chunks("a.pdf", ["c1"])
+    assert manifest.chunk_ids("a.pdf") == {"c2": [3]}
+    assert manifest.chunk_ids("b.pdf") == {"c1": [9]}
+
+
+def test_complete_documents_is_one_transaction(tmp_path):
+    manifest = make_manifest(tmp_path)
+    manifest.add_chunks("a.pdf", {"old": [1]})
+    manifest.mark_in_progress(["a.pdf", "b.pdf"])
+
+    manifest.complete_documents([("a.pdf", "ha", {"new": [2]}, ["old"])])
+
+    assert manifest.chunk_ids("a.pdf") == {"new": [2]}
+    assert manifest.get_doc_hash("a.pdf") == "ha"
+    assert manifest.in_progress() == ["b.pdf"]
+
+
+def test_http_validators(tmp_path):
+    manifest = make_manifest(tmp_path)
+    url = "https://example.com/"
+    assert manifest.get_http_validators(url) is None
+
+    manifest.set_http_validators(url, '"v1"', None, ["https://example.com/a"])
+    assert manifest.get_http_validators(url) == {
+        "etag": '"v1"', "last_modified": None, "links": ["https://example.com/a"]}
+
+    # Nothing to revalidate with → treated as unknown
+    manifest.set_http_validators(url, None, None, [])
+    assert manifest.get_http_validators(url) is None
+
+
+def test_forget_and_clear(tmp_path):
+    manifest = make_manifest(tmp_path)
+    for source in ("a.pdf", "b.pdf"):
+        manifest.set_doc_hash(source, source)
+        manifest.add_chunks(source, {"c": [1]})
+    manifest.mark_in_progress(["a.pdf"])
+
+    manifest.forget("a.pdf")
+    assert not manifest.has_source("a.pdf")
+    assert manifest.chunk_ids("a.pdf") == {}
+    assert manifest.in_progress() == []
+    assert manifest.has_source("b.pdf")
+
+    manifest.clear()
+    assert not manifest.has_source("b.pdf")
+    assert manifest.chunk_ids("b.pdf") == {}
+
+
+def test_persists_across_connections(tmp_path):
+    make_manifest(tmp_path).set_doc_hash("a.pdf", "h")
+    assert make_manifest(tmp_path).get_doc_hash("a.pdf") == "h"
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from app.services.local_vector_store import LocalVectorStore
+
+DIM = 32
+N = 300
+INDEXES = ["flat", "sq8", "binary"]
+
+
+def corpus(n=N, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    docs = [Document(page_content=f"chunk {i}",
+                     metadata={"source": f"doc{i % 3}.txt", "type": "pdf" if i % 2 else "txt",
+                               "title": f"doc{i % 3}", "chunk_index": i // 3, "page": i % 5})
+            for i in range(n)]
+    return docs, vectors
+
+
+@pytest.fixture(params=INDEXES)
+def filled(request, tmp_path):
+    docs, vectors = corpus()
+    store = LocalVectorStore(str(tmp_path / "store"), dim=DIM, index=request.param)
+    ids = store.insert(docs, vectors)
+    return store, ids, vectors, request.param, tmp_path
+
+
+def test_insert_returns_one_id_per_doc(filled):
+    store, ids, _, _, _ = filled
+    assert ids == list(range(N))
+    assert store.count() == N
+
+
+def test_search_finds_the_query_vector_itself(filled):
+    store, ids, vectors, _, _ = filled
+    results = store.search_batch(vectors[:20], k=3)
+    assert [r[0].metadata["id"] for r in results] == ids[:20]
+    assert results[0][0].metadata["score"] == pytest.approx(1.0, abs=1e-3)
+    assert results[0][0].page_content == "chunk 0"
+
+
+def test_filtered_search(filled):
+    store, _, vectors, _, _ = filled
+    docs = store.search(vectors[0], k=10, filters={"type": "pdf", "page": {"gte": 2}})
+    assert len(docs) == 10
+    assert all(d.metadata["type"] == "pdf" and d.metadata["page"] >= 2 for d in docs)
+    assert 0 not in {d.metadata["id"] for d in docs}   # id 0 is a txt chunk
+
+    assert store.search(vectors[0], k=5, filters={"source": "missing.txt"}) == []
+    with pytest.raises(ValueError):
+        store.search(vectors[0], k=5, filters={"unknown": 1})
+
+
+def test_delete_ids_and_source(filled):
+    store, _, vectors, _, _ = filled
+    store.delete_ids([0, 1])
+    assert store.count() == N - 2
+    assert {0, 1}.isdisjoint(d.metadata["id"] for d in store.search(vectors[0], k=10))
+
+    store.delete_source("doc2.txt", keep_ids=[2])
+    assert {r["source"] for r in store.query(limit=N)} == {"doc0.txt", "doc1.txt", "doc2.txt"}
+    assert [r["id"] for r in store.query({"source": "doc2.txt"}, limit=N)] == [2]
+
+    store.delete_source("doc2.txt")
+    assert store.query({"source": "doc2.txt"}, limit=N) == []
+
+
+def test_reopen_from_disk(filled):
+    store, ids, vectors, index, tmp_path = filled
+    store.delete_ids([5])
+    store.flush()
+
+    reopened = LocalVectorStore(str(tmp_path / "store"), dim=DIM, index=index)
+    assert reopened.count() == N - 1
+    assert reopened.search(vectors[7], k=1)[0].metadata["id"] == ids[7]
+    assert 5 not in {d.metadata["id"] for d in reopened.search(vectors[5], k=5)}
+
+    # New ids continue after the reopened rows
+    docs, more = corpus(2, seed=1)
+    assert reopened.insert(docs, more) == [N, N + 1]
+
+
+def test_reopen_with_other_dim_fails(tmp_path):
+    LocalVectorStore(str(tmp_path / "store"), dim=DIM)
+    with pytest.raises(ValueError):
+        LocalVectorStore(str(tmp_path / "store"), dim=DIM * 2)
+
+
+def test_mismatched_insert_raises(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "store"), dim=DIM)
+    docs, vectors = corpus(3)
+    with pytest.raises(ValueError):
+        store.insert(docs, vectors[:2])
+    assert store.insert([], np.empty((0, DIM), dtype=np.float32)) == []
+    assert store.count() == 0
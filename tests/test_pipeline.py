@@ -0,0 +1,115 @@
+import hashlib
+import threading
+
+import numpy as np
+import pytest
+
+from app.services import pipeline
+from app.services.ingest_manifest import IngestManifest
+from app.services.local_vector_store import LocalVectorStore
+from app.services.pipeline import IngestCancelled, ingest_document
+
+DIM = 8
+SOURCE = "doc.txt"
+
+
+def fake_embed(docs, model_name=None):
+    """Deterministic unit vectors from the chunk text (no model needed)."""
+    vectors = []
+    for doc in docs:
+        seed = int(hashlib.md5(doc.page_content.encode()).hexdigest()[:8], 16)
+        v = np.random.default_rng(seed).standard_normal(DIM)
+        vectors.append(v / np.linalg.norm(v))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "embed_documents", fake_embed)
+    store = LocalVectorStore(str(tmp_path / "vectors"), dim=DIM, index="flat")
+    manifest = IngestManifest(str(tmp_path / "manifest.db"))
+    return store, manifest
+
+
+def records(paragraphs):
+    return [{"text": text, "source": SOURCE, "title": SOURCE, "type": "txt", "chunk_index": i}
+            for i, text in enumerate(paragraphs)]
+
+
+PARAGRAPHS = [f"Paragraph number {i} about topic {i}." for i in range(10)]
+
+
+def live_chunks(store):
+    rows = store.query({"source": SOURCE}, limit=1000)
+    return sorted(r["chunk_index"] for r in rows)
+
+
+def assert_manifest_matches_store(store, manifest):
+    live = {r["id"] for r in store.query({"source": SOURCE}, limit=1000)}
+    recorded = [pk for ids in manifest.chunk_ids(SOURCE).values() for pk in ids]
+    assert sorted(recorded) == sorted(live)
+
+
+def test_first_ingest_and_unchanged_skip(env):
+    store, manifest = env
+    stats = ingest_document(SOURCE, records(PARAGRAPHS), "h1", store, manifest, batch_size=3)
+    assert stats["inserted"] == 10
+    assert live_chunks(store) == list(range(10))
+
+    again = ingest_document(SOURCE, records(PARAGRAPHS), "h1", store, manifest, batch_size=3)
+    assert again["unchanged"] and store.count() == 10
+
+
+def test_cancelled_first_ingest_resumes_without_losing_chunks(env):
+    store, manifest = env
+    cancel = threading.Event()
+
+    def cancel_after_first_batch(stats):
+        if stats["inserted"] or stats["embedded"]:
+            cancel.set()
+
+    with pytest.raises(IngestCancelled):
+        ingest_document(SOURCE, records(PARAGRAPHS), "h1", store, manifest, batch_size=3,
+                        on_progress=cancel_after_first_batch, cancel_event=cancel)
+
+    landed = store.count()
+    assert 0 < landed < 10
+    assert not manifest.has_source(SOURCE)
+
+    stats = ingest_document(SOURCE, records(PARAGRAPHS), "h1", store, manifest, batch_size=3)
+
+    assert stats["skipped"] == landed
+    assert stats["inserted"] == 10 - landed
+    assert live_chunks(store) == list(range(10))   # every chunk has exactly one live vector
+    assert_manifest_matches_store(store, manifest)
+
+
+def test_vectors_from_before_fingerprinting_are_replaced(env):
+    store, manifest = env
+    docs = list(pipeline.iter_split_documents(pipeline.iter_langchain_docs(records(PARAGRAPHS[:3]))))
+    store.insert(docs, fake_embed(docs))   # stored without any manifest entry
+
+    ingest_document(SOURCE, records(PARAGRAPHS), "h1", store, manifest, batch_size=3)
+
+    assert live_chunks(store) == list(range(10))
+    assert_manifest_matches_store(store, manifest)
+
+
+def test_changed_document_replaces_only_changed_chunks(env):
+    store, manifest = env
+    ingest_document(SOURCE, records(PARAGRAPHS), "h1", store, manifest, batch_size=3)
+
+    changed = PARAGRAPHS[:-1] + ["A completely different last paragraph."]
+    stats = ingest_document(SOURCE, records(changed), "h2", store, manifest, batch_size=3)
+
+    assert (stats["inserted"], stats["skipped"], stats["deleted"]) == (1, 9, 1)
+    assert live_chunks(store) == list(range(10))
+    assert_manifest_matches_store(store, manifest)
+
+
+def test_url_source_key_matches_crawler():
+    from app.services.loaders.crawler import normalize_url
+
+    url = "https://Example.COM#intro"
+    assert pipeline.source_key(url) == normalize_url(url) == "https://example.com/"
+    assert pipeline.source_key("docs/../docs/a.txt") == str(pipeline.Path("docs/../docs/a.txt"))
@@ -0,0 +1,66 @@
+import asyncio
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from app.services import evaluations, rag
+from app.services.semantic_cache import SemanticCache
+from app.services.vector_store import VECTOR_DIM
+
+DOCS = [Document(page_content="Milvus stores vectors.", metadata={"id": 1, "source": "a.txt"})]
+
+
+@pytest.fixture
+def fake_rag(monkeypatch):
+    calls = {"llm": 0, "evaluations": 0}
+
+    async def embed(question):
+        return np.ones(VECTOR_DIM, dtype=np.float32)   # every question → same vector → cache hit
+
+    async def retrieve(*args, **kwargs):
+        return DOCS
+
+    async def llm(context, question):
+        calls["llm"] += 1
+        return "Milvus stores vectors."
+
+    async def evaluate(question, docs, answer):
+        calls["evaluations"] += 1
+        return {"context_recall": 1.0, "faithfulness": 1.0, "rag_score": 100.0}
+
+    monkeypatch.setattr(rag, "semantic_cache", SemanticCache(dim=VECTOR_DIM))
+    monkeypatch.setattr(rag, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(rag, "aembed_query", embed)
+    monkeypatch.setattr(rag, "aretrieve_documents", retrieve)
+    monkeypatch.setattr(rag, "aget_llm_answer", llm)
+    monkeypatch.setattr(rag, "evaluate_rag", evaluate)
+    monkeypatch.setattr(rag, "build_context", lambda docs: (docs[0].page_content, {"tokens": 3}))
+    return calls
+
+
+def answer(question, eval_mode):
+    return asyncio.run(rag.generate_rag_answer(None, question, top_k=1, eval_mode=eval_mode))
+
+
+def test_cache_hit_runs_the_requested_evaluation(fake_rag):
+    first = answer("what stores vectors?", "off")
+    assert not first["cached"] and first["rag_score"] is None
+
+    second = answer("which component stores vectors?", "inline")
+
+    assert second["cached"]
+    assert fake_rag["llm"] == 1                      # answer reused
+    assert fake_rag["evaluations"] == 1              # but evaluated for this request
+    assert second["rag_score"] == 100.0 and second["evaluation_status"] == "done"
+    assert evaluations.get(second["query_id"])["status"] == "done"
+
+
+def test_cache_hit_gets_a_fresh_query_id(fake_rag):
+    first = answer("what stores vectors?", "inline")
+    second = answer("what stores vectors?", "off")
+
+    assert second["cached"]
+    assert second["query_id"] != first["query_id"]
+    assert second["cached_query_id"] == first["query_id"]
+    assert second["rag_score"] is None and second["evaluation_status"] == "skipped"
@@ -0,0 +1,51 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from app.services.uploads import UploadTooLarge, safe_filename, save_upload
+
+
+def test_safe_filename():
+    assert safe_filename("../../etc/passwd") == "passwd"
+    assert safe_filename("C:\\docs\\report.pdf") == "report.pdf"
+    assert safe_filename("a b?.txt") == "a b_.txt"
+    assert safe_filename("") == "upload"
+    assert safe_filename(None) == "upload"
+
+
+def test_save_upload_hashes_while_streaming(tmp_path):
+    data = os.urandom(10_000)
+    saved = save_upload(io.BytesIO(data), "doc.pdf", directory=str(tmp_path), chunk_size=1024)
+
+    assert saved["size"] == len(data)
+    assert saved["sha256"] == hashlib.sha256(data).hexdigest()
+    assert os.path.basename(saved["path"]) == f"{saved['sha256'][:16]}-doc.pdf"
+    with open(saved["path"], "rb") as f:
+        assert f.read() == data
+    assert os.listdir(tmp_path) == [os.path.basename(saved["path"])]   # no temp file left
+
+
+def test_same_bytes_same_path(tmp_path):
+    first = save_upload(io.BytesIO(b"same"), "a.txt", directory=str(tmp_path))
+    second = save_upload(io.BytesIO(b"same"), "a.txt", directory=str(tmp_path))
+    other = save_upload(io.BytesIO(b"different"), "a.txt", directory=str(tmp_path))
+
+    assert first["path"] == second["path"]
+    assert other["path"] != first["path"]
+
+
+def test_limit_is_enforced_and_partial_file_removed(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        save_upload(io.BytesIO(b"x" * 5000), "big.bin", directory=str(tmp_path),
+                    max_bytes=4096, chunk_size=1000)
+    assert os.listdir(tmp_path) == []
+
+
+def test_limit_boundary_and_no_limit(tmp_path):
+    exact = save_upload(io.BytesIO(b"x" * 4096), "ok.bin", directory=str(tmp_path), max_bytes=4096)
+    assert exact["size"] == 4096
+
+    unlimited = save_upload(io.BytesIO(b"y" * 10_000), "big.bin", directory=str(tmp_path), max_bytes=0)
+    assert unlimited["size"] == 10_000